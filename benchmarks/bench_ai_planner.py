@@ -0,0 +1,100 @@
+# benchmarks/bench_ai_planner.py
+
+"""
+bench_ai_planner.py
+-------------------
+测量任务很多时 AIService.generate_plan 的分组总结(map-reduce)流程：
+- 单个请求提示词的最大 token 数是否受 token_budget 限制
+- 各阶段(分组 / 并行总结 / 合并)耗时随并发数的变化
+默认通过 HTTP 访问本地 FakeLLMServer；--backend mock 使用进程内的 MockBackend，
+连 openai 库都不需要，适合在 CI 中测量端到端规划延迟。两种方式都不需要网络和 API Key。
+用法：
+    python benchmarks/bench_ai_planner.py --tasks 600 --budget 4000 --workers 1 4 8
+    python benchmarks/bench_ai_planner.py --backend mock --jitter 0.1
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.ai_service import AIService, estimate_tokens
+from src.core.llm_backend import MockBackend, OpenAICompatibleBackend
+from src.utils.fake_llm_server import FakeLLMServer
+
+
+def make_tasks(count: int, goals: int) -> list:
+    tasks = [
+        {"id": i + 1, "title": f"长期目标 {i}：系统学习第 {i} 个方向", "goal_type": "long-term",
+         "task_type": "monthly", "parent_id": None}
+        for i in range(goals)
+    ]
+    for i in range(count - goals):
+        parent = (i % (goals + 1)) or None  # 一部分任务不属于任何长期目标
+        tasks.append({"id": goals + i + 1, "title": f"短期任务 {i}：完成第 {i} 个练习并整理笔记",
+                      "goal_type": "short-term", "task_type": "daily", "parent_id": parent})
+    return tasks
+
+
+def run(backend, sent_messages, tasks: list, budget: int, workers: int) -> dict:
+    """
+    :param sent_messages: 返回后端至今收到的所有请求消息列表的函数
+    """
+    service = AIService(backend=backend, token_budget=budget, max_workers=workers)
+    first_request = len(sent_messages())
+    timings = {}
+    start = time.perf_counter()
+    service.generate_plan(tasks, timings=timings)
+    total_ms = round((time.perf_counter() - start) * 1000, 1)
+    prompts = [
+        sum(estimate_tokens(m["content"]) for m in messages)
+        for messages in sent_messages()[first_request:]
+    ]
+    return {
+        "token_budget": budget,
+        "workers": workers,
+        "requests": len(prompts),
+        "max_prompt_tokens": max(prompts),
+        "total_ms": total_ms,
+        **timings,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI 规划分组总结基准")
+    parser.add_argument("--tasks", type=int, default=600)
+    parser.add_argument("--goals", type=int, default=12)
+    parser.add_argument("--budget", type=int, default=4000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--first-token-delay", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.0, help="每个请求额外的随机延迟上限(秒)")
+    parser.add_argument("--backend", choices=("http", "mock"), default="http")
+    args = parser.parse_args()
+
+    tasks = make_tasks(args.tasks, args.goals)
+    reply = "优先完成临近截止的任务，把练习与笔记整理合并安排。" * 5
+
+    def run_all(backend, sent_messages):
+        # 不限预算：所有任务放进一个请求，作为对照
+        results = [run(backend, sent_messages, tasks, budget=10 ** 9, workers=1)]
+        for workers in args.workers:
+            results.append(run(backend, sent_messages, tasks, budget=args.budget, workers=workers))
+        return results
+
+    if args.backend == "mock":
+        backend = MockBackend(reply=reply, latency=args.first_token_delay, jitter=args.jitter)
+        results = run_all(backend, lambda: [messages for _, messages in backend.calls])
+    else:
+        with FakeLLMServer(reply=reply, first_token_delay=args.first_token_delay, jitter=args.jitter) as server:
+            backend = OpenAICompatibleBackend(api_key="test", base_url=server.base_url)
+            results = run_all(backend, lambda: [body["messages"] for body in server.requests])
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# benchmarks/bench_ai_stream.py
+
+"""
+bench_ai_stream.py
+------------------
+对比 AIService.generate_plan（等待完整响应）与 stream_plan（流式）的首字延迟和总耗时。
+使用本地 FakeLLMServer，不需要网络和 API Key。
+用法：
+    python benchmarks/bench_ai_stream.py --first-token-delay 0.5 --token-delay 0.02
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.ai_service import AIService
+from src.utils.fake_llm_server import FakeLLMServer
+
+TASKS = [
+    {"title": f"任务 {i}", "goal_type": "short-term", "task_type": "daily"} for i in range(20)
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI 规划流式输出基准")
+    parser.add_argument("--first-token-delay", type=float, default=0.5)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    args = parser.parse_args()
+
+    reply = "按优先级安排任务，先完成短期目标，再逐步推进长期目标。" * 10
+    with FakeLLMServer(reply=reply, first_token_delay=args.first_token_delay,
+                       token_delay=args.token_delay) as server:
+        service = AIService(api_key="test", base_url=server.base_url)
+
+        start = time.perf_counter()
+        service.generate_plan(TASKS)
+        blocking_total = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ttft = None
+        for _ in service.stream_plan(TASKS):
+            if ttft is None:
+                ttft = time.perf_counter() - start
+        stream_total = time.perf_counter() - start
+
+    print(json.dumps({
+        "blocking_first_output_ms": round(blocking_total * 1000, 1),
+        "blocking_total_ms": round(blocking_total * 1000, 1),
+        "stream_first_token_ms": round(ttft * 1000, 1),
+        "stream_total_ms": round(stream_total * 1000, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
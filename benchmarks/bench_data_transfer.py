@@ -0,0 +1,111 @@
+# benchmarks/bench_data_transfer.py
+
+"""
+bench_data_transfer.py
+----------------------
+批量导出 / 导入的吞吐与内存基准：生成 JSONL 和 CSV 文件(任务带父子关系)，
+分别导入空库再导出，输出每种格式的耗时和每秒行数，并检查导入后父子关系是否保持。
+加 --trace-memory 时另外记录 Python 峰值内存(tracemalloc 会明显拖慢耗时，两者不要同时比较)；
+峰值由 chunk_size 决定，与文件行数无关。
+用法：
+    python benchmarks/bench_data_transfer.py --rows 1000000
+    python benchmarks/bench_data_transfer.py --rows 200000 --trace-memory
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.database import Database
+from src.utils.data_transfer import export_table, import_table
+
+SUBTASKS_PER_GOAL = 9
+
+
+def write_source_files(workdir: str, rows: int) -> dict:
+    """用一个源库生成 rows 个任务和 rows 条学习记录，导出为 JSONL / CSV 作为导入的输入"""
+    source = Database(os.path.join(workdir, "source.db"))
+    source.import_tasks(
+        {
+            "id": i,
+            "title": f"任务 {i}",
+            "description": f"描述 {i}",
+            "goal_type": "long-term" if i % (SUBTASKS_PER_GOAL + 1) == 0 else "short-term",
+            # 每个长期目标后面跟着它的子任务
+            "parent_id": None if i % (SUBTASKS_PER_GOAL + 1) == 0 else i - i % (SUBTASKS_PER_GOAL + 1),
+            "is_completed": i % 3 == 0,
+        }
+        for i in range(rows)
+    )
+    source.import_learning_logs(
+        {"domain": f"领域 {i % 20}", "minutes": 25 + i % 60, "created_at": f"2024-{i % 12 + 1:02d}-01 08:00:00"}
+        for i in range(rows)
+    )
+    files = {}
+    for fmt in ("jsonl", "csv"):
+        for entity in ("tasks", "learning_log"):
+            path = os.path.join(workdir, f"{entity}.{fmt}")
+            export_table(source, entity, path)
+            files[(entity, fmt)] = path
+    source.close()
+    return files
+
+
+def measure(func, trace_memory: bool = False):
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - start
+    result = {
+        "rows": count,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": int(count / elapsed) if elapsed else None,
+    }
+    if trace_memory:
+        result["peak_python_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 2)
+        tracemalloc.stop()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量导出 / 导入基准")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--trace-memory", action="store_true")
+    args = parser.parse_args()
+
+    results = {"rows": args.rows}
+    with tempfile.TemporaryDirectory() as workdir:
+        files = write_source_files(workdir, args.rows)
+        for fmt in ("jsonl", "csv"):
+            db = Database(os.path.join(workdir, f"target_{fmt}.db"))
+            for entity in ("tasks", "learning_log"):
+                results[f"import_{entity}_{fmt}"] = measure(
+                    lambda: import_table(db, entity, files[(entity, fmt)]), args.trace_memory
+                )
+                results[f"export_{entity}_{fmt}"] = measure(
+                    lambda: export_table(db, entity, os.path.join(workdir, f"out_{entity}.{fmt}")),
+                    args.trace_memory
+                )
+            # 每个子任务的父任务都应是紧挨在它前面的长期目标
+            results[f"parents_ok_{fmt}"] = db.conn.execute(
+                """
+                SELECT COUNT(*) FROM tasks c JOIN tasks p ON p.id = c.parent_id
+                WHERE p.goal_type = 'long-term' AND c.id - p.id BETWEEN 1 AND ?;
+                """,
+                (SUBTASKS_PER_GOAL,)
+            ).fetchone()[0] == args.rows - (args.rows + SUBTASKS_PER_GOAL) // (SUBTASKS_PER_GOAL + 1)
+            db.close()
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
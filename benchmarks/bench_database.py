@@ -0,0 +1,253 @@
+# benchmarks/bench_database.py
+
+"""
+bench_database.py
+-----------------
+Database 层的可复现基准套件。
+按给定规模（默认 1k / 10k / 100k，可加 1M）用固定随机种子生成长期目标 + 子任务树和学习记录，
+逐项测量常用操作，输出每项的 p50 / p95 延迟(毫秒)与每秒处理行数(JSON)。
+可与保存的基线比较，任何一项的 p50 明显变慢时以非零状态码退出：几十次采样的 p95 主要反映调度抖动，
+同一份代码连续运行也会相差一倍以上，不适合作为门槛；p50 的波动约在 1.5 倍以内，
+默认容差为 100%(慢一倍以上才算回归)，丢失索引、退化为全表扫描等问题通常慢得多，仍会被发现。
+仓库中的 benchmarks/baseline.json 是在开发机上用默认参数生成的基线(生成环境见其中的 meta)，
+--baseline 不带路径时与它比较；换了机器请先在改动前用 --save-baseline 生成本机基线再比较。
+用法：
+    python benchmarks/bench_database.py --sizes 1000 10000 --output result.json
+    python benchmarks/bench_database.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_database.py --baseline --tolerance 0.5
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.database import Database
+
+SEED = 20240101
+SUBTASKS_PER_GOAL = 19
+COMPLETED_RATIO = 0.3
+WORDS = ["学习", "编程", "阅读", "英语", "数学", "运动", "写作", "项目",
+         "报告", "会议", "复习", "整理", "设计", "测试", "部署"]
+DOMAINS = [f"领域 {i}" for i in range(10)]
+
+
+# =================================================================
+#                           数据生成
+# =================================================================
+
+def generate_dataset(db: Database, rows: int, seed: int = SEED):
+    """
+    生成约 rows 个任务（每个长期目标带 SUBTASKS_PER_GOAL 个子任务，约 30% 已完成）
+    以及 rows 条跨两年的学习记录。
+    """
+    rng = random.Random(seed)
+    goal_count = max(1, rows // (SUBTASKS_PER_GOAL + 1))
+    goal_ids = db.bulk_add_tasks(
+        {"title": "".join(rng.sample(WORDS, 2)) + f"目标 {i}", "goal_type": "long-term", "task_type": "monthly"}
+        for i in range(goal_count)
+    )
+    sub_count = max(0, rows - goal_count)
+    task_ids = db.bulk_add_tasks(
+        {
+            "title": "".join(rng.sample(WORDS, 3)) + f" {i}",
+            "description": "".join(rng.sample(WORDS, 4)),
+            "parent_id": goal_ids[i % goal_count],
+        }
+        for i in range(sub_count)
+    )
+    db.bulk_complete_tasks(rng.sample(task_ids, int(len(task_ids) * COMPLETED_RATIO)))
+    db.bulk_add_learning_time(
+        (
+            rng.choice(DOMAINS),
+            rng.randint(5, 120),
+            f"{2023 + rng.randrange(2)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:00:00",
+        )
+        for _ in range(rows)
+    )
+    db.conn.execute("ANALYZE;")
+
+
+# =================================================================
+#                           计时工具
+# =================================================================
+
+def percentile(sorted_values: list, pct: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(samples: list, rows_per_sample: list) -> dict:
+    """samples 为每次调用的耗时(秒)，rows_per_sample 为每次调用处理的行数"""
+    ordered = sorted(samples)
+    total = sum(samples)
+    return {
+        "samples": len(samples),
+        "p50_ms": round(percentile(ordered, 50) * 1000, 4),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 4),
+        "rows_per_sec": round(sum(rows_per_sample) / total) if total else None,
+    }
+
+
+def measure(fn, args_list: list) -> dict:
+    """依次以 args_list 中的参数调用 fn；fn 返回本次处理的行数"""
+    samples, rows = [], []
+    for args in args_list:
+        start = time.perf_counter()
+        count = fn(*args)
+        samples.append(time.perf_counter() - start)
+        rows.append(count)
+    return summarize(samples, rows)
+
+
+# =================================================================
+#                           各项操作
+# =================================================================
+
+def bench_size(rows: int, workdir: str, synchronous: str, repeat: int) -> dict:
+    path = os.path.join(workdir, f"bench_{rows}.db")
+    db = Database(path, synchronous=synchronous)
+
+    start = time.perf_counter()
+    generate_dataset(db, rows)
+    results = {"generate": {"seconds": round(time.perf_counter() - start, 3)}}
+
+    rng = random.Random(SEED + rows)
+    open_ids = [t["id"] for t in db.get_tasks() if t["goal_type"] == "short-term"]
+
+    results["bulk_add_tasks"] = measure(
+        lambda n: len(db.bulk_add_tasks({"title": f"批量 {i}"} for i in range(n))),
+        [(1000,)] * max(3, repeat // 10)
+    )
+
+    def add_task(i):
+        db.add_task(f"基准任务 {i}", description="基准测试")
+        return 1
+    results["add_task"] = measure(add_task, [(i,) for i in range(repeat * 10)])
+
+    results["get_tasks"] = measure(lambda: len(db.get_tasks()), [()] * repeat)
+    results["get_completed_tasks"] = measure(lambda: len(db.get_completed_tasks()), [()] * repeat)
+
+    def complete_task(task_id):
+        db.complete_task(task_id)
+        return 1
+    targets = rng.sample(open_ids, min(len(open_ids), repeat * 10))
+    results["complete_task"] = measure(complete_task, [(task_id,) for task_id in targets])
+
+    results["get_learning_logs"] = measure(lambda: len(db.get_learning_logs()), [()] * repeat)
+    results["get_learning_totals"] = measure(
+        lambda: len(db.get_learning_totals("2023-02-15", "2024-08-20")), [()] * repeat
+    )
+    results["get_goal_progress"] = measure(lambda: len(db.get_goal_progress()), [()] * repeat)
+    goal_id = db.get_tasks()[0]["id"]
+    results["get_task_subtree"] = measure(lambda: len(db.get_task_subtree(goal_id)), [()] * repeat)
+    results["search_tasks"] = measure(lambda: len(db.search_tasks("学习编程")), [()] * repeat)
+    # 少于 3 个字符的检索词：常见(LIKE 扫描很快凑够结果)、较少(只在长期目标中出现)、不存在
+    for case, term in (("common", "学习"), ("rare", "目标"), ("missing", "任务")):
+        results[f"search_tasks_short_{case}"] = measure(lambda: len(db.search_tasks(term)), [()] * repeat)
+
+    # delete_completed_tasks 是破坏性的：每次在数据库副本上执行，复制时间不计入
+    samples, deleted = [], []
+    for i in range(3):
+        copy_path = os.path.join(workdir, f"bench_{rows}_copy{i}.db")
+        copy = Database(copy_path, synchronous=synchronous)
+        db.conn.backup(copy.conn)
+        count = copy.conn.execute("SELECT COUNT(*) FROM tasks WHERE is_completed = 1;").fetchone()[0]
+        start = time.perf_counter()
+        copy.delete_completed_tasks()
+        samples.append(time.perf_counter() - start)
+        deleted.append(count)
+        copy.close()
+        os.remove(copy_path)
+    results["delete_completed_tasks"] = summarize(samples, deleted)
+
+    db.close()
+    return results
+
+
+# =================================================================
+#                           基线比较
+# =================================================================
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def compare(current: dict, baseline: dict, tolerance: float, floor_ms: float) -> list:
+    """返回回归列表：p50 超过基线 (1 + tolerance) 倍且绝对差值大于 floor_ms 的项"""
+    regressions = []
+    for size, ops in current["results"].items():
+        for op, stats in ops.items():
+            base = baseline.get("results", {}).get(size, {}).get(op)
+            if not base or "p50_ms" not in stats or "p50_ms" not in base:
+                continue
+            limit = base["p50_ms"] * (1 + tolerance)
+            if stats["p50_ms"] > limit and stats["p50_ms"] - base["p50_ms"] > floor_ms:
+                regressions.append(
+                    f"{size} 行 / {op}: p50 {stats['p50_ms']} ms > 基线 {base['p50_ms']} ms (+{tolerance:.0%})"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Database 基准套件")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="数据规模，例如 1000 10000 100000 1000000")
+    parser.add_argument("--repeat", type=int, default=30, help="读操作的采样次数，写操作为其 10 倍")
+    parser.add_argument("--synchronous", default="NORMAL")
+    parser.add_argument("--output", help="把结果写入 JSON 文件")
+    parser.add_argument("--baseline", nargs="?", const=DEFAULT_BASELINE,
+                        help="与该基线 JSON 比较，出现回归时返回 1；不带路径时使用 benchmarks/baseline.json")
+    parser.add_argument("--save-baseline", help="把本次结果保存为基线")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="允许的 p50 相对变慢比例")
+    parser.add_argument("--floor-ms", type=float, default=0.25, help="小于该绝对差值(毫秒)的变化视为噪声")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "seed": SEED,
+            "synchronous": args.synchronous,
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.sizes:
+            report["results"][str(rows)] = bench_size(rows, workdir, args.synchronous, args.repeat)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        missing = [size for size in report["results"] if size not in baseline.get("results", {})]
+        if missing:
+            print(f"基线中没有 {', '.join(missing)} 行的结果，这些规模不参与比较", file=sys.stderr)
+        regressions = compare(report, baseline, args.tolerance, args.floor_ms)
+        if regressions:
+            print("\n性能回归：", file=sys.stderr)
+            for line in regressions:
+                print("  " + line, file=sys.stderr)
+            return 1
+        print("\n与基线相比没有发现性能回归。", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+# benchmarks/bench_merge.py
+
+"""
+bench_merge.py
+--------------
+远端数据合并(Database.apply_remote_changes)的基准与收敛检查：
+1. 合并耗时与批次大小的关系：全新导入一批，以及同一批中只有一部分比本地新(其余应被跳过)
+2. 两个副本从同一份数据出发，并发修改(包括删除与修改冲突、同一行两边都改)后互相交换修改，
+   以任意顺序、重复投递，最终两边的数据和行版本应完全一致
+3. 一整批待推送的修改都属于被归档的任务时，按 SyncEngine.push_changes 的方式分批推送，之后的修改仍应推送出去
+服务端只负责转发修改，这里直接在两个副本之间交换 get_changes_since 的结果。
+用法：
+    python benchmarks/bench_merge.py --sizes 100 1000 10000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.database import Database
+
+SEED = 20240101
+
+
+def state(db: Database) -> dict:
+    """副本中与本地 id 无关的可比较状态"""
+    tasks = db.conn.execute(
+        """
+        SELECT t.uid, t.title, t.is_completed, t.completed_at, p.uid AS parent_uid
+        FROM tasks t LEFT JOIN tasks p ON p.id = t.parent_id ORDER BY t.uid;
+        """
+    ).fetchall()
+    logs = db.conn.execute("SELECT uid, domain, minutes, created_at FROM learning_log ORDER BY uid;").fetchall()
+    meta = db.conn.execute("SELECT entity, uid, updated_at, origin, deleted FROM sync_meta ORDER BY entity, uid;").fetchall()
+    return {
+        "tasks": [tuple(r) for r in tasks],
+        "learning_log": [tuple(r) for r in logs],
+        "sync_meta": [tuple(r) for r in meta],
+        "learning_totals": [tuple(r) for r in db.conn.execute(
+            "SELECT domain, total_minutes FROM learning_rollup WHERE period = 'month' ORDER BY domain, bucket;"
+        )],
+    }
+
+
+def bench_batch_sizes(workdir: str, sizes: list) -> dict:
+    results = {}
+    for size in sizes:
+        source = Database(os.path.join(workdir, f"source_{size}.db"))
+        goal_ids = source.bulk_add_tasks({"title": f"目标 {i}", "goal_type": "long-term"} for i in range(size // 10 or 1))
+        source.bulk_add_tasks(
+            {"title": f"任务 {i}", "parent_id": goal_ids[i % len(goal_ids)]} for i in range(size - len(goal_ids))
+        )
+        batch = source.get_changes_since(0, limit=size)
+        target = Database(os.path.join(workdir, f"target_{size}.db"))
+        start = time.perf_counter()
+        applied_new = target.apply_remote_changes(batch)
+        new_ms = (time.perf_counter() - start) * 1000
+
+        # 源副本修改其中 10%，整批重新投递：只有这 10% 应被应用
+        task_ids = [t["id"] for t in source.get_tasks()][: size // 10]
+        source.bulk_complete_tasks(task_ids)
+        batch = source.snapshot_changes()
+        start = time.perf_counter()
+        applied_partial = target.apply_remote_changes(batch)
+        partial_ms = (time.perf_counter() - start) * 1000
+
+        results[size] = {
+            "merge_new_ms": round(new_ms, 2),
+            "merge_new_rows": applied_new,
+            "merge_10pct_changed_ms": round(partial_ms, 2),
+            "merge_10pct_changed_applied": applied_partial,
+            "converged": state(source) == state(target),
+        }
+        source.close()
+        target.close()
+    return results
+
+
+def check_convergence(workdir: str, rows: int = 200) -> dict:
+    rng = random.Random(SEED)
+    a = Database(os.path.join(workdir, "replica_a.db"))
+    b = Database(os.path.join(workdir, "replica_b.db"))
+    goal_ids = a.bulk_add_tasks({"title": f"目标 {i}", "goal_type": "long-term"} for i in range(rows // 10))
+    a.bulk_add_tasks({"title": f"任务 {i}", "parent_id": goal_ids[i % len(goal_ids)]} for i in range(rows))
+    a.bulk_add_learning_time((f"领域 {i % 5}", 30) for i in range(rows))
+    b.apply_remote_changes(a.snapshot_changes())
+    a_cursor = a.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log;").fetchone()[0]
+    b_cursor = b.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log;").fetchone()[0]
+    base_equal = state(a) == state(b)
+
+    # 并发修改：两边各自完成、删除任务并新增学习记录，部分任务两边都改
+    uids = [r["uid"] for r in a.conn.execute("SELECT uid FROM tasks ORDER BY id;")]
+    conflicts = rng.sample(uids, rows // 5)
+    for i, uid in enumerate(conflicts):
+        first, second = (a, b) if i % 2 else (b, a)
+        task_id = first.conn.execute("SELECT id FROM tasks WHERE uid = ?;", (uid,)).fetchone()[0]
+        (first.delete_task if i % 3 == 0 else first.complete_task)(task_id)
+        time.sleep(0.002)  # 保证两边的版本时间不同，后一个修改应胜出
+        task_id = second.conn.execute("SELECT id FROM tasks WHERE uid = ?;", (uid,)).fetchone()[0]
+        second.complete_task(task_id) if i % 3 == 0 else second.delete_task(task_id)
+    a.bulk_add_learning_time((f"领域 {i % 5}", 10) for i in range(20))
+    b.bulk_add_learning_time((f"领域 {i % 5}", 15) for i in range(20))
+
+    # 交换修改：打乱顺序并重复投递
+    from_a = a.get_changes_since(a_cursor, limit=10 ** 6)
+    from_b = b.get_changes_since(b_cursor, limit=10 ** 6)
+    rng.shuffle(from_a)
+    rng.shuffle(from_b)
+    half = len(from_a) // 2
+    b.apply_remote_changes(from_a[half:])
+    a.apply_remote_changes(from_b)
+    b.apply_remote_changes(from_a[:half])
+    reapplied = a.apply_remote_changes(from_b) + b.apply_remote_changes(from_a)
+    result = {
+        "base_equal": base_equal,
+        "conflicting_rows": len(conflicts),
+        "converged": state(a) == state(b),
+        "reapplied_after_converge": reapplied,
+        "learning_minutes": sum(r[1] for r in state(a)["learning_totals"]),
+    }
+    a.close()
+    b.close()
+    return result
+
+
+def check_archive_then_push(workdir: str, archived: int = 30, batch_size: int = 10) -> dict:
+    db = Database(os.path.join(workdir, "archive_push.db"))
+    ids = db.bulk_add_tasks({"title": f"旧任务 {i}"} for i in range(archived))
+    db.bulk_complete_tasks(ids)
+    db.conn.execute("UPDATE tasks SET completed_at = '2000-01-01T00:00:00';")
+    moved = 0
+    result = {"next": None}
+    while True:
+        result = db.archive_completed_tasks(30, after=result["next"])
+        moved += result["archived"]
+        if result["next"] is None:
+            break
+    new_uid = db.get_task(db.add_task("归档之后的新任务"))["uid"]
+
+    # 与 SyncEngine.push_changes 相同的循环：取一批、推进游标、清理，直到返回空批
+    cursor, pushed = int(db.get_sync_state("push_cursor", 0)), []
+    while True:
+        changes = db.get_changes_since(cursor, batch_size)
+        if not changes:
+            break
+        pushed.extend(change["uid"] for change in changes)
+        cursor = changes[-1]["seq"]
+        db.set_sync_state("push_cursor", cursor)
+        db.prune_change_log(cursor)
+    result = {
+        "archived": moved,
+        "pushed": len(pushed),
+        "new_task_pushed": new_uid in pushed,
+        "pending_after": db.get_pending_changes()["pending"],
+    }
+    db.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="远端数据合并基准与收敛检查")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        results = {
+            "batch_sizes": bench_batch_sizes(workdir, args.sizes),
+            "convergence": check_convergence(workdir),
+            "archive_then_push": check_archive_then_push(workdir),
+        }
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    archive = results["archive_then_push"]
+    ok = (results["convergence"]["converged"] and all(r["converged"] for r in results["batch_sizes"].values())
+          and archive["new_task_pushed"] and archive["pending_after"] == 0)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
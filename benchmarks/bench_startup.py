@@ -0,0 +1,99 @@
+# benchmarks/bench_startup.py
+
+"""
+bench_startup.py
+----------------
+测量 main_window.main() 的分阶段启动耗时，并检查首帧绘制时间与任务列表填充完成时间是否在预算之内。
+先在临时目录中用 bench_database.generate_dataset 生成 --tasks 个任务的 new_tasks.db
+(--tasks 0 为空库)以及上次关闭时会保存的任务快照(--no-snapshot 不生成)，
+再以 offscreen 平台启动程序，首帧绘制和首屏任务列表都完成后自动退出。
+cached_tasks 为用快照填充列表的时间(首帧即显示这些任务)，tasks_loaded 为任务查询返回并替换列表的时间，
+超出任一预算时以非零状态码退出。
+用法：
+    python benchmarks/bench_startup.py --tasks 10000 --budget-ms 800 --populated-budget-ms 1500 --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.bench_database import generate_dataset
+from src.core.database import DB_NAME, Database
+from src.core.task_snapshot import SNAPSHOT_ROWS, save_snapshot, snapshot_path
+
+MAIN_SCRIPT = os.path.join(PROJECT_ROOT, "src", "ui", "main_window.py")
+
+
+def seed(workdir: str, tasks: int, snapshot: bool = True):
+    """在程序默认的数据库位置生成数据和任务快照，关闭连接后再启动程序"""
+    if tasks <= 0:
+        return
+    db_name = os.path.join(workdir, DB_NAME)
+    db = Database(db_name)
+    generate_dataset(db, tasks)
+    if snapshot:
+        # 与 MainWindow._save_snapshot 相同：每个列表只保存开头的 SNAPSHOT_ROWS 行
+        open_tasks = db.get_tasks(include_completed=False)
+        lists = ([t for t in open_tasks if t["goal_type"] != "long-term"],
+                 [t for t in open_tasks if t["goal_type"] == "long-term"])
+        save_snapshot(snapshot_path(db_name), [t for tasks in lists for t in tasks[:SNAPSHOT_ROWS]])
+    db.close()
+
+
+def run_once(workdir: str) -> dict:
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    env["AINOTE_STARTUP_PROFILE"] = "1"
+    env["AINOTE_EXIT_AFTER_STARTUP"] = "1"
+    proc = subprocess.run([sys.executable, MAIN_SCRIPT], cwd=workdir, env=env,
+                          capture_output=True, text=True, timeout=60)
+    for line in reversed(proc.stderr.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    raise RuntimeError(f"未获取到启动耗时，退出码 {proc.returncode}:\n{proc.stderr}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="启动耗时基准")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--tasks", type=int, default=10000, help="预先写入的任务数，0 为空库")
+    parser.add_argument("--no-snapshot", action="store_true", help="不生成任务快照，首帧显示空列表")
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="首帧绘制(first_paint)的时间预算")
+    parser.add_argument("--populated-budget-ms", type=float, default=2000.0,
+                        help="任务列表填充完成(tasks_loaded)的时间预算")
+    args = parser.parse_args()
+
+    reports = []
+    with tempfile.TemporaryDirectory() as workdir:
+        seed(workdir, args.tasks, snapshot=not args.no_snapshot)
+        for _ in range(args.runs):
+            reports.append(run_once(workdir))
+
+    phases = {}
+    for report in reports:
+        for phase in report["phases"]:
+            phases.setdefault(phase["name"], []).append(phase["at_ms"])
+    summary = {name: round(statistics.median(values), 2) for name, values in phases.items()}
+    print(json.dumps({"runs": args.runs, "tasks": args.tasks, "median_at_ms": summary},
+                     ensure_ascii=False, indent=2))
+
+    failed = False
+    for name, label, budget in (("first_paint", "首帧绘制", args.budget_ms),
+                                ("tasks_loaded", "任务列表填充", args.populated_budget_ms)):
+        elapsed = summary.get(name)
+        if elapsed is None or elapsed > budget:
+            print(f"{label} {elapsed} ms 超出预算 {budget} ms", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
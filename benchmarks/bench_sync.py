@@ -0,0 +1,76 @@
+# benchmarks/bench_sync.py
+
+"""
+bench_sync.py
+-------------
+对比整包同步（upload_data）与增量同步（sync）每次传输的字节数。
+两个副本通过本地 SyncServer 同步，不需要真实后端。
+用法：
+    python benchmarks/bench_sync.py --tasks 10000 --edits 10
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.database import Database
+from src.utils.sync_engine import SyncEngine
+from src.utils.sync_server import SyncServer
+
+
+def full_snapshot(db: Database) -> dict:
+    return {
+        "tasks": [task.to_dict() for task in db.get_tasks(include_completed=True)],
+        "learning_log": [dict(row) for row in db.conn.execute("SELECT * FROM learning_log;")],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="同步流量基准")
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--edits", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir, SyncServer() as server:
+        local = Database(os.path.join(workdir, "local.db"))
+        remote = Database(os.path.join(workdir, "remote.db"))
+        ids = local.bulk_add_tasks({"title": f"任务 {i}"} for i in range(args.tasks))
+        local.bulk_add_learning_time((f"领域 {i % 5}", 30) for i in range(args.tasks // 10))
+
+        local_engine = SyncEngine(remote_url=server.url)
+        remote_engine = SyncEngine(remote_url=server.url)
+        initial = local_engine.sync(local)
+        remote_engine.sync(remote)
+
+        # 少量修改后的增量同步
+        local.bulk_complete_tasks(ids[:args.edits])
+        local.add_task("新任务")
+        delta = local_engine.sync(local)
+        pulled = remote_engine.sync(remote)
+
+        # 同样数据量下整包上传的开销
+        full_engine = SyncEngine(remote_url=server.url)
+        full_engine.upload_data(full_snapshot(local))
+
+        print(json.dumps({
+            "tasks": args.tasks,
+            "edits": args.edits + 1,
+            "initial_sync_bytes": initial["bytes_sent"] + initial["bytes_received"],
+            "delta_push_bytes": delta["bytes_sent"] + delta["bytes_received"],
+            "delta_pull_bytes": pulled["bytes_sent"] + pulled["bytes_received"],
+            "full_upload_bytes": full_engine.bytes_sent + full_engine.bytes_received,
+            "transport": local_engine.transport.stats(),
+            "replicas_equal": len(remote.get_tasks(include_completed=True)) == len(local.get_tasks(include_completed=True)),
+        }, indent=2))
+        local.close()
+        remote.close()
+
+
+if __name__ == "__main__":
+    main()
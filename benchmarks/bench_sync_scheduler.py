@@ -0,0 +1,165 @@
+# benchmarks/bench_sync_scheduler.py
+
+"""
+bench_sync_scheduler.py
+-----------------------
+后台同步调度(SyncScheduler)的网络往返次数基准，远端为本地 SyncServer，往返次数取自 SyncServer.requests：
+1. 以固定间隔做 N 次编辑(经 DatabaseWorker 写入)，对比每次编辑后手动 sync 与调度器合并同步的请求数
+2. 远端不可达期间的重试次数(应按退避增长，而不是每次编辑都重试)，恢复后修改应全部送达
+3. stop() 时推送尚未同步的修改，另一副本拉取后应看到全部任务
+用法：
+    python benchmarks/bench_sync_scheduler.py --edits 200 --interval 0.01
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.database import Database
+from src.core.db_worker import DatabaseWorker
+from src.utils.http_transport import HttpTransport
+from src.utils.sync_engine import SyncEngine
+from src.utils.sync_scheduler import SyncScheduler
+from src.utils.sync_server import SyncServer
+
+
+def edit(worker: DatabaseWorker, count: int, interval: float, prefix: str):
+    for i in range(count):
+        worker.call("add_task", f"{prefix} {i}").result()
+        time.sleep(interval)
+
+
+def remote_task_count(workdir: str, url: str, name: str) -> int:
+    """新建一个副本从远端拉取，返回它看到的任务数"""
+    db = Database(os.path.join(workdir, name))
+    SyncEngine(remote_url=url).sync(db)
+    count = db.conn.execute("SELECT COUNT(*) FROM tasks;").fetchone()[0]
+    db.close()
+    return count
+
+
+def bench_per_edit_sync(workdir: str, edits: int, interval: float) -> dict:
+    """基线：每次编辑后在调用方线程里同步一次"""
+    with SyncServer() as server:
+        db = Database(os.path.join(workdir, "manual.db"))
+        engine = SyncEngine(remote_url=server.url)
+        engine.sync(db)
+        before = server.requests
+        start = time.perf_counter()
+        for i in range(edits):
+            db.add_task(f"手动 {i}")
+            engine.sync(db)
+            time.sleep(interval)
+        elapsed = time.perf_counter() - start
+        db.close()
+        return {
+            "round_trips": server.requests - before,
+            "round_trips_per_edit": round((server.requests - before) / edits, 3),
+            "caller_blocked_seconds": round(elapsed - edits * interval, 3),
+        }
+
+
+def bench_scheduler(workdir: str, edits: int, interval: float, debounce: float) -> dict:
+    with SyncServer() as server:
+        worker = DatabaseWorker(os.path.join(workdir, "scheduled.db"))
+        scheduler = SyncScheduler(SyncEngine(remote_url=server.url), worker.db_name,
+                                  debounce=debounce, max_delay=debounce * 10, poll_interval=0)
+        worker.add_write_listener(scheduler.notify_change)
+        scheduler.start()
+        scheduler.flush(timeout=10)
+        before = server.requests
+        start = time.perf_counter()
+        edit(worker, edits, interval, "调度")
+        elapsed = time.perf_counter() - start
+        # 等待合并窗口结束后的那次同步完成
+        deadline = time.monotonic() + debounce * 20
+        while scheduler.status()["state"] != "idle" and time.monotonic() < deadline:
+            time.sleep(debounce / 4)
+        round_trips = server.requests - before
+        status = scheduler.status()
+        scheduler.stop()
+        worker.close()
+        return {
+            "round_trips": round_trips,
+            "round_trips_per_edit": round(round_trips / edits, 3),
+            "syncs": status["syncs"] - 1,
+            "caller_blocked_seconds": round(elapsed - edits * interval, 3),
+            "pending_after": status["pending"],
+            "remote_tasks": remote_task_count(workdir, server.url, "scheduled_peer.db"),
+        }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def bench_outage(workdir: str, edits: int, outage: float, backoff_base: float) -> dict:
+    """远端先不可达 outage 秒，期间持续编辑；之后启动远端，修改应在下一次重试时送达"""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    worker = DatabaseWorker(os.path.join(workdir, "outage.db"))
+    transport = HttpTransport(timeout=(0.5, 2.0), max_retries=0)
+    scheduler = SyncScheduler(SyncEngine(remote_url=url, transport=transport), worker.db_name,
+                              debounce=0.05, max_delay=0.5, poll_interval=0,
+                              backoff_base=backoff_base, backoff_max=backoff_base * 8)
+    worker.add_write_listener(scheduler.notify_change)
+    scheduler.start()
+    edit(worker, edits, outage / edits, "离线")
+    offline = scheduler.status()
+    attempts = transport.requests
+
+    server = SyncServer(port=port).start()
+    try:
+        recovered = scheduler.flush(timeout=backoff_base * 10)
+        # 离线期间再做一次编辑，验证 stop() 时会推送
+        worker.call("add_task", "退出前的修改").result()
+        scheduler.stop()
+        remote = remote_task_count(workdir, url, "outage_peer.db")
+    finally:
+        server.stop()
+        worker.close()
+    return {
+        "offline_state": offline["state"],
+        "failed_attempts": attempts,
+        "failures_during_outage": offline["failures"],
+        "lag_seconds_during_outage": offline["lag_seconds"],
+        "recovered": recovered,
+        "remote_tasks": remote,
+        "expected_tasks": edits + 1,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="后台同步调度的网络往返基准")
+    parser.add_argument("--edits", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.01, help="两次编辑之间的间隔(秒)")
+    parser.add_argument("--debounce", type=float, default=0.5)
+    parser.add_argument("--outage", type=float, default=3.0, help="远端不可达的时长(秒)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = {
+            "edits": args.edits,
+            "per_edit_sync": bench_per_edit_sync(workdir, args.edits, args.interval),
+            "scheduler": bench_scheduler(workdir, args.edits, args.interval, args.debounce),
+            "outage": bench_outage(workdir, 20, args.outage, backoff_base=0.5),
+        }
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    scheduled, outage = results["scheduler"], results["outage"]
+    ok = (scheduled["remote_tasks"] == args.edits and scheduled["pending_after"] == 0
+          and outage["recovered"] and outage["remote_tasks"] == outage["expected_tasks"])
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
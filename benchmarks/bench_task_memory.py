@@ -0,0 +1,132 @@
+# benchmarks/bench_task_memory.py
+
+"""
+bench_task_memory.py
+--------------------
+对比任务列表的两种表示：
+- 之前：每行 sqlite3.Row 转成一个 dict(每次 get_tasks 都重新分配)
+- 现在：Task 元组记录 + 未完成任务缓存(重复刷新只复制列表)
+输出每 10 万个任务占用的内存(tracemalloc 统计)和刷新耗时，
+以及界面实际的访问方式(DatabaseWorker 写连接写入、读连接读取)下新增一个任务后 get_task 的耗时。
+用法：
+    python benchmarks/bench_task_memory.py --tasks 100000
+"""
+
+import argparse
+import gc
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.database import Database
+from src.core.db_worker import DatabaseWorker
+
+
+def measure_memory(build):
+    """返回 build() 结果常驻的内存字节数"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def best_ms(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(min(timings), 3)
+
+
+def legacy_get_tasks(conn) -> list:
+    """改造前 get_tasks 的实现"""
+    conn.row_factory = sqlite3.Row
+    return [dict(row) for row in conn.execute("SELECT * FROM tasks WHERE is_completed=0;")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="任务记录内存与刷新耗时基准")
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "memory.db")
+        db = Database(path)
+        db.bulk_add_tasks(
+            {"title": f"任务 {i}", "description": f"描述 {i}", "goal_type": "short-term"} for i in range(args.tasks)
+        )
+        legacy_conn = sqlite3.connect(path)
+        scale = 100000 / args.tasks
+
+        legacy, legacy_bytes = measure_memory(lambda: legacy_get_tasks(legacy_conn))
+        del legacy
+        records, record_bytes = measure_memory(db.get_tasks)
+        del records
+
+        other = Database(path)
+        results = {
+            "tasks": args.tasks,
+            "dict_bytes_per_100k": int(legacy_bytes * scale),
+            "task_bytes_per_100k": int(record_bytes * scale),
+            "dict_refresh_ms": best_ms(lambda: legacy_get_tasks(legacy_conn), args.repeat),
+            "cached_refresh_ms": best_ms(db.get_tasks, args.repeat),
+        }
+
+        def refresh_after_external_write():
+            # 其他连接提交修改后，缓存通过 data_version 发现变化并整体重新加载
+            other.set_sync_state("bench", time.time())
+            db.get_tasks()
+        results["reload_after_external_write_ms"] = best_ms(refresh_after_external_write, args.repeat)
+
+        task_id = db.get_tasks()[0]["id"]
+
+        def refresh_after_own_write():
+            # 本连接的写操作只更新缓存中受影响的条目
+            new_id = db.add_task("临时任务")
+            db.delete_task(new_id)
+            db.get_tasks()
+        results["refresh_after_own_write_ms"] = best_ms(refresh_after_own_write, args.repeat)
+        results["task_id_checked"] = task_id
+
+        legacy_conn.close()
+        other.close()
+        db.close()
+        results.update(bench_worker_get_task(path, args.repeat))
+    print(json.dumps(results, indent=2))
+
+
+def bench_worker_get_task(path: str, repeat: int) -> dict:
+    """
+    与 MainWindow._insert_task 相同：写线程提交 add_task 后，读线程立即 get_task。
+    每次提交都会让读连接的缓存失效，get_task 应退化为主键查询而不是重新加载全部未完成任务。
+    """
+    with DatabaseWorker(path, read_threads=1) as worker:
+        worker.read("get_tasks").result()  # 读连接先加载一次缓存
+        timings = []
+        for i in range(max(repeat, 20)):
+            task_id = worker.call("add_task", f"新任务 {i}").result()
+            start = time.perf_counter()
+            task = worker.read("get_task", task_id).result()
+            timings.append((time.perf_counter() - start) * 1000)
+            assert task is not None and task.id == task_id
+        timings.sort()
+        return {
+            "worker_get_task_after_write_ms_p50": round(timings[len(timings) // 2], 3),
+            "worker_get_task_after_write_ms_max": round(timings[-1], 3),
+        }
+
+
+if __name__ == "__main__":
+    main()
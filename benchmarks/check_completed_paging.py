@@ -0,0 +1,87 @@
+# benchmarks/check_completed_paging.py
+
+"""
+check_completed_paging.py
+-------------------------
+检查已完成任务的键集分页(get_completed_tasks_page / get_archived_tasks_page)在旧数据上的行为：
+部分已完成任务的 completed_at 为 NULL(早期版本写入)，也有多个任务完成时间相同。
+按界面的方式用上一页最后一条的 (completed_at, id) 作为游标逐页读取，
+每个已完成任务必须恰好出现一次，顺序为完成时间倒序、没有完成时间的排在最后；
+没有完成时间的任务不会被归档。任何一项不符时以非零状态退出。
+用法：
+    python benchmarks/check_completed_paging.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.database import Database
+
+PAGE_SIZE = 7
+
+
+def read_all(fetch_page) -> list:
+    tasks, after = [], None
+    while True:
+        page = fetch_page(after=after, limit=PAGE_SIZE)
+        tasks.extend(page)
+        if len(page) < PAGE_SIZE:
+            return tasks
+        after = (page[-1]["completed_at"], page[-1]["id"])
+
+
+def check_order(tasks: list, expected_ids: set) -> dict:
+    ids = [t["id"] for t in tasks]
+    keys = [(t["completed_at"] or "", t["id"]) for t in tasks]
+    return {
+        "ok": len(ids) == len(set(ids)) and set(ids) == expected_ids and keys == sorted(keys, reverse=True),
+        "seen": len(ids),
+        "expected": len(expected_ids),
+    }
+
+
+def main():
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        db = Database(os.path.join(workdir, "paging.db"))
+        ids = db.bulk_add_tasks({"title": f"任务 {i}"} for i in range(100))
+        # 60 个任务完成时间各不相同，10 个共用同一时间，20 个是没有完成时间的旧数据
+        with db.transaction():
+            db.conn.executemany(
+                "UPDATE tasks SET is_completed = 1, completed_at = ? WHERE id = ?;",
+                [(f"2024-01-{1 + i % 28:02d}T{i % 24:02d}:00:00", task_id) for i, task_id in enumerate(ids[:60])]
+                + [("2024-02-01T08:00:00", task_id) for task_id in ids[60:70]]
+                + [(None, task_id) for task_id in ids[70:90]]
+            )
+        completed = set(ids[:90])
+        results["completed"] = check_order(read_all(db.get_completed_tasks_page), completed)
+
+        archived = 0
+        after = None
+        while True:
+            batch = db.archive_completed_tasks(older_than_days=0, batch_size=PAGE_SIZE, after=after)
+            archived += batch["archived"]
+            after = batch["next"]
+            if after is None:
+                break
+        remaining = {t["id"] for t in db.get_completed_tasks()}
+        results["archive"] = {
+            "ok": archived == 70 and remaining == set(ids[70:90]),
+            "archived": archived,
+            "null_rows_kept": remaining == set(ids[70:90]),
+        }
+        results["archived_pages"] = check_order(read_all(db.get_archived_tasks_page), set(ids[:70]))
+        results["remaining_pages"] = check_order(read_all(db.get_completed_tasks_page), set(ids[70:90]))
+        db.close()
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    return 0 if all(r["ok"] for r in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
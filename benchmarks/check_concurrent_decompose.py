@@ -0,0 +1,80 @@
+# benchmarks/check_concurrent_decompose.py
+
+"""
+check_concurrent_decompose.py
+-----------------------------
+检查多个目标拆解同时进行时互不影响：界面允许同时运行多个 GoalDecompositionThread，
+它们共用同一个 AIService 与 OpenAICompatibleBackend，各自在线程中 asyncio.run。
+通过 HTTP 访问本地 FakeLLMServer，两次 decompose_goals 错开启动，先结束的一次关闭异步客户端时
+不能影响另一次仍在进行的请求：两次的每个目标都必须拆解成功。两次的先后交错与调度有关，
+因此重复 --rounds 轮，任何一轮失败都以非零状态退出。
+用法：
+    python benchmarks/check_concurrent_decompose.py --rounds 5
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.ai_service import AIService
+from src.core.llm_backend import OpenAICompatibleBackend
+from src.utils.fake_llm_server import FakeLLMServer
+
+REPLY = json.dumps({"subtasks": [{"title": "阅读资料", "task_type": "daily"},
+                                 {"title": "完成练习", "task_type": "monthly"}]}, ensure_ascii=False)
+JOIN_TIMEOUT = 10.0
+
+
+def goals(offset: int, count: int) -> list:
+    return [{"id": offset + i, "title": f"长期目标 {offset + i}"} for i in range(count)]
+
+
+def run_round() -> dict:
+    results = {}
+    with FakeLLMServer(reply=REPLY, first_token_delay=0.2) as server:
+        backend = OpenAICompatibleBackend(api_key="test", base_url=server.base_url, model="fake-model")
+        service = AIService(backend=backend)
+
+        def run(name, batch, delay):
+            time.sleep(delay)
+            # 并发 2、不限速：第一次在第二次的请求进行中结束
+            subtasks, errors = service.decompose_goals(batch, max_concurrency=2, requests_per_second=None)
+            results[name] = {
+                "ok": not errors and all(len(subtasks.get(g["id"], [])) == 2 for g in batch),
+                "decomposed": len(subtasks), "errors": errors,
+            }
+
+        threads = {"first": threading.Thread(target=run, args=("first", goals(1, 2), 0.0), daemon=True),
+                   "second": threading.Thread(target=run, args=("second", goals(101, 4), 0.1), daemon=True)}
+        for thread in threads.values():
+            thread.start()
+        for name, thread in threads.items():
+            # 客户端被其他事件循环关闭时请求可能一直挂起，超时同样算失败
+            thread.join(timeout=JOIN_TIMEOUT)
+            if thread.is_alive():
+                results[name] = {"ok": False, "error": f"{JOIN_TIMEOUT} 秒内未完成"}
+        backend.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并发目标拆解检查")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    rounds = [run_round() for _ in range(args.rounds)]
+    failed = [r for r in rounds if not all(run["ok"] for run in r.values())]
+    print(json.dumps({"rounds": args.rounds, "failed_rounds": len(failed), "first_failure": failed[0] if failed else None},
+                     indent=2, ensure_ascii=False))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
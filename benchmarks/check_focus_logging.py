@@ -0,0 +1,70 @@
+# benchmarks/check_focus_logging.py
+
+"""
+check_focus_logging.py
+----------------------
+检查番茄钟专注时间计入学习记录时不因频繁暂停而丢失：PomodoroWidget 每次暂停都会结束一个片段，
+片段经 FocusSessionBuffer 分批交给 Database.bulk_add_focus_sessions。
+模拟一个 25 分钟的专注，每 20~40 秒暂停一次(片段全部短于 1 分钟，且分散在多个批次中)，
+以及一个 25 分钟不暂停的专注，两者计入 learning_log 的分钟数都必须是 25。
+任何一项不符时以非零状态退出。
+用法：
+    python benchmarks/check_focus_logging.py
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.database import Database
+from src.core.focus_sessions import FocusSessionBuffer
+
+SESSION_SECONDS = 25 * 60
+START = 1710000000
+
+
+def segments(total: int, rng: random.Random) -> list:
+    """把 total 秒的专注切成 20~40 秒的片段，片段之间暂停 10 秒"""
+    result, now, left = [], START, total
+    while left > 0:
+        seconds = min(left, rng.randint(20, 40))
+        result.append((now, now + seconds))
+        now += seconds + 10
+        left -= seconds
+    return result
+
+
+def logged_minutes(db: Database, domain: str) -> int:
+    return db.conn.execute("SELECT COALESCE(SUM(minutes), 0) FROM learning_log WHERE domain = ?;",
+                           (domain,)).fetchone()[0]
+
+
+def main():
+    results = {}
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as workdir:
+        db = Database(os.path.join(workdir, "focus.db"))
+        buffer = FocusSessionBuffer(db.bulk_add_focus_sessions)
+        paused = segments(SESSION_SECONDS, rng)
+        for started, ended in paused:
+            buffer.add({"started_at": started, "ended_at": ended, "domain": "暂停"})
+        buffer.flush()
+        results["paused"] = {"segments": len(paused), "minutes": logged_minutes(db, "暂停")}
+
+        buffer.add({"started_at": START, "ended_at": START + SESSION_SECONDS, "domain": "连续"})
+        buffer.flush()
+        results["continuous"] = {"segments": 1, "minutes": logged_minutes(db, "连续")}
+        db.close()
+    ok = all(r["minutes"] == SESSION_SECONDS // 60 for r in results.values())
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# benchmarks/check_learning_timezone.py
+
+"""
+check_learning_timezone.py
+--------------------------
+检查学习时长汇总按本地日期分桶：learning_log.created_at 保存 UTC 时间，
+界面用本地日期(date.today())查询，跨越本地午夜的记录必须落在本地日期所在的日 / 周 / 月。
+在 UTC+8(Asia/Shanghai)下写入几条 UTC 时间在前一天、本地时间在后一天的记录，
+也检查旧版本(按 UTC 分桶)的库升级后汇总被重建，以及专注记录计入的学习时间与 get_focus_totals 按天分组
+落在同一个本地日期。任何一项不符时以非零状态退出。
+用法：
+    python benchmarks/check_learning_timezone.py
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# 必须在 SQLite 第一次计算 'localtime' 之前设置
+os.environ["TZ"] = "Asia/Shanghai"
+time.tzset()
+
+from src.core.database import Database
+from src.core.migrations import MIGRATIONS
+
+# (UTC created_at, 分钟, 期望的本地 日 / 周 / 月 桶)
+RECORDS = [
+    # 周日 23:30 UTC = 周一 07:30 本地：日、周都应算到周一
+    ("2024-03-10 23:30:00", 30, ("2024-03-11", "2024-03-11", "2024-03-01")),
+    # 月末 20:00 UTC = 次月 1 日 04:00 本地
+    ("2024-03-31 20:00:00", 45, ("2024-04-01", "2024-04-01", "2024-04-01")),
+    # 本地同一天中午，不受影响
+    ("2024-03-11 04:00:00", 15, ("2024-03-11", "2024-03-11", "2024-03-01")),
+]
+
+
+def check(db: Database) -> dict:
+    failures = []
+    for created_at, minutes, (day, week, month) in RECORDS:
+        for period, bucket in (("day", day), ("week", week), ("month", month)):
+            row = db.conn.execute(
+                "SELECT total_minutes FROM learning_rollup WHERE period = ? AND bucket = ? AND domain = ?;",
+                (period, bucket, created_at)
+            ).fetchone()
+            if row is None or row[0] != minutes:
+                failures.append(f"{created_at} -> {period} {bucket}: {row[0] if row else None}")
+    # 界面的查询方式：本地“今天”为 2024-03-11
+    totals = {r["domain"]: r["total_minutes"] for r in db.get_learning_totals("2024-03-11", "2024-03-12")}
+    expected = {RECORDS[0][0]: 30, RECORDS[2][0]: 15}
+    if totals != expected:
+        failures.append(f"2024-03-11 totals: {totals}")
+    return {"ok": not failures, "failures": failures}
+
+
+def check_focus(db: Database) -> dict:
+    """本地 2024-03-11 07:30 开始(UTC 前一天 23:30)的 25 分钟专注"""
+    started = 1710113400
+    db.bulk_add_focus_sessions([{"started_at": started, "ended_at": started + 1500, "domain": "专注"}])
+    focus_days = [r["key"] for r in db.get_focus_totals("day")]
+    learning_days = [r["domain"] for r in db.get_learning_totals("2024-03-11", "2024-03-12") if r["domain"] == "专注"]
+    created_at = db.conn.execute("SELECT created_at FROM learning_log WHERE domain = '专注';").fetchone()[0]
+    ok = focus_days == ["2024-03-11"] and learning_days == ["专注"] and created_at == "2024-03-10 23:30:00"
+    return {"ok": ok, "focus_days": focus_days, "learning_created_at": created_at}
+
+
+def main():
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        db = Database(os.path.join(workdir, "fresh.db"))
+        db.bulk_add_learning_time((created_at, minutes, created_at) for created_at, minutes, _ in RECORDS)
+        results["fresh"] = check(db)
+        results["focus"] = check_focus(db)
+        db.close()
+
+        # 停在 v10 的旧库：按 UTC 分桶写入后再升级
+        path = os.path.join(workdir, "legacy.db")
+        conn = sqlite3.connect(path, isolation_level=None)
+        for version, migration in enumerate(MIGRATIONS[:10], start=1):
+            migration(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {version};")
+        conn.executemany(
+            "INSERT INTO learning_log (domain, minutes, created_at, uid) VALUES (?, ?, ?, lower(hex(randomblob(16))));",
+            ((created_at, minutes, created_at) for created_at, minutes, _ in RECORDS)
+        )
+        conn.close()
+        db = Database(path)
+        results["upgraded"] = check(db)
+        db.close()
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    return 0 if all(r["ok"] for r in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
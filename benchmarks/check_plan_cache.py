@@ -0,0 +1,144 @@
+# benchmarks/check_plan_cache.py
+
+"""
+check_plan_cache.py
+-------------------
+检查 AI 规划响应缓存(ResponseCache)在流式生成下的行为，使用进程内 MockBackend，不需要网络：
+1. 两个 stream_plan 并发请求同一份任务，只发出一次最终规划请求(单飞)，两边拿到相同文本
+2. generate_plan 与 stream_plan 并发时同样合并为一次请求
+3. 发起者中途取消时结果不缓存，等待者自行重新请求并得到完整文本
+4. 分组摘要与整体规划分别统计命中 / 未命中
+5. token_budget 或 summary_tokens 不同的服务不共用缓存条目
+任何一项不符时以非零状态退出。
+用法：
+    python benchmarks/check_plan_cache.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.ai_service import AIService, ResponseCache
+from src.core.llm_backend import MockBackend
+
+TASKS = [{"title": f"任务 {i}", "goal_type": "short-term", "task_type": "daily"} for i in range(10)]
+# 超出 token_budget，需要先分组总结
+LARGE_TASKS = [
+    {"id": i + 1, "title": f"短期任务 {i}：完成第 {i} 个练习并整理笔记", "goal_type": "short-term",
+     "task_type": "daily" if i % 2 else "monthly", "parent_id": None}
+    for i in range(300)
+]
+
+
+def plan_requests(backend: MockBackend) -> int:
+    """最终规划请求数(不含分组摘要)"""
+    return sum(1 for _, messages in backend.calls if "整体规划" in messages[-1]["content"])
+
+
+def run_concurrently(*calls) -> list:
+    results = [None] * len(calls)
+
+    def run(i, call):
+        results[i] = call()
+    threads = [threading.Thread(target=run, args=(i, call)) for i, call in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def check_stream_single_flight(cache_path: str) -> dict:
+    backend = MockBackend(latency=0.2, token_delay=0.01)
+    service = AIService(backend=backend, cache=ResponseCache(cache_path))
+    texts = run_concurrently(lambda: "".join(service.stream_plan(TASKS)),
+                             lambda: "".join(service.stream_plan(TASKS)))
+    stats = service.cache.stats()
+    service.cache.close()
+    return {
+        "ok": plan_requests(backend) == 1 and texts[0] == texts[1] and stats["coalesced"] == 1,
+        "requests": plan_requests(backend), "same_text": texts[0] == texts[1], "stats": stats,
+    }
+
+
+def check_mixed_single_flight(cache_path: str) -> dict:
+    backend = MockBackend(latency=0.2, token_delay=0.01)
+    service = AIService(backend=backend, cache=ResponseCache(cache_path))
+    texts = run_concurrently(lambda: service.generate_plan(TASKS),
+                             lambda: "".join(service.stream_plan(TASKS)))
+    service.cache.close()
+    return {"ok": plan_requests(backend) == 1 and texts[0] == texts[1], "requests": plan_requests(backend)}
+
+
+def check_cancelled_leader(cache_path: str) -> dict:
+    backend = MockBackend(latency=0.1, token_delay=0.05)
+    service = AIService(backend=backend, cache=ResponseCache(cache_path))
+    started = threading.Event()
+
+    def cancelled():
+        stream = service.stream_plan(TASKS)
+        first = next(stream)
+        started.set()
+        stream.close()
+        return first
+
+    def waiter():
+        started.wait()
+        return "".join(service.stream_plan(TASKS))
+
+    first, text = run_concurrently(cancelled, waiter)
+    full = backend._respond([], False)
+    cached = service.cache.get(service._plan_key(TASKS))
+    service.cache.close()
+    return {"ok": len(first) < len(full) and text.startswith("[mock-") and cached == text,
+            "requests": plan_requests(backend), "waiter_complete": cached == text}
+
+
+def check_kind_stats(cache_path: str) -> dict:
+    backend = MockBackend()
+    service = AIService(backend=backend, cache=ResponseCache(cache_path), token_budget=1000, summary_tokens=100)
+    timings = {}
+    "".join(service.stream_plan(LARGE_TASKS, timings=timings))
+    segments = timings["map_requests"]
+    "".join(service.stream_plan(LARGE_TASKS))
+    plan, segment = service.cache.stats("plan"), service.cache.stats("segment")
+    service.cache.close()
+    return {
+        "ok": (plan["hits"], plan["misses"]) == (1, 1) and (segment["hits"], segment["misses"]) == (0, segments),
+        "plan": {k: plan[k] for k in ("hits", "misses")}, "segment": {k: segment[k] for k in ("hits", "misses")},
+    }
+
+
+def check_budget_in_key(cache_path: str) -> dict:
+    backend = MockBackend()
+    cache = ResponseCache(cache_path)
+    AIService(backend=backend, cache=cache, token_budget=4000).generate_plan(TASKS)
+    AIService(backend=backend, cache=cache, token_budget=8000).generate_plan(TASKS)
+    AIService(backend=backend, cache=cache, token_budget=4000, summary_tokens=300).generate_plan(TASKS)
+    AIService(backend=backend, cache=cache, token_budget=4000).generate_plan(TASKS)
+    stats = cache.stats()
+    cache.close()
+    return {"ok": (stats["hits"], stats["misses"]) == (1, 3), "hits": stats["hits"], "misses": stats["misses"]}
+
+
+def main():
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, check in (("stream_single_flight", check_stream_single_flight),
+                            ("mixed_single_flight", check_mixed_single_flight),
+                            ("cancelled_leader", check_cancelled_leader),
+                            ("kind_stats", check_kind_stats),
+                            ("budget_in_key", check_budget_in_key)):
+            results[name] = check(os.path.join(workdir, f"{name}.db"))
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    return 0 if all(r["ok"] for r in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
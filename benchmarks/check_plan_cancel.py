@@ -0,0 +1,104 @@
+# benchmarks/check_plan_cancel.py
+
+"""
+check_plan_cancel.py
+--------------------
+检查规划生成的取消(PlanGenerationThread 使用的 CancelToken)能否及时生效，使用进程内 MockBackend：
+1. 等待首字期间取消：stream_plan 应在取消后立即抛出 LLMCancelled，而不是等到首字到达
+2. 分组总结(map)阶段取消：不再发起剩余的总结请求
+3. 取消只影响收到该标记的请求，同一个 AIService 上的其他生成照常完成
+输出每项从取消到结束的耗时，任何一项不符时以非零状态退出。
+用法：
+    python benchmarks/check_plan_cancel.py --latency 3
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.ai_service import AIService
+from src.core.llm_backend import CancelToken, LLMCancelled, MockBackend
+
+TASKS = [{"title": f"任务 {i}", "goal_type": "short-term", "task_type": "daily"} for i in range(10)]
+LARGE_TASKS = [
+    {"id": i + 1, "title": f"短期任务 {i}：完成第 {i} 个练习并整理笔记", "goal_type": "short-term",
+     "task_type": "daily" if i % 2 else "monthly", "parent_id": None}
+    for i in range(300)
+]
+
+
+def cancel_after(service: AIService, tasks: list, delay: float) -> dict:
+    """delay 秒后取消，返回从取消到 stream_plan 结束的耗时和结束方式"""
+    token = CancelToken()
+    timer = threading.Timer(delay, token.cancel)
+    timer.start()
+    outcome = "completed"
+    try:
+        for _ in service.stream_plan(tasks, cancel_token=token):
+            pass
+    except LLMCancelled:
+        outcome = "cancelled"
+    finished = time.perf_counter()
+    timer.join()
+    return {"outcome": outcome, "finished": finished}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="规划生成取消检查")
+    parser.add_argument("--latency", type=float, default=3.0, help="每个请求的首字延迟(秒)")
+    parser.add_argument("--cancel-after", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = {}
+
+    # 1. 等待首字期间取消
+    backend = MockBackend(latency=args.latency)
+    service = AIService(backend=backend)
+    start = time.perf_counter()
+    run = cancel_after(service, TASKS, args.cancel_after)
+    results["before_first_token"] = {
+        "outcome": run["outcome"],
+        "cancel_to_exit_ms": round((run["finished"] - start - args.cancel_after) * 1000, 1),
+    }
+
+    # 2. 分组总结阶段取消：并发 2，剩余的段不应再发请求
+    backend = MockBackend(latency=args.latency)
+    service = AIService(backend=backend, token_budget=1000, summary_tokens=100, max_workers=2)
+    start = time.perf_counter()
+    run = cancel_after(service, LARGE_TASKS, args.cancel_after)
+    results["map_phase"] = {
+        "outcome": run["outcome"],
+        "cancel_to_exit_ms": round((run["finished"] - start - args.cancel_after) * 1000, 1),
+        "summary_requests": len(backend.calls),
+    }
+
+    # 3. 取消一个生成不影响同一服务上的另一个
+    backend = MockBackend(latency=args.cancel_after * 2, token_delay=0.01)
+    service = AIService(backend=backend)
+    other = {}
+    thread = threading.Thread(target=lambda: other.update(text="".join(service.stream_plan(TASKS[:5]))))
+    thread.start()
+    run = cancel_after(service, TASKS, args.cancel_after)
+    thread.join()
+    results["isolated"] = {"outcome": run["outcome"], "other_completed": other.get("text", "").startswith("[mock-")}
+
+    limit_ms = args.latency * 1000 / 2
+    ok = (results["before_first_token"]["outcome"] == "cancelled"
+          and results["before_first_token"]["cancel_to_exit_ms"] < limit_ms
+          and results["map_phase"]["outcome"] == "cancelled"
+          and results["map_phase"]["cancel_to_exit_ms"] < args.latency * 1000 * 1.5
+          and results["map_phase"]["summary_requests"] <= 2
+          and results["isolated"]["outcome"] == "cancelled" and results["isolated"]["other_completed"])
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+# benchmarks/check_query_plans.py
+
+"""
+check_query_plans.py
+--------------------
+检查热点查询的 EXPLAIN QUERY PLAN，确保它们走索引而不是全表扫描。
+任何一条查询的执行计划不符合预期时以非零状态码退出，可直接放进 CI。
+用法：
+    python benchmarks/check_query_plans.py
+"""
+
+import os
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.database import Database
+
+# (说明, SQL, 参数, 执行计划中必须出现的片段)
+EXPECTED_PLANS = [
+    (
+        "get_tasks 未完成任务",
+        "SELECT * FROM tasks WHERE is_completed=0;",
+        (),
+        "USING INDEX idx_tasks_completed_goal (is_completed=?)",
+    ),
+    (
+        "get_completed_tasks",
+        "SELECT * FROM tasks WHERE is_completed=1;",
+        (),
+        "USING INDEX idx_tasks_completed_goal (is_completed=?)",
+    ),
+    (
+        "get_completed_tasks_page 翻页",
+        "SELECT * FROM tasks INDEXED BY idx_tasks_completed_key WHERE is_completed = 1 "
+        "AND COALESCE(completed_at, '') <= ? AND (COALESCE(completed_at, '') < ? OR id < ?) "
+        "ORDER BY COALESCE(completed_at, '') DESC, id DESC LIMIT ?;",
+        ("2030-01-01T00:00:00", "2030-01-01T00:00:00", 1 << 40, 50),
+        "USING INDEX idx_tasks_completed_key (<expr><?)",
+    ),
+    (
+        "get_archived_tasks_page 翻页",
+        "SELECT * FROM tasks_archive "
+        "WHERE COALESCE(completed_at, '') <= ? AND (COALESCE(completed_at, '') < ? OR id < ?) "
+        "ORDER BY COALESCE(completed_at, '') DESC, id DESC LIMIT ?;",
+        ("2030-01-01T00:00:00", "2030-01-01T00:00:00", 1 << 40, 50),
+        "USING INDEX idx_tasks_archive_completed_key (<expr><?)",
+    ),
+    (
+        "search_tasks 短检索词(词表前缀范围)",
+        "SELECT * FROM tasks t WHERE t.is_completed = 0 "
+        "AND t.id IN (SELECT doc FROM tasks_fts_terms WHERE term >= ? AND term < ?) "
+        "ORDER BY t.id DESC LIMIT ?;",
+        ("任务", "任务\U0010ffff", 50),
+        "SEARCH t USING INTEGER PRIMARY KEY (rowid=?)",
+    ),
+    (
+        "get_tasks_page 翻页",
+        "SELECT * FROM tasks WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT ?;",
+        ("2030-01-01T00:00:00", 1 << 40, 50),
+        "USING INDEX idx_tasks_created (created_at<?)",
+    ),
+    (
+        "长期目标下已完成的子任务",
+        "SELECT * FROM tasks WHERE parent_id = ? AND is_completed = 1;",
+        (1,),
+        "USING INDEX idx_tasks_parent (parent_id=? AND is_completed=?)",
+    ),
+    (
+        "get_goal_progress 递归子树",
+        "WITH RECURSIVE tree(root_id, id) AS ("
+        "SELECT id, id FROM tasks WHERE goal_type = 'long-term' AND is_completed = 0 "
+        "UNION SELECT tree.root_id, t.id FROM tasks t JOIN tree ON t.parent_id = tree.id"
+        ") SELECT * FROM tree;",
+        (),
+        "USING COVERING INDEX idx_tasks_parent (parent_id=?)",
+    ),
+    (
+        "get_learning_logs 按领域汇总(月汇总表)",
+        "SELECT domain, SUM(total_minutes) AS total_minutes FROM learning_rollup "
+        "WHERE period = 'month' GROUP BY domain;",
+        (),
+        "USING PRIMARY KEY (period=?)",
+    ),
+    (
+        "get_learning_report 日期区间",
+        "SELECT bucket, domain, total_minutes FROM learning_rollup "
+        "WHERE period = ? AND bucket >= ? AND bucket < ?;",
+        ("day", "2024-01-01", "2024-02-01"),
+        "USING PRIMARY KEY (period=? AND bucket>? AND bucket<?)",
+    ),
+    (
+        "get_focus_totals 按日期区间",
+        "SELECT date(started_at, 'unixepoch', 'localtime') AS key, COUNT(*), SUM(ended_at - started_at) "
+        "FROM focus_sessions WHERE 1 = 1 AND started_at >= ? AND started_at < ? GROUP BY key;",
+        (0, 2000000000),
+        "USING COVERING INDEX idx_focus_started (started_at>? AND started_at<?)",
+    ),
+    (
+        "get_focus_totals 单个任务",
+        "SELECT task_id AS key, COUNT(*), SUM(ended_at - started_at) "
+        "FROM focus_sessions WHERE 1 = 1 AND started_at >= ? AND task_id = ? GROUP BY key;",
+        (0, 1),
+        "USING COVERING INDEX idx_focus_task (task_id=? AND started_at>?)",
+    ),
+]
+
+
+def explain(db: Database, sql: str, params=()) -> str:
+    rows = db.conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    return "\n".join(row["detail"] for row in rows)
+
+
+def _populate(db: Database):
+    """写入少量数据并 ANALYZE，让查询规划器的统计信息接近真实使用场景"""
+    goal_ids = db.bulk_add_tasks(
+        {"title": f"长期目标 {i}", "goal_type": "long-term"} for i in range(50)
+    )
+    task_ids = db.bulk_add_tasks(
+        {"title": f"任务 {i}", "parent_id": goal_ids[i % len(goal_ids)]} for i in range(2000)
+    )
+    db.bulk_complete_tasks(task_ids[::3])
+    db.bulk_add_learning_time((f"领域 {i % 20}", 30) for i in range(2000))
+    db.bulk_add_focus_sessions(
+        {"started_at": 1700000000 + i * 3600, "ended_at": 1700000000 + i * 3600 + 1500,
+         "task_id": task_ids[i % 100], "domain": f"领域 {i % 20}"} for i in range(2000)
+    )
+    db.conn.execute("ANALYZE;")
+
+
+def main() -> int:
+    failures = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        db = Database(os.path.join(workdir, "plans.db"))
+        _populate(db)
+        for name, sql, params, expected in EXPECTED_PLANS:
+            plan = explain(db, sql, params)
+            ok = expected in plan
+            failures += not ok
+            print(f"[{'OK' if ok else 'FAIL'}] {name}\n    {plan.replace(chr(10), chr(10) + '    ')}")
+            if not ok:
+                print(f"    期望包含: {expected}")
+        db.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
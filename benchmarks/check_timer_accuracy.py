@@ -0,0 +1,130 @@
+# benchmarks/check_timer_accuracy.py
+
+"""
+check_timer_accuracy.py
+-----------------------
+用假时钟检查 PomodoroTimer 的计时精度：
+- 事件循环卡住(定时器迟到)时，已用时间仍然等于真实流逝的时间
+- 暂停期间的时间不计入
+- 到达目标只提醒一次，之后时间不再增长
+- 界面隐藏时只保留到点定时器
+任何一项不符合预期时以非零状态码退出。
+用法：
+    python benchmarks/check_timer_accuracy.py
+"""
+
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from PyQt5.QtCore import QCoreApplication
+
+from src.utils.timer import PomodoroTimer
+
+
+class FakeClock:
+    def __init__(self, start: float = 1000.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+def make_timer():
+    clock = FakeClock()
+    timer = PomodoroTimer(clock=clock)
+    updates, reached = [], []
+    timer.timeUpdated.connect(updates.append)
+    timer.timeReached.connect(lambda: reached.append(clock.now))
+    return timer, clock, updates, reached
+
+
+def check_stalled_loop():
+    timer, clock, updates, _ = make_timer()
+    timer.start_timer(25 * 60)
+    # 事件循环卡住 7.9 秒后才处理到一次刷新
+    clock.advance(7.9)
+    timer._on_tick()
+    assert timer.get_accumulated_seconds() == 7, timer.get_accumulated_seconds()
+    assert updates == [7], updates
+    # 一千次每次迟到 0.3 秒的刷新，不会累积误差
+    for _ in range(1000):
+        clock.advance(1.3)
+        timer._on_tick()
+    assert timer.get_accumulated_seconds() == int(7.9 + 1300), timer.get_accumulated_seconds()
+    timer.stop_timer()
+
+
+def check_pause_resume():
+    timer, clock, _, _ = make_timer()
+    timer.start_timer(600, already_used_seconds=100)
+    clock.advance(30)
+    timer.pause_timer()
+    clock.advance(3600)  # 暂停期间(包括系统休眠)不计时
+    assert timer.get_accumulated_seconds() == 130, timer.get_accumulated_seconds()
+    timer.resume_timer()
+    clock.advance(20.5)
+    assert timer.get_accumulated_seconds() == 150, timer.get_accumulated_seconds()
+    timer.stop_timer()
+    assert timer.get_accumulated_seconds() == 0
+
+
+def check_deadline():
+    timer, clock, updates, reached = make_timer()
+    timer.start_timer(60)
+    assert timer._deadline_timer.isActive()
+    # 到点定时器提前触发：不提醒，按剩余时间重新安排
+    clock.advance(59.5)
+    timer._deadline_timer.stop()
+    timer._check_deadline()
+    assert not reached and timer._deadline_timer.isActive()
+    # 定时器迟到 40 秒才触发：提醒一次并暂停
+    clock.advance(40)
+    timer._check_deadline()
+    timer._on_tick()
+    assert len(reached) == 1, reached
+    assert not timer.is_running()
+    assert updates[-1] == 99, updates
+    clock.advance(100)
+    assert timer.get_accumulated_seconds() == 99
+
+
+def check_hidden_display():
+    timer, clock, _, _ = make_timer()
+    timer.set_display_active(False)
+    timer.start_timer(60)
+    assert timer._deadline_timer.isActive()
+    assert not timer._tick_timer.isActive(), "隐藏时不应每秒唤醒"
+    clock.advance(12)
+    timer.set_display_active(True)
+    assert timer._tick_timer.isActive()
+    assert timer.get_accumulated_seconds() == 12
+    timer.stop_timer()
+
+
+CHECKS = [check_stalled_loop, check_pause_resume, check_deadline, check_hidden_display]
+
+
+def main():
+    # 必须保留引用，否则新建的 QCoreApplication 会被立即回收
+    _ = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    failed = 0
+    for check in CHECKS:
+        try:
+            check()
+        except AssertionError as e:
+            failed += 1
+            print(f"FAIL  {check.__name__}: {e}")
+        else:
+            print(f"OK    {check.__name__}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,42 +3,658 @@
 """
 ai_service.py
 -------------
-基于 DeepSeek 的 OpenAI SDK 接口实现任务规划功能，
-使用官方示例中可成功运行的方式调用 API。
-请确保已安装 openai 库，例如：
+任务规划功能。实际的模型调用通过 LLMBackend(见 llm_backend.py)完成，
+默认使用 OpenAI 兼容接口访问 DeepSeek，也可以换成其他服务商或离线的 MockBackend。
+使用 OpenAI 兼容接口时请确保已安装 openai 库，例如：
     pip install openai
+openai 在第一次发起请求时才导入，导入本模块本身不会拖慢程序启动。
 """
 
-from openai import OpenAI
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, Future, ThreadPoolExecutor, wait
+
+from src.core.llm_backend import CancelToken, LLMBackend, LLMCancelled, OpenAICompatibleBackend
+from src.utils import metrics
+
+AI_CACHE_NAME = "ai_cache.db"
+
+# 提示词中固定说明文字预留的 token 数，分组时每个请求的任务内容不超过 token_budget 减去该值
+PROMPT_OVERHEAD_TOKENS = 200
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算文本的 token 数，不依赖具体模型的分词器：
+    中日韩字符按每字 1 个 token(偏保守)，其余字符按每 4 个字符 1 个 token。
+    """
+    cjk = sum(1 for ch in text if "\u2e80" <= ch <= "\u9fff" or "\uf900" <= ch <= "\uffef")
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def task_line(task: dict) -> str:
+    """单个任务在提示词中的描述"""
+    return f"{task.get('title', '(无标题)')} ({task.get('goal_type', '')}, {task.get('task_type', '')})"
+
+
+def group_tasks(tasks: list) -> list:
+    """
+    把任务分组用于分段总结：
+    属于某个长期目标(沿 parent_id 向上能找到长期目标)的任务与该目标归为一组，
+    其余任务按 goal_type / task_type 分组。
+    :return: [(组名, [task, ...]), ...]，保持任务出现的顺序
+    """
+    by_id = {t["id"]: t for t in tasks if t.get("id") is not None}
+
+    def root_of(task):
+        seen = set()
+        while task.get("parent_id") in by_id and task.get("id") not in seen:
+            seen.add(task.get("id"))
+            task = by_id[task["parent_id"]]
+        return task
+
+    groups = {}
+    for task in tasks:
+        root = root_of(task)
+        if root.get("goal_type") == "long-term":
+            key = ("goal", root.get("id"), root.get("title"))
+            title = f"长期目标「{root.get('title', '(无标题)')}」"
+        else:
+            key = ("type", task.get("goal_type") or "", task.get("task_type") or "")
+            title = f"{key[1] or '未分类'} / {key[2] or '未分类'} 任务"
+        groups.setdefault(key, (title, []))[1].append(task)
+    return list(groups.values())
+
+
+def pack_lines(lines: list, budget: int) -> list:
+    """按 token 预算把若干行切分成多段，每段估算 token 数不超过 budget(单行超出时单独成段)"""
+    chunks, current, used = [], [], 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if current and used + cost > budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(line)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def parse_subtasks(text: str, max_items: int = 20) -> list:
+    """
+    解析模型返回的子任务 JSON，兼容 ```json 代码块、{"subtasks": [...]} 与直接返回数组两种格式。
+    :return: [{'title': ..., 'description': ..., 'task_type': 'daily' / 'monthly'}, ...]
+    :raises ValueError: 内容不是合法 JSON 或没有子任务列表
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.find("\n") + 1:] if "\n" in text else text
+    data = json.loads(text)
+    items = data.get("subtasks") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise ValueError("返回的 JSON 中没有 subtasks 列表")
+    subtasks = []
+    for item in items:
+        if isinstance(item, str):
+            item = {"title": item}
+        if not isinstance(item, dict):
+            continue
+        title = str(item.get("title") or "").strip()
+        if not title:
+            continue
+        task_type = item.get("task_type")
+        subtasks.append({
+            "title": title,
+            "description": str(item.get("description") or "").strip(),
+            "task_type": task_type if task_type in ("daily", "monthly") else "daily",
+        })
+    return subtasks[:max_items]
+
+
+class _AsyncRateLimiter:
+    """限制请求发起的速率：相邻两次 acquire 至少间隔 1 / rate 秒"""
+
+    def __init__(self, rate: float = None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """截断到大约 max_tokens 个 token"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(text[:mid]) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo]
+
+
+def plan_cache_key(tasks: list, model: str, token_budget: int = None, summary_tokens: int = None) -> str:
+    """
+    计算规划请求的缓存键：只取影响提示词的字段(标题、goal_type、task_type)、模型名，
+    以及决定是否分组总结、摘要多长的 token_budget / summary_tokens。
+    标题去除首尾空白并排序，任务顺序变化或无关字段(id、时间等)变化都不会导致缓存失效。
+    """
+    items = sorted(
+        (str(t.get("title") or "").strip(), t.get("goal_type") or "", t.get("task_type") or "")
+        for t in tasks
+    )
+    raw = json.dumps({"model": model, "tasks": items, "token_budget": token_budget,
+                      "summary_tokens": summary_tokens}, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    AI 响应的持久化缓存，存放在任务数据库旁边的独立 SQLite 文件中。
+    - 过期：写入超过 ttl 秒的条目视为失效
+    - 淘汰：条目数超过 max_entries 或总字节数超过 max_bytes 时，按最近访问时间(LRU)删除
+    - 合并：同一个键的并发请求只有第一个真正调用 API，其余等待它的结果
+    - 统计：命中 / 未命中按 kind 分别计数("plan" 为整体规划，"segment" 为分组摘要)
+    所有数据库访问都在锁内进行，可以在后台线程中使用。
+    """
+
+    def __init__(self, path: str = AI_CACHE_NAME, ttl: float = 7 * 24 * 3600,
+                 max_entries: int = 500, max_bytes: int = 5 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._counts = {}    # kind -> {"hits", "misses", "coalesced"}
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> Future，正在进行中的请求
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ai_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_ai_cache_accessed ON ai_cache (accessed_at);")
+
+    @classmethod
+    def beside(cls, db_name: str, **kwargs):
+        """在任务数据库所在目录创建缓存文件"""
+        directory = os.path.dirname(os.path.abspath(db_name))
+        return cls(os.path.join(directory, AI_CACHE_NAME), **kwargs)
+
+    def get(self, key: str, kind: str = "plan") -> str:
+        """返回缓存的响应并计入命中统计，未命中或已过期时返回 None"""
+        with self._lock:
+            response = self._get_locked(key)
+            self._count_locked(kind, "misses" if response is None else "hits")
+            return response
+
+    def put(self, key: str, model: str, response: str):
+        with self._lock:
+            self._put_locked(key, model, response)
+
+    def get_or_compute(self, key: str, model: str, compute, kind: str = "plan") -> str:
+        """
+        命中则直接返回；未命中时调用 compute() 并写入缓存。
+        同一个键已有请求在进行时，不再重复调用 compute()，而是等待那次请求的结果。
+        """
+        cached = self.acquire(key, kind)
+        if cached is not None:
+            return cached
+        try:
+            response = compute()
+        except BaseException as e:
+            self.release(key, error=e)
+            raise
+        self.release(key, model, response)
+        return response
+
+    def acquire(self, key: str, kind: str = "plan") -> str:
+        """
+        get_or_compute 的前半部分，供无法写成一个 compute() 的调用方(如流式生成)使用：
+        命中或等到同一个键进行中请求的结果时返回该结果；否则返回 None，调用方成为这个键的发起者，
+        之后必须调用一次 release() 交出结果或放弃。发起者放弃时，等待者重新竞争。
+        """
+        while True:
+            with self._lock:
+                cached = self._get_locked(key)
+                if cached is not None:
+                    self._count_locked(kind, "hits")
+                    return cached
+                flight = self._inflight.get(key)
+                if flight is None:
+                    self._inflight[key] = Future()
+                    self._count_locked(kind, "misses")
+                    return None
+                self._count_locked(kind, "coalesced")
+            response = flight.result()
+            if response is not None:
+                return response
+
+    def release(self, key: str, model: str = None, response: str = None, error: BaseException = None):
+        """
+        结束 acquire() 发起的请求：传入 response 时写入缓存并交给等待者；传入 error 时等待者抛出该异常；
+        都不传表示放弃(如被取消)，结果不缓存。
+        """
+        try:
+            if response is not None and error is None:
+                self.put(key, model, response)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            with self._lock:
+                flight = self._inflight.pop(key)
+            if error is not None:
+                flight.set_exception(error)
+            else:
+                flight.set_result(response)
+
+    def stats(self, kind: str = "plan") -> dict:
+        """返回 kind 类请求的命中统计和整个缓存文件的大小"""
+        with self._lock:
+            entries, total_bytes = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ai_cache;"
+            ).fetchone()
+            counts = self._counts.get(kind, {})
+            hits, misses = counts.get("hits", 0), counts.get("misses", 0)
+            return {
+                "hits": hits,
+                "misses": misses,
+                "coalesced": counts.get("coalesced", 0),
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "entries": entries,
+                "bytes": total_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM ai_cache;")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    # ------------------- 内部方法（调用方需持有锁） -------------------
+    def _count_locked(self, kind: str, name: str):
+        counts = self._counts.setdefault(kind, {"hits": 0, "misses": 0, "coalesced": 0})
+        counts[name] += 1
+
+    def _get_locked(self, key: str) -> str:
+        now = time.time()
+        row = self.conn.execute(
+            "SELECT response, created_at FROM ai_cache WHERE key = ?;", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        response, created_at = row
+        if now - created_at > self.ttl:
+            self.conn.execute("DELETE FROM ai_cache WHERE key = ?;", (key,))
+            return None
+        self.conn.execute("UPDATE ai_cache SET accessed_at = ? WHERE key = ?;", (now, key))
+        return response
+
+    def _put_locked(self, key: str, model: str, response: str):
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        self.conn.execute("BEGIN IMMEDIATE;")
+        try:
+            self.conn.execute(
+                """
+                INSERT OR REPLACE INTO ai_cache (key, model, response, size, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?);
+                """,
+                (key, model, response, size, now, now)
+            )
+            self._evict_locked(now)
+            self.conn.execute("COMMIT;")
+        except BaseException:
+            self.conn.execute("ROLLBACK;")
+            raise
+
+    def _evict_locked(self, now: float):
+        self.conn.execute("DELETE FROM ai_cache WHERE created_at < ?;", (now - self.ttl,))
+        # 条目数上限：删除最久未访问的条目
+        self.conn.execute(
+            """
+            DELETE FROM ai_cache WHERE key IN (
+                SELECT key FROM ai_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            );
+            """,
+            (self.max_entries,)
+        )
+        # 字节数上限：按访问时间从新到旧累加，超出部分删除
+        self.conn.execute(
+            """
+            DELETE FROM ai_cache WHERE key IN (
+                SELECT key FROM (
+                    SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC, key) AS running
+                    FROM ai_cache
+                ) WHERE running > ?
+            );
+            """,
+            (self.max_bytes,)
+        )
+
 
 class AIService:
     def __init__(self, api_key: str = "your api key", 
                  base_url: str = "https://api.deepseek.com", 
-                 model: str = "deepseek-chat"):
-        # 直接使用官方示例的方式初始化客户端
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
-        self.model = model
+                 model: str = "deepseek-chat",
+                 timeout: float = 60.0,
+                 cache: ResponseCache = None,
+                 token_budget: int = 4000,
+                 summary_tokens: int = 400,
+                 max_workers: int = 4,
+                 backend: LLMBackend = None):
+        """
+        :param api_key, base_url, model, timeout: 未传入 backend 时用于创建 OpenAI 兼容后端；
+                        timeout 是单次 HTTP 请求的超时时间(秒)，流式模式下也作为两段数据之间的最长等待时间
+        :param cache: 响应缓存，为 None 时每次都调用 API
+        :param token_budget: 单个请求提示词的 token 上限；任务列表超出时先分组并行总结，再合并成整体规划
+        :param summary_tokens: 每个分组摘要的最大 token 数
+        :param max_workers: 分组总结阶段的最大并发请求数
+        :param backend: 模型调用后端，见 llm_backend.create_backend()
+        """
+        if summary_tokens * 3 > token_budget - PROMPT_OVERHEAD_TOKENS:
+            raise ValueError("summary_tokens 过大：token_budget 至少要能容纳 3 段摘要")
+        if backend is None:
+            backend = OpenAICompatibleBackend(api_key=api_key, base_url=base_url, model=model, timeout=timeout)
+        self.backend = backend
+        self.cache = cache
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.max_workers = max_workers
 
-    def generate_plan(self, tasks: list) -> str:
+    @property
+    def model(self) -> str:
+        return self.backend.model
+
+    def cancel(self):
+        """中止所有进行中的模型请求"""
+        self.backend.cancel()
+
+    def close(self):
+        self.backend.close()
+
+    def _build_messages(self, tasks: list) -> list:
+        # 将任务列表转换为简洁的描述字符串，使用分号分隔
+        tasks_str = "; ".join(task_line(t) for t in tasks)
+        # 构造对话消息
+        return [
+            {"role": "system", "content": "You are a helpful assistant"},
+            {"role": "user", "content": f"请根据以下任务生成一个整体规划，并给出详细建议： {tasks_str}"}
+        ]
+
+    def generate_plan(self, tasks: list, timings: dict = None) -> str:
         """
         根据任务列表调用 DeepSeek API 生成整体规划。
         :param tasks: 任务列表，每个任务为 dict，例如：
                       [{"title": "任务1", "goal_type": "short-term", "task_type": "daily"}, ...]
+        :param timings: 传入 dict 时写入本次调用各阶段的耗时与请求数(见 _prepare_messages)；
+                        命中缓存或等待其他调用的结果时不发请求，保持为空
         :return: AI 生成的规划文本
         """
-        # 将任务列表转换为简洁的描述字符串，使用分号分隔
-        tasks_str = "; ".join(
-            f"{t.get('title', '(无标题)')} ({t.get('goal_type', '')}, {t.get('task_type', '')})"
-            for t in tasks
-        )
-        # 构造对话消息
-        messages = [
+        if timings is None:
+            timings = {}
+        if self.cache is None:
+            return self._request_plan(tasks, timings)
+        return self.cache.get_or_compute(self._plan_key(tasks), self.model,
+                                         lambda: self._request_plan(tasks, timings))
+
+    def _plan_key(self, tasks: list) -> str:
+        return plan_cache_key(tasks, self.model, self.token_budget, self.summary_tokens)
+
+    def _request_plan(self, tasks: list, timings: dict) -> str:
+        messages = self._prepare_messages(tasks, timings=timings)
+        start = time.perf_counter()
+        plan = self._complete(messages)
+        timings["reduce_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return plan
+
+    def _complete(self, messages: list, max_tokens: int = None) -> str:
+        text = self.backend.chat(messages, max_tokens=max_tokens)
+        metrics.count("ai.response_chars", len(text))
+        return text
+
+    # ------------------- 超出 token 预算时的分组总结 -------------------
+    def _prepare_messages(self, tasks: list, cancel_token: CancelToken = None, timings: dict = None) -> list:
+        """
+        返回最终生成规划所用的消息。
+        任务列表在 token_budget 之内时直接使用全部任务；否则：
+        1. 分组(长期目标及其子任务 / goal_type + task_type)，组内超出预算的再按预算切段
+        2. 在线程池中并行总结每一段(map)，摘要长度受 summary_tokens 限制
+        3. 摘要合起来仍超出预算时再分段总结，直到能放进一个请求(reduce)
+        各阶段耗时与请求数写入 timings(每次调用各自一个 dict，同一个服务可以被多个线程同时使用)。
+        cancel_token 被取消后不再发起新的总结请求并抛出 LLMCancelled。
+        """
+        if timings is None:
+            timings = {}
+        start = time.perf_counter()
+        messages = self._build_messages(tasks)
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        timings.update(prompt_tokens=prompt_tokens, map_requests=0, map_rounds=0, map_ms=0.0)
+        if prompt_tokens <= self.token_budget:
+            timings["prepare_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            return messages
+
+        content_budget = self.token_budget - PROMPT_OVERHEAD_TOKENS
+        segments = []
+        for title, group in group_tasks(tasks):
+            chunks = pack_lines([task_line(t) for t in group], content_budget)
+            for i, lines in enumerate(chunks):
+                name = title if len(chunks) == 1 else f"{title}(第 {i + 1} 部分)"
+                segments.append((name, "\n".join(lines)))
+        timings["groups"] = len(segments)
+        timings["group_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+        summaries = self._summarize_segments(segments, "请总结下面这组任务的重点、优先级和主要风险，不超过 {n} 字",
+                                             timings, cancel_token)
+        while True:
+            sections = [f"【{name}】\n{text}" for name, text in summaries]
+            combined = "\n\n".join(sections)
+            if estimate_tokens(combined) <= content_budget or len(summaries) == 1:
+                break
+            # 摘要仍然太长：按预算分段再总结一轮
+            segments = [(f"汇总 {i + 1}", "\n\n".join(lines))
+                        for i, lines in enumerate(pack_lines(sections, content_budget))]
+            summaries = self._summarize_segments(segments, "请合并下面几组任务摘要，保留关键事项，不超过 {n} 字",
+                                                 timings, cancel_token)
+
+        timings["prepare_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return [
             {"role": "system", "content": "You are a helpful assistant"},
-            {"role": "user", "content": f"请根据以下任务生成一个整体规划，并给出详细建议： {tasks_str}"}
+            {"role": "user", "content": "以下是按目标分组的任务摘要，请据此生成一个整体规划，并给出详细建议：\n\n"
+                                        + truncate_tokens(combined, content_budget)}
         ]
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            stream=False
-        )
-        return response.choices[0].message.content.strip()
+
+    def _summarize_segments(self, segments: list, instruction: str, timings: dict,
+                            cancel_token: CancelToken = None) -> list:
+        """并行总结各段内容，返回 [(段名, 摘要)]，顺序与输入一致；启用缓存时内容未变的段直接复用"""
+        start = time.perf_counter()
+        instruction = instruction.format(n=self.summary_tokens)
+
+        def summarize(segment):
+            if cancel_token is not None:
+                cancel_token.check()
+            name, text = segment
+            messages = [
+                {"role": "system", "content": "You are a helpful assistant"},
+                {"role": "user", "content": f"{instruction}。\n{name}：\n{text}"}
+            ]
+            compute = lambda: truncate_tokens(self._complete(messages, max_tokens=self.summary_tokens),
+                                              self.summary_tokens)
+            if self.cache is None:
+                return name, compute()
+            key = hashlib.sha256(
+                json.dumps([self.model, self.summary_tokens, messages], ensure_ascii=False).encode("utf-8")
+            ).hexdigest()
+            return name, self.cache.get_or_compute(key, self.model, compute, kind="segment")
+
+        pool = ThreadPoolExecutor(max_workers=max(1, self.max_workers))
+        futures = [pool.submit(summarize, segment) for segment in segments]
+        waiting, unregister = list(futures), None
+        if cancel_token is not None:
+            # 取消时立即停止等待，不必等进行中的总结请求返回
+            cancelled = Future()
+            unregister = cancel_token.on_cancel(lambda: cancelled.set_exception(LLMCancelled("请求已取消")))
+            waiting.append(cancelled)
+        try:
+            done, _ = wait(waiting, return_when=FIRST_EXCEPTION)
+            for future in done:
+                if future.exception() is not None:
+                    raise future.exception()
+            summaries = [future.result() for future in futures]
+        finally:
+            if unregister is not None:
+                unregister()
+            # 出错或被取消时剩余的段不再开始，进行中的请求在后台结束
+            pool.shutdown(wait=False, cancel_futures=True)
+        timings["map_requests"] += len(segments)
+        timings["map_rounds"] += 1
+        timings["map_ms"] += round((time.perf_counter() - start) * 1000, 1)
+        return summaries
+
+    # ------------------- 长期目标拆解 -------------------
+    def _build_decompose_messages(self, goal: dict, max_subtasks: int) -> list:
+        return [
+            {"role": "system", "content": "你是任务规划助手，只输出 JSON，不要输出其他内容。"},
+            {"role": "user", "content": (
+                f"请把下面的长期目标拆解成不超过 {max_subtasks} 个可以直接执行的短期子任务。\n"
+                f"长期目标：{goal.get('title', '')}\n"
+                f"描述：{goal.get('description') or '无'}\n"
+                '输出 JSON 格式：{"subtasks": [{"title": "子任务标题", "description": "简要说明", '
+                '"task_type": "daily 或 monthly"}]}'
+            )}
+        ]
+
+    def decompose_goals(self, goals: list, max_concurrency: int = 4, requests_per_second: float = 2.0,
+                        max_subtasks: int = 8, on_progress=None, cancel_event=None):
+        """
+        并发地把一个或多个长期目标拆解成结构化的子任务列表(JSON 输出)。
+        请求通过 asyncio 并发发出，同时受并发数和发起速率限制；单个目标失败不影响其他目标。
+        此方法会阻塞直到全部完成，应在后台线程中调用。
+        :param goals: 长期目标 dict 列表，至少包含 id 和 title
+        :param requests_per_second: 每秒最多发起的请求数，None 表示不限
+        :param on_progress: 每完成一个目标调用一次 on_progress(已完成数, 总数, goal_id)，在调用线程中执行
+        :param cancel_event: threading.Event，置位后不再发起新的请求
+        :return: (subtasks, errors)，subtasks 为 {goal_id: [子任务 dict]}，errors 为 {goal_id: 错误信息}
+        """
+        if not goals:
+            return {}, {}
+        return asyncio.run(self._decompose_async(
+            goals, max_concurrency, requests_per_second, max_subtasks, on_progress, cancel_event
+        ))
+
+    async def _decompose_async(self, goals, max_concurrency, requests_per_second, max_subtasks,
+                               on_progress, cancel_event):
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        limiter = _AsyncRateLimiter(requests_per_second)
+        subtasks, errors = {}, {}
+        done = 0
+
+        async def decompose(goal):
+            nonlocal done
+            try:
+                async with semaphore:
+                    if cancel_event is not None and cancel_event.is_set():
+                        errors[goal["id"]] = "已取消"
+                        return
+                    await limiter.acquire()
+                    reply = await self.backend.achat(
+                        self._build_decompose_messages(goal, max_subtasks), json_mode=True
+                    )
+                subtasks[goal["id"]] = parse_subtasks(reply, max_subtasks)
+            except Exception as e:
+                errors[goal["id"]] = str(e)
+            finally:
+                done += 1
+                if on_progress is not None:
+                    on_progress(done, len(goals), goal["id"])
+
+        try:
+            await asyncio.gather(*(decompose(goal) for goal in goals))
+        finally:
+            await self.backend.aclose()
+        return subtasks, errors
+
+    def stream_plan(self, tasks: list, timeout: float = None, cancel_token: CancelToken = None,
+                    timings: dict = None):
+        """
+        流式生成整体规划，按到达顺序逐段 yield 文本。
+        调用方提前结束迭代(break 或 close())时会关闭底层连接，可用于取消。
+        启用缓存时与 generate_plan 共用同一个键：命中则一次性返回缓存文本；同一份任务已有规划请求在进行时，
+        等它完成后一次性返回其结果，不再重复请求；否则流式请求，完整接收后写入缓存，被取消的结果不会缓存。
+        :param tasks: 同 generate_plan
+        :param timeout: 覆盖本次请求的 HTTP 超时时间(秒)
+        :param cancel_token: 从其他线程取消这一次生成：关闭进行中的流式连接，分组总结阶段不再发起新请求，
+                             迭代抛出 LLMCancelled
+        :param timings: 同 generate_plan
+        """
+        if timings is None:
+            timings = {}
+        key = None
+        if self.cache is not None:
+            key = self._plan_key(tasks)
+            cached = self.cache.acquire(key)
+            if cached is not None:
+                yield cached
+                return
+
+        response = None
+        try:
+            messages = self._prepare_messages(tasks, cancel_token, timings)
+            start = time.perf_counter()
+            start_ns = time.perf_counter_ns()
+            stream = self.backend.stream(messages, timeout=timeout, cancel_token=cancel_token)
+            parts = []
+            try:
+                for content in stream:
+                    if not parts:
+                        metrics.record("ai.stream_plan.first_chunk", start_ns, time.perf_counter_ns())
+                    parts.append(content)
+                    yield content
+            finally:
+                stream.close()
+                # 生成器在两次 yield 之间挂起，总耗时包含调用方处理每段文本的时间
+                metrics.record("ai.stream_plan", start_ns, time.perf_counter_ns(), chunks=len(parts))
+            metrics.count("ai.response_chars", sum(len(p) for p in parts))
+            timings["reduce_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            response = "".join(parts).strip()
+        except Exception as e:
+            if key is not None and not isinstance(e, LLMCancelled):
+                self.cache.release(key, error=e)
+                key = None
+            raise
+        finally:
+            # 正常结束时写入缓存；被取消(提前关闭生成器或 LLMCancelled)时 response 为 None，等待者会自行重新请求
+            if key is not None:
+                self.cache.release(key, self.model, response)
+
+metrics.instrument_class(AIService, "ai")
@@ -8,63 +8,152 @@ database.py
 """
 
 import sqlite3
-from datetime import datetime
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from itertools import islice
 import os
+
+from src.core.migrations import migrate, INSERT_TRIGGERS, SYNCED_TABLES, apply_insert_triggers
+from src.core.task_record import Task, TASK_FIELDS, task_row_factory
+from src.utils import metrics
+
 print("当前工作目录:", os.getcwd())
 
 DB_NAME = "new_tasks.db"
 
+# PRAGMA synchronous 允许的取值；WAL 模式下 NORMAL 已能保证崩溃后数据库不损坏
+SYNCHRONOUS_LEVELS = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+# 按 Task 字段顺序选择任务列
+TASK_SELECT = "SELECT " + ", ".join(TASK_FIELDS) + " FROM tasks"
+ARCHIVE_SELECT = "SELECT " + ", ".join(TASK_FIELDS) + " FROM tasks_archive"
+TASK_SELECT_T = "SELECT " + ", ".join("t." + f for f in TASK_FIELDS) + " FROM"
+
+# export_rows / import 支持的表及导出的列；归档任务与 tasks 列相同，可一并导出
+EXPORT_FIELDS = {
+    "tasks": TASK_FIELDS,
+    "learning_log": ("id", "domain", "minutes", "created_at", "uid"),
+}
+
+# get_focus_totals 支持的分组方式及其分组表达式
+FOCUS_GROUPS = {
+    "task": "task_id",
+    "domain": "domain",
+    "day": "date(started_at, 'unixepoch', 'localtime')",
+}
+
+# 短检索词(少于 3 个字符)在 trigram 词表中最多读取的出现次数；超过说明该词很常见，
+# 按 id 倒序的 LIKE 扫描很快就能凑够结果，不必先取出全部匹配的任务
+SHORT_TERM_INDEX_LIMIT = 10000
+
+# 以 ? 为根的整棵任务子树(含根)；用 UNION 去重，即使 parent_id 意外成环也能结束
+SUBTREE_CTE = """
+    WITH RECURSIVE subtree(id, depth) AS (
+        SELECT id, 0 FROM tasks WHERE id = ?
+        UNION
+        SELECT t.id, s.depth + 1 FROM tasks t JOIN subtree s ON t.parent_id = s.id
+    )
+"""
+
 
 class Database:
-    def __init__(self, db_name: str = None):
+    def __init__(self, db_name: str = None, synchronous: str = "NORMAL"):
         """
         数据库初始化，默认使用 tasks.db 作为文件名。
         如果你想使用自定义的数据库名称，可在实例化时传入 db_name 参数。
+        :param synchronous: PRAGMA synchronous 级别(OFF / NORMAL / FULL / EXTRA)，
+                            WAL 模式下默认 NORMAL，只在 checkpoint 时 fsync
         """
         if db_name:
             self.db_name = db_name
         else:
             self.db_name = DB_NAME
 
+        synchronous = synchronous.upper()
+        if synchronous not in SYNCHRONOUS_LEVELS:
+            raise ValueError(f"不支持的 synchronous 级别: {synchronous}")
+
         # 连接数据库并初始化
-        self.conn = sqlite3.connect(self.db_name)
+        # isolation_level=None：由 transaction() 显式管理事务，避免 sqlite3 模块隐式开启事务
+        self.conn = sqlite3.connect(self.db_name, isolation_level=None)
         self.conn.row_factory = sqlite3.Row  # 查询结果可使用字典键名访问
+        # 只对新建的库生效；已有的库需要用 src.utils.db_maintenance 手动转换一次(完整 VACUUM)
+        self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL;")
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute(f"PRAGMA synchronous={synchronous};")
+        self._tx_depth = 0  # 当前事务嵌套层数，只有最外层负责 COMMIT / ROLLBACK
+        # 未完成任务的缓存 {id: Task}，None 表示尚未加载或已整体失效。
+        # 本连接的写操作逐条更新缓存；其他连接(进程)提交的修改通过 PRAGMA data_version 发现后整体重新加载
+        self._open_tasks = None
+        self._data_version = None
+        # 各学习领域尚未凑满一分钟、还没有计入 learning_log 的专注秒数，见 bulk_add_focus_sessions
+        self._focus_carry = {}
         self.create_tables()
 
-    def create_tables(self):
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS tasks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                description TEXT,
-                task_type TEXT,    -- daily / monthly
-                goal_type TEXT,    -- short-term / long-term
-                parent_id INTEGER, -- 新增字段：关联长期任务；长期任务 parent_id 为空
-                is_completed INTEGER DEFAULT 0,
-                created_at TEXT,
-                completed_at TEXT
-            );
-            """
-        )
-        # 保留其他表的创建...
-        self.conn.commit()
+    @contextmanager
+    def transaction(self):
+        """
+        事务上下文管理器，块内的所有写操作只提交一次。
+        支持嵌套：内层直接并入外层事务，由最外层统一提交或回滚。
+        用法：
+            with db.transaction():
+                db.add_task("任务1")
+                db.complete_task(3)
+        """
+        if self._tx_depth == 0:
+            self.conn.execute("BEGIN IMMEDIATE;")
+        self._tx_depth += 1
+        try:
+            yield self.conn
+        except BaseException:
+            self._tx_depth -= 1
+            if self._tx_depth == 0:
+                self.conn.execute("ROLLBACK;")
+                # 事务内对缓存的修改已无法对应回滚后的数据
+                self._open_tasks = None
+            raise
+        else:
+            self._tx_depth -= 1
+            if self._tx_depth == 0:
+                self.conn.execute("COMMIT;")
 
+    @contextmanager
+    def _triggers_suspended(self, *names):
+        """
+        在当前事务内暂时删除指定的触发器，退出时按 sqlite_master 中保存的原 SQL 重建。
+        DDL 随事务提交或回滚，其他连接看不到触发器缺失的中间状态。
+        """
+        if not self._tx_depth:
+            raise RuntimeError("_triggers_suspended 必须在事务中使用")
+        saved = self.conn.execute(
+            f"SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({', '.join('?' * len(names))});",
+            names
+        ).fetchall()
+        for name in names:
+            self.conn.execute(f"DROP TRIGGER IF EXISTS {name};")
+        try:
+            yield
+        finally:
+            for row in saved:
+                self.conn.execute(row["sql"])
 
-        # ---------------- 学习记录表 ----------------
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS learning_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                domain TEXT NOT NULL,          -- 学习领域名称，如 编程, 绘画, etc
-                minutes INTEGER NOT NULL,      -- 学习时间(分钟)
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            );
-            """
-        )
+    @contextmanager
+    def _bulk_cache(self, kib: int = 65536):
+        """大批量写入时索引页会被反复访问，临时把页缓存放大到 kib KB，退出时恢复"""
+        cache_size = self.conn.execute("PRAGMA cache_size;").fetchone()[0]
+        self.conn.execute(f"PRAGMA cache_size=-{int(kib)};")
+        try:
+            yield
+        finally:
+            self.conn.execute(f"PRAGMA cache_size={cache_size};")
 
-        self.conn.commit()
+    def create_tables(self):
+        """
+        创建或升级表结构，具体步骤见 migrations.py。
+        已存在的 new_tasks.db 会根据 PRAGMA user_version 原地升级。
+        """
+        migrate(self)
 
     # =================================================================
     #                           任务操作
@@ -72,72 +161,373 @@ class Database:
 
     def add_task(self, title: str, description: str = "",
                 task_type: str = "daily", goal_type: str = "short-term", parent_id: int = None) -> int:
-        cursor = self.conn.cursor()
+        return self.bulk_add_tasks([{
+            "title": title,
+            "description": description,
+            "task_type": task_type,
+            "goal_type": goal_type,
+            "parent_id": parent_id,
+        }])[0]
+
+    def bulk_add_tasks(self, tasks) -> list:
+        """
+        批量添加任务，所有行在同一个事务中通过 executemany 写入，只提交一次。
+        :param tasks: 可迭代对象，每个元素为 dict，键同 add_task 的参数，例如：
+                      [{"title": "任务1", "goal_type": "short-term", "parent_id": 3}, ...]
+        :return: 新任务的 id 列表，顺序与输入一致
+        """
         created_at = datetime.now().isoformat(timespec='seconds')
-        cursor.execute(
-            """
-            INSERT INTO tasks (title, description, task_type, goal_type, parent_id, created_at)
-            VALUES (?, ?, ?, ?, ?, ?);
-            """,
-            (title, description, task_type, goal_type, parent_id, created_at)
-        )
-        self.conn.commit()
-        return cursor.lastrowid
+        rows = [
+            (
+                t["title"],
+                t.get("description", ""),
+                t.get("task_type", "daily"),
+                t.get("goal_type", "short-term"),
+                t.get("parent_id"),
+                created_at,
+                uuid.uuid4().hex,
+            )
+            for t in tasks
+        ]
+        if not rows:
+            return []
+        with self.transaction():
+            self.conn.executemany(
+                """
+                INSERT INTO tasks (title, description, task_type, goal_type, parent_id, created_at, uid)
+                VALUES (?, ?, ?, ?, ?, ?, ?);
+                """,
+                rows
+            )
+            # 写事务内独占写入，AUTOINCREMENT 分配的 id 是连续的
+            last_id = self.conn.execute("SELECT last_insert_rowid();").fetchone()[0]
+            first_id = last_id - len(rows) + 1
+            if self._open_tasks is not None:
+                for task in self._query_tasks(TASK_SELECT + " WHERE id BETWEEN ? AND ?;", (first_id, last_id)):
+                    self._open_tasks[task.id] = task
+        return list(range(first_id, last_id + 1))
+
+    def add_subtasks(self, subtasks: dict) -> dict:
+        """
+        把多个长期目标的子任务在同一个事务中批量写入，parent_id 指向对应目标。
+        写入前在同一事务内确认目标仍然存在，已被删除的目标的子任务会被丢弃。
+        :param subtasks: {goal_id: [{"title": ..., "description": ..., "task_type": ...}, ...]}
+        :return: {goal_id: [新任务 id, ...]}
+        """
+        goal_ids = [goal_id for goal_id, items in subtasks.items() if items]
+        if not goal_ids:
+            return {}
+        with self.transaction():
+            existing = {
+                row["id"] for row in self.conn.execute(
+                    f"SELECT id FROM tasks WHERE id IN ({', '.join('?' * len(goal_ids))});", goal_ids
+                )
+            }
+            rows = [
+                (goal_id, {**item, "goal_type": "short-term", "parent_id": goal_id})
+                for goal_id in goal_ids if goal_id in existing
+                for item in subtasks[goal_id]
+            ]
+            ids = self.bulk_add_tasks(task for _, task in rows)
+        result = {}
+        for (goal_id, _), task_id in zip(rows, ids):
+            result.setdefault(goal_id, []).append(task_id)
+        return result
+
+    def _query_tasks(self, sql: str, params=()) -> list:
+        """执行按 TASK_FIELDS 顺序选择列的查询，返回 Task 列表"""
+        cursor = self.conn.cursor()
+        cursor.row_factory = task_row_factory
+        return cursor.execute(sql, params).fetchall()
+
+    def _valid_open_task_cache(self):
+        """
+        返回仍然有效的未完成任务缓存，没有或已失效时返回 None(不会重新加载)。
+        PRAGMA data_version 只在其他连接提交修改后变化，检查它只需一次极小的查询。
+        """
+        version = self.conn.execute("PRAGMA data_version;").fetchone()[0]
+        if version != self._data_version:
+            self._data_version = version
+            self._open_tasks = None
+        return self._open_tasks
 
+    def _open_task_cache(self) -> dict:
+        """返回未完成任务的缓存 {id: Task}，失效时整体重新加载"""
+        if self._valid_open_task_cache() is None:
+            self._open_tasks = {
+                task.id: task for task in self._query_tasks(TASK_SELECT + " WHERE is_completed=0;")
+            }
+        return self._open_tasks
+
+    def _forget_tasks(self, task_ids):
+        """本连接的写操作使这些任务不再是(或不再存在的)未完成任务"""
+        if self._open_tasks is not None:
+            for task_id in task_ids:
+                self._open_tasks.pop(task_id, None)
+
+    def get_task(self, task_id: int) -> Task:
+        """
+        按主键获取单个任务，不存在时返回 None。
+        缓存有效时直接返回缓存中的任务；缓存失效时只做一次主键查询，不为一个任务重新加载全部未完成任务
+        (DatabaseWorker 的读连接在每次写事务提交后都会发现缓存失效)。
+        """
+        cache = self._valid_open_task_cache()
+        task = cache.get(task_id) if cache is not None else None
+        if task is not None:
+            return task
+        rows = self._query_tasks(TASK_SELECT + " WHERE id = ?;", (task_id,))
+        return rows[0] if rows else None
 
     def get_tasks(self, include_completed: bool = False) -> list:
         """
-        获取所有任务，默认不包含已完成的任务
+        获取所有任务，默认不包含已完成的任务。
+        未完成任务来自缓存，重复调用时只是复制一次列表，返回的 Task 对象在两次调用之间是同一个。
         """
-        cursor = self.conn.cursor()
         if include_completed:
-            cursor.execute("SELECT * FROM tasks;")
-        else:
-            cursor.execute("SELECT * FROM tasks WHERE is_completed=0;")
-
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
+            return self._query_tasks(TASK_SELECT + ";")
+        return list(self._open_task_cache().values())
 
     def complete_task(self, task_id: int):
         """
         将指定id的任务标记为完成，并记录完成时间
         """
-        cursor = self.conn.cursor()
+        self.bulk_complete_tasks([task_id])
+
+    def bulk_complete_tasks(self, task_ids):
+        """
+        批量将任务标记为完成，同一事务内一次提交
+        :param task_ids: 任务 id 的可迭代对象
+        """
+        task_ids = list(task_ids)
         completed_at = datetime.now().isoformat(timespec='seconds')
-        cursor.execute(
-            """
-            UPDATE tasks
-            SET is_completed = 1, completed_at = ?
-            WHERE id = ?;
-            """,
-            (completed_at, task_id)
-        )
-        self.conn.commit()
+        with self.transaction():
+            self.conn.executemany(
+                """
+                UPDATE tasks
+                SET is_completed = 1, completed_at = ?
+                WHERE id = ?;
+                """,
+                ((completed_at, task_id) for task_id in task_ids)
+            )
+            self._forget_tasks(task_ids)
 
     def get_completed_tasks(self) -> list:
         """
         获取已完成的任务列表
         """
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM tasks WHERE is_completed=1;")
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
+        return self._query_tasks(TASK_SELECT + " WHERE is_completed=1;")
+
+    def get_completed_tasks_page(self, after=None, limit: int = 50) -> list:
+        """
+        按完成时间倒序分页获取已完成任务(键集分页)。没有完成时间的旧任务排在最后。
+        :param after: 上一页最后一条任务的 (completed_at, id)，None 表示第一页；completed_at 可以为 None
+        :param limit: 每页条数；返回条数少于 limit 说明已经没有更多
+        """
+        # 第一页没有范围条件时规划器可能选 idx_tasks_completed_goal 再排序，这里固定走分页索引
+        sql = TASK_SELECT + " INDEXED BY idx_tasks_completed_key WHERE is_completed = 1"
+        params = []
+        if after is not None:
+            # completed_at 为 NULL 时行比较的结果也是 NULL，按空字符串比较才不会跳过这些任务。
+            # 表达式索引上的行值比较不能定位，展开成 key <= ? AND (key < ? OR id < ?)
+            sql += " AND COALESCE(completed_at, '') <= ? AND (COALESCE(completed_at, '') < ? OR id < ?)"
+            params.extend((after[0] or "", after[0] or "", after[1]))
+        sql += " ORDER BY COALESCE(completed_at, '') DESC, id DESC LIMIT ?;"
+        params.append(limit)
+        return self._query_tasks(sql, params)
+
+    def get_tasks_page(self, after=None, limit: int = 50) -> list:
+        """
+        按创建时间倒序分页获取全部任务(含已完成)。
+        :param after: 上一页最后一条任务的 (created_at, id)，None 表示第一页
+        """
+        sql = TASK_SELECT
+        params = []
+        if after is not None:
+            sql += " WHERE (created_at, id) < (?, ?)"
+            params.extend(after)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?;"
+        params.append(limit)
+        return self._query_tasks(sql, params)
 
     def delete_task(self, task_id: int):
         """
         删除指定id的任务
         """
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM tasks WHERE id = ?;", (task_id,))
-        self.conn.commit()
+        with self.transaction():
+            self.conn.execute("DELETE FROM tasks WHERE id = ?;", (task_id,))
+            self._forget_tasks([task_id])
 
     def delete_completed_tasks(self):
         """
         删除所有已完成的任务记录
         """
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM tasks WHERE is_completed=1;")
-        self.conn.commit()
+        with self.transaction():
+            self.conn.execute("DELETE FROM tasks WHERE is_completed=1;")
+
+    # =================================================================
+    #                       任务树(parent_id) 操作
+    # =================================================================
+
+    def get_task_subtree(self, root_id: int, include_root: bool = True, completed: bool = None) -> list:
+        """
+        用一条递归 CTE 取出以 root_id 为根的整棵子树，按层级、id 排序，每行附带 depth(根为 0)。
+        :param completed: None 不过滤；True 只要已完成；False 只要未完成
+        """
+        sql = SUBTREE_CTE + "SELECT t.*, s.depth FROM subtree s JOIN tasks t ON t.id = s.id WHERE 1"
+        params = [root_id]
+        if not include_root:
+            sql += " AND s.depth > 0"
+        if completed is not None:
+            sql += " AND t.is_completed = ?"
+            params.append(1 if completed else 0)
+        sql += " ORDER BY s.depth, t.id;"
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def get_ancestor_ids(self, task_id: int) -> list:
+        """返回任务的所有祖先 id，从直接父任务到根"""
+        rows = self.conn.execute(
+            """
+            WITH RECURSIVE ancestors(id, depth) AS (
+                SELECT parent_id, 1 FROM tasks WHERE id = ? AND parent_id IS NOT NULL
+                UNION
+                SELECT t.parent_id, a.depth + 1 FROM tasks t JOIN ancestors a ON t.id = a.id
+                WHERE t.parent_id IS NOT NULL
+            )
+            SELECT id FROM ancestors ORDER BY depth;
+            """,
+            (task_id,)
+        ).fetchall()
+        return [row["id"] for row in rows]
+
+    def get_goal_progress(self, goal_ids=None) -> dict:
+        """
+        一次查询统计多个长期目标下全部后代任务的完成情况。
+        :param goal_ids: 目标 id 列表，None 表示所有未完成的长期目标
+        :return: {goal_id: {"total": 10, "completed": 3, "ratio": 0.3}}，没有子任务的目标 total 为 0
+        """
+        if goal_ids is None:
+            roots_sql = "SELECT id, id FROM tasks WHERE goal_type = 'long-term' AND is_completed = 0"
+            params = []
+        else:
+            goal_ids = list(goal_ids)
+            if not goal_ids:
+                return {}
+            roots_sql = f"SELECT id, id FROM tasks WHERE id IN ({', '.join('?' * len(goal_ids))})"
+            params = goal_ids
+        rows = self.conn.execute(
+            f"""
+            WITH RECURSIVE tree(root_id, id) AS (
+                {roots_sql}
+                UNION
+                SELECT tree.root_id, t.id FROM tasks t JOIN tree ON t.parent_id = tree.id
+            )
+            SELECT tree.root_id,
+                   COUNT(t.id) AS total,
+                   COALESCE(SUM(t.is_completed), 0) AS completed
+            FROM tree LEFT JOIN tasks t ON t.id = tree.id AND tree.id != tree.root_id
+            GROUP BY tree.root_id;
+            """,
+            params
+        ).fetchall()
+        return {
+            row["root_id"]: {
+                "total": row["total"],
+                "completed": row["completed"],
+                "ratio": row["completed"] / row["total"] if row["total"] else 0.0,
+            }
+            for row in rows
+        }
+
+    def complete_subtree(self, root_id: int) -> list:
+        """用一条 UPDATE 把整棵子树(含根)标记为完成，返回本次被标记的任务 id"""
+        completed_at = datetime.now().isoformat(timespec='seconds')
+        with self.transaction():
+            rows = self.conn.execute(
+                SUBTREE_CTE + """
+                UPDATE tasks SET is_completed = 1, completed_at = ?
+                WHERE id IN (SELECT id FROM subtree) AND is_completed = 0
+                RETURNING id;
+                """,
+                (root_id, completed_at)
+            ).fetchall()
+            ids = [row["id"] for row in rows]
+            self._forget_tasks(ids)
+        return ids
+
+    def delete_subtree(self, root_id: int) -> list:
+        """用一条 DELETE 删除整棵子树(含根)，返回被删除的任务 id"""
+        with self.transaction():
+            rows = self.conn.execute(
+                SUBTREE_CTE + """
+                DELETE FROM tasks WHERE id IN (SELECT id FROM subtree)
+                RETURNING id;
+                """,
+                (root_id,)
+            ).fetchall()
+            ids = [row["id"] for row in rows]
+            self._forget_tasks(ids)
+        return ids
+
+    def search_tasks(self, query: str, limit: int = 50, include_completed: bool = False) -> list:
+        """
+        全文检索任务标题和描述，按相关度排序（标题命中权重高于描述）。
+        多个关键词以空白分隔，需全部命中；每个关键词按子串匹配，因此天然支持前缀匹配。
+        trigram 索引只能 MATCH 不少于 3 个字符的关键词，更短的关键词(如两个汉字)在候选结果上用 LIKE 过滤。
+        全部关键词都过短时按 id 倒序返回：第一个较少出现的短词通过词表 tasks_fts_terms 的前缀范围查出候选 id，
+        其余短词在候选上用 LIKE 过滤；都很常见(出现超过 SHORT_TERM_INDEX_LIMIT 次)时用 LIKE 扫描，依靠 LIMIT 提前结束。
+        """
+        terms = query.split()
+        if not terms:
+            return []
+        indexed = [t for t in terms if len(t) >= 3]
+        short = [t for t in terms if len(t) < 3]
+
+        conditions, params = [], []
+        if not include_completed:
+            conditions.append("t.is_completed = 0")
+        use_terms = False
+        for term in short:
+            # 词表中的三字组已转为小写；term 开头的三字组都在 [term, term + U+10FFFF) 范围内
+            bounds = [term.lower(), term.lower() + "\U0010ffff"]
+            if not indexed and not use_terms and self._short_term_count(*bounds) < SHORT_TERM_INDEX_LIMIT:
+                conditions.append("t.id IN (SELECT doc FROM tasks_fts_terms WHERE term >= ? AND term < ?)")
+                params.extend(bounds)
+                use_terms = True
+                continue
+            pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            conditions.append("(t.title LIKE ? ESCAPE '\\' OR t.description LIKE ? ESCAPE '\\')")
+            params.extend([pattern, pattern])
+
+        if indexed:
+            match = " AND ".join('"' + t.replace('"', '""') + '"' for t in indexed)
+            sql = (
+                TASK_SELECT_T + " tasks_fts JOIN tasks t ON t.id = tasks_fts.rowid "
+                "WHERE tasks_fts MATCH ?"
+            )
+            params.insert(0, match)
+            for condition in conditions:
+                sql += " AND " + condition
+            sql += " ORDER BY bm25(tasks_fts, 10.0, 1.0) LIMIT ?;"
+        elif use_terms:
+            sql = TASK_SELECT_T + " tasks t WHERE " + " AND ".join(conditions)
+            sql += " ORDER BY t.id DESC LIMIT ?;"
+        else:
+            # NOT INDEXED：沿 rowid 倒序扫描，凑够 limit 条即停止，避免先按完成状态取出全部再排序
+            sql = TASK_SELECT_T + " tasks t NOT INDEXED WHERE " + " AND ".join(conditions)
+            sql += " ORDER BY t.id DESC LIMIT ?;"
+        params.append(limit)
+        return self._query_tasks(sql, params)
+
+    def _short_term_count(self, lower: str, upper: str) -> int:
+        """词表中 [lower, upper) 范围内三字组的出现次数，最多数到 SHORT_TERM_INDEX_LIMIT"""
+        return self.conn.execute(
+            """
+            SELECT COUNT(*) FROM (
+                SELECT 1 FROM tasks_fts_terms WHERE term >= ? AND term < ? LIMIT ?
+            );
+            """,
+            (lower, upper, SHORT_TERM_INDEX_LIMIT)
+        ).fetchone()[0]
 
     # =================================================================
     #                       学习记录(learning_log) 操作
@@ -147,33 +537,724 @@ class Database:
         """
         添加一条学习记录
         """
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "INSERT INTO learning_log (domain, minutes) VALUES (?, ?);",
-            (domain, minutes)
-        )
-        self.conn.commit()
+        self.bulk_add_learning_time([(domain, minutes)])
+
+    def bulk_add_learning_time(self, records):
+        """
+        批量添加学习记录，同一事务内一次提交
+        :param records: (domain, minutes) 或 (domain, minutes, created_at) 元组的可迭代对象，
+                        created_at 为 UTC 时间 'YYYY-MM-DD HH:MM:SS'，省略时使用当前时间
+        """
+        with self.transaction():
+            self.conn.executemany(
+                """
+                INSERT INTO learning_log (domain, minutes, created_at, uid)
+                VALUES (?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?);
+                """,
+                ((r[0], r[1], r[2] if len(r) > 2 else None, uuid.uuid4().hex) for r in records)
+            )
 
     def get_learning_logs(self) -> list:
         """
         按 domain 汇总总时长 (单位：分钟)
         返回示例: [ {'domain': '编程', 'total_minutes': 120}, {'domain': '绘画', 'total_minutes': 90} ]
+        读取按月预聚合的 learning_rollup，开销与月份数成正比，而不是记录条数。
         """
         cursor = self.conn.cursor()
         cursor.execute(
             """
-            SELECT domain, SUM(minutes) AS total_minutes
-            FROM learning_log
+            SELECT domain, SUM(total_minutes) AS total_minutes
+            FROM learning_rollup
+            WHERE period = 'month'
             GROUP BY domain;
             """
         )
         rows = cursor.fetchall()
         return [dict(row) for row in rows]
 
+    def get_learning_report(self, period: str = "day", start=None, end=None, domain: str = None) -> list:
+        """
+        按周期输出学习时长报表，例如每天/每周/每月各领域的学习时间。
+        周期按本地日期划分(created_at 为 UTC，汇总时换算为本地时间)。
+        :param period: day / week / month
+        :param start: 起始日期(含)，date 或 'YYYY-MM-DD'，None 表示不限
+        :param end: 结束日期(不含)，None 表示不限
+        :param domain: 只统计某个领域
+        :return: [ {'bucket': '2025-03-03', 'domain': '编程', 'total_minutes': 90}, ... ]，按 bucket 排序
+        """
+        if period not in ("day", "week", "month"):
+            raise ValueError(f"不支持的统计周期: {period}")
+        sql = "SELECT bucket, domain, total_minutes FROM learning_rollup WHERE period = ?"
+        params = [period]
+        if start is not None:
+            sql += " AND bucket >= ?"
+            params.append(_to_date(start).isoformat())
+        if end is not None:
+            sql += " AND bucket < ?"
+            params.append(_to_date(end).isoformat())
+        if domain is not None:
+            sql += " AND domain = ?"
+            params.append(domain)
+        sql += " ORDER BY bucket, domain;"
+        rows = self.conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_learning_totals(self, start=None, end=None) -> list:
+        """
+        统计任意本地日期区间 [start, end) 内各领域的学习总时长。
+        区间中完整覆盖的月份读取月汇总，首尾不足一个月的部分读取日汇总，
+        因此查询代价只与桶数有关。
+        :return: [ {'domain': '编程', 'total_minutes': 120}, ... ]
+        """
+        start = _to_date(start) if start is not None else date.min
+        end = _to_date(end) if end is not None else date.max
+        if start >= end:
+            return []
+        first_month = start if start.day == 1 else _next_month(start)
+        last_month = end.replace(day=1)
+
+        ranges = []
+        if first_month < last_month:
+            ranges.append(("month", first_month, last_month))
+            ranges.append(("day", start, first_month))
+            ranges.append(("day", last_month, end))
+        else:
+            ranges.append(("day", start, end))
+        ranges = [r for r in ranges if r[1] < r[2]]
+
+        where = " OR ".join("(period = ? AND bucket >= ? AND bucket < ?)" for _ in ranges)
+        params = [value for period, lo, hi in ranges for value in (period, lo.isoformat(), hi.isoformat())]
+        rows = self.conn.execute(
+            f"""
+            SELECT domain, SUM(total_minutes) AS total_minutes
+            FROM learning_rollup
+            WHERE {where}
+            GROUP BY domain;
+            """,
+            params
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    # =================================================================
+    #                       专注记录(focus_sessions) 操作
+    # =================================================================
+
+    def add_focus_session(self, started_at, ended_at, task_id: int = None, domain: str = None) -> int:
+        """
+        添加一条番茄钟专注记录
+        """
+        return self.bulk_add_focus_sessions(
+            [{"started_at": started_at, "ended_at": ended_at, "task_id": task_id, "domain": domain}]
+        )
+
+    def bulk_add_focus_sessions(self, sessions) -> int:
+        """
+        批量写入专注记录，同一事务内一次提交。
+        填写了学习领域的记录同时计入 learning_log，无需再手动录入学习时间。番茄钟每次暂停都会结束一个片段，
+        因此按领域累加秒数，凑满整分钟才写入，不足一分钟的部分留给后续片段(包括之后的批次)，
+        而不是每个片段单独取整(频繁暂停时会少记，短于 30 秒的片段完全不计)。
+        :param sessions: dict 的可迭代对象，键为 started_at / ended_at(datetime 或 Unix 秒)，
+                         以及可选的 task_id / domain
+        :return: 实际写入的条数(结束时间不晚于开始时间的记录会被忽略)
+        """
+        rows, learning = [], []
+        carry = dict(self._focus_carry)
+        for session in sessions:
+            started = _to_epoch(session["started_at"])
+            ended = _to_epoch(session["ended_at"])
+            if ended <= started:
+                continue
+            domain = (session.get("domain") or "").strip() or None
+            rows.append((started, ended, session.get("task_id"), domain))
+            if not domain:
+                continue
+            minutes, carry[domain] = divmod(carry.get(domain, 0) + (ended - started), 60)
+            if minutes:
+                # 与 CURRENT_TIMESTAMP 一致保存 UTC 文本时间；learning_rollup 按本地日期分桶，与 FOCUS_GROUPS["day"] 一致
+                created_at = datetime.fromtimestamp(started, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+                learning.append((domain, minutes, created_at))
+        with self.transaction():
+            self.conn.executemany(
+                "INSERT INTO focus_sessions (started_at, ended_at, task_id, domain) VALUES (?, ?, ?, ?);",
+                rows
+            )
+            if learning:
+                self.bulk_add_learning_time(learning)
+        # 提交成功后才更新余数，失败的批次重试时不会重复计入
+        self._focus_carry = carry
+        return len(rows)
+
+    def get_focus_totals(self, group_by: str = "day", start=None, end=None,
+                         task_id: int = None, domain: str = None) -> list:
+        """
+        按任务 / 领域 / 日(本地时间)汇总 [start, end) 内开始的专注记录。
+        :param group_by: task / domain / day
+        :param start, end: date、datetime 或 Unix 秒；date 按本地零点计算
+        :return: [ {'key': '2025-03-03', 'sessions': 4, 'total_seconds': 6000}, ... ]，按 key 排序
+        """
+        if group_by not in FOCUS_GROUPS:
+            raise ValueError(f"不支持的分组方式: {group_by}")
+        key = FOCUS_GROUPS[group_by]
+        sql = f"""
+            SELECT {key} AS key, COUNT(*) AS sessions, SUM(ended_at - started_at) AS total_seconds
+            FROM focus_sessions WHERE 1 = 1
+        """
+        params = []
+        if start is not None:
+            sql += " AND started_at >= ?"
+            params.append(_to_epoch(start))
+        if end is not None:
+            sql += " AND started_at < ?"
+            params.append(_to_epoch(end))
+        if task_id is not None:
+            sql += " AND task_id = ?"
+            params.append(task_id)
+        if domain is not None:
+            sql += " AND domain = ?"
+            params.append(domain)
+        sql += " GROUP BY key ORDER BY key;"
+        rows = self.conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    # =================================================================
+    #                       增量同步(change_log) 操作
+    # =================================================================
+
+    def get_sync_state(self, key: str, default: str = None) -> str:
+        row = self.conn.execute("SELECT value FROM sync_state WHERE key = ?;", (key,)).fetchone()
+        return row["value"] if row else default
+
+    def set_sync_state(self, key: str, value):
+        with self.transaction():
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?);", (key, str(value))
+            )
+
+    @property
+    def replica_id(self) -> str:
+        """本机副本标识，首次访问时生成并持久化"""
+        replica = self.get_sync_state("replica_id")
+        if replica is None:
+            replica = uuid.uuid4().hex
+            self.set_sync_state("replica_id", replica)
+        return replica
+
+    def get_changes_since(self, seq: int, limit: int = 1000) -> list:
+        """
+        返回本地 seq 之后的修改，同一行的多次修改只保留最后一次，按 seq 升序。
+        每项格式：{"seq": 12, "entity": "tasks", "uid": "...", "op": "upsert", "data": {...},
+                   "updated_at": 1718000000000, "origin": "<replica_id>"}，
+        删除操作的 data 为 None；任务的 parent_id 以 parent_uid 表示；updated_at / origin 为该行的版本。
+        """
+        rows = self.conn.execute(
+            """
+            SELECT c.seq, c.entity, c.uid, c.op, m.updated_at, m.origin
+            FROM change_log c LEFT JOIN sync_meta m ON m.entity = c.entity AND m.uid = c.uid
+            WHERE c.seq > ?
+              AND c.seq = (SELECT MAX(seq) FROM change_log c2 WHERE c2.entity = c.entity AND c2.uid = c.uid)
+            ORDER BY c.seq
+            LIMIT ?;
+            """,
+            (seq, limit)
+        ).fetchall()
+        return self._changes_from_rows(rows)
+
+    def snapshot_changes(self) -> list:
+        """
+        以修改列表的形式导出全部同步数据(所有现存行及删除墓碑，带版本)，格式同 get_changes_since，seq 为 0。
+        另一副本用 apply_remote_changes 合并即可，不需要清空重建。
+        """
+        rows = self.conn.execute(
+            """
+            SELECT 0 AS seq, entity, uid, CASE deleted WHEN 1 THEN 'delete' ELSE 'upsert' END AS op,
+                   updated_at, origin
+            FROM sync_meta;
+            """
+        ).fetchall()
+        return self._changes_from_rows(rows)
+
+    def _changes_from_rows(self, rows) -> list:
+        payloads = {
+            # 父任务已被删除时 parent_id 仍保留原 id，通过墓碑找回它的 uid，
+            # 这样父任务在其他副本上被恢复时父子关系不会丢失
+            "tasks": self._sync_payloads(
+                """
+                SELECT t.uid, t.title, t.description, t.task_type, t.goal_type,
+                       COALESCE(p.uid, m.uid) AS parent_uid,
+                       t.is_completed, t.created_at, t.completed_at
+                FROM tasks t
+                LEFT JOIN tasks p ON p.id = t.parent_id
+                LEFT JOIN sync_meta m ON p.id IS NULL AND m.entity = 'tasks' AND m.row_id = t.parent_id
+                WHERE t.uid IN ({marks});
+                """,
+                [r["uid"] for r in rows if r["entity"] == "tasks" and r["op"] == "upsert"]
+            ),
+            "learning_log": self._sync_payloads(
+                "SELECT uid, domain, minutes, created_at FROM learning_log WHERE uid IN ({marks});",
+                [r["uid"] for r in rows if r["entity"] == "learning_log" and r["op"] == "upsert"]
+            ),
+        }
+        changes = []
+        for r in rows:
+            change = {"seq": r["seq"], "entity": r["entity"], "uid": r["uid"], "op": r["op"], "data": None,
+                      "updated_at": r["updated_at"] or 0, "origin": r["origin"] or ""}
+            if r["op"] == "upsert":
+                change["data"] = payloads[r["entity"]].get(r["uid"])
+                if change["data"] is None:
+                    continue  # 行已不存在（之后的删除会作为单独的修改出现）或已归档
+            changes.append(change)
+        return changes
+
+    def _sync_payloads(self, sql: str, uids: list) -> dict:
+        result = {}
+        for i in range(0, len(uids), 500):
+            chunk = uids[i:i + 500]
+            for row in self.conn.execute(sql.format(marks=", ".join("?" * len(chunk))), chunk):
+                data = dict(row)
+                result[data.pop("uid")] = data
+        return result
+
+    def _newer_changes(self, changes: list) -> list:
+        """
+        最后写入者胜出：只保留版本 (updated_at, origin) 比本地版本新的修改。
+        同一行在批次中出现多次时只取版本最新的一条；没有版本的修改(旧版本客户端)视为 (0, '')。
+        """
+        latest = {}
+        for c in changes:
+            if c["entity"] not in SYNCED_TABLES:
+                continue
+            key = (c["entity"], c["uid"])
+            version = (c.get("updated_at") or 0, c.get("origin") or "")
+            if key not in latest or version > latest[key][0]:
+                latest[key] = (version, c)
+        local = {}
+        for entity in SYNCED_TABLES:
+            uids = [uid for e, uid in latest if e == entity]
+            for i in range(0, len(uids), 500):
+                chunk = uids[i:i + 500]
+                for row in self.conn.execute(
+                    f"SELECT uid, updated_at, origin FROM sync_meta "
+                    f"WHERE entity = ? AND uid IN ({', '.join('?' * len(chunk))});",
+                    [entity, *chunk]
+                ):
+                    local[(entity, row["uid"])] = (row["updated_at"], row["origin"])
+        return [c for key, (version, c) in latest.items() if key not in local or version > local[key]]
+
+    def apply_remote_changes(self, changes: list) -> int:
+        """
+        在一个事务内合并远端修改（格式同 get_changes_since），返回实际应用的条数。
+        按行版本做最后写入者胜出的合并：比本地旧或相同的修改被跳过，不触碰对应的行；
+        删除会留下墓碑，之后收到的更旧的修改不会让该行复活。
+        学习记录每条是独立的一行，各设备新增的记录都会保留，累计时长是所有行的和，不会互相覆盖。
+        应用过程中触发器写入的 change_log 会被清除，避免把远端修改再推送回去；
+        sync_meta 记录的是远端的版本，而不是本机应用的时间。
+        """
+        changes = list(changes)
+        if not changes:
+            return 0
+        with self.transaction():
+            changes = self._newer_changes(changes)
+            if not changes:
+                return 0
+            task_upserts, task_deletes, log_upserts, log_deletes = [], [], [], []
+            for c in changes:
+                if c["entity"] == "tasks":
+                    (task_upserts if c["op"] == "upsert" else task_deletes).append(c)
+                else:
+                    (log_upserts if c["op"] == "upsert" else log_deletes).append(c)
+
+            task_rows = []
+            for c in task_upserts:
+                d = c["data"]
+                task_rows.append((c["uid"], d["title"], d["description"], d["task_type"], d["goal_type"],
+                                  d["is_completed"], d["created_at"], d["completed_at"]))
+
+            before = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log;").fetchone()[0]
+            # 本地删除过的任务被恢复时沿用墓碑中记录的原 id(AUTOINCREMENT 不会重复分配)，
+            # 仍指向它的子任务无需修改
+            self.conn.executemany(
+                """
+                INSERT INTO tasks (id, uid, title, description, task_type, goal_type, is_completed, created_at, completed_at)
+                VALUES ((SELECT row_id FROM sync_meta WHERE entity = 'tasks' AND uid = ?1 AND deleted = 1),
+                        ?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8)
+                ON CONFLICT (uid) DO UPDATE SET
+                    title = excluded.title, description = excluded.description,
+                    task_type = excluded.task_type, goal_type = excluded.goal_type,
+                    is_completed = excluded.is_completed, created_at = excluded.created_at,
+                    completed_at = excluded.completed_at;
+                """,
+                task_rows
+            )
+            # 父任务可能在同一批次中稍后才插入，因此所有行写入后再统一解析 parent_uid；
+            # 父任务已在本地删除时与本地删除的效果一致，指向其原 id
+            self.conn.executemany(
+                """
+                UPDATE tasks SET parent_id = COALESCE(
+                    (SELECT id FROM tasks WHERE uid = ?1),
+                    (SELECT row_id FROM sync_meta WHERE entity = 'tasks' AND uid = ?1)
+                ) WHERE uid = ?2;
+                """,
+                [(c["data"].get("parent_uid"), c["uid"]) for c in task_upserts]
+            )
+            self.conn.executemany(
+                """
+                INSERT INTO learning_log (uid, domain, minutes, created_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (uid) DO UPDATE SET
+                    domain = excluded.domain, minutes = excluded.minutes, created_at = excluded.created_at;
+                """,
+                [(c["uid"], c["data"]["domain"], c["data"]["minutes"], c["data"]["created_at"]) for c in log_upserts]
+            )
+            self.conn.executemany("DELETE FROM tasks WHERE uid = ?;", [(c["uid"],) for c in task_deletes])
+            self.conn.executemany("DELETE FROM learning_log WHERE uid = ?;", [(c["uid"],) for c in log_deletes])
+            self.conn.execute("DELETE FROM change_log WHERE seq > ?;", (before,))
+            # 用远端版本覆盖触发器写入的本地版本；本地不存在的行被远端删除时也记下墓碑
+            self.conn.executemany(
+                """
+                INSERT INTO sync_meta (entity, uid, updated_at, origin, deleted) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (entity, uid) DO UPDATE SET
+                    updated_at = excluded.updated_at, origin = excluded.origin, deleted = excluded.deleted;
+                """,
+                [
+                    (c["entity"], c["uid"], c.get("updated_at") or 0, c.get("origin") or "", int(c["op"] == "delete"))
+                    for c in changes
+                ]
+            )
+            # 远端修改可能涉及任意任务，未完成任务缓存整体失效
+            self._open_tasks = None
+        return len(changes)
+
+    def get_pending_changes(self) -> dict:
+        """
+        尚未推送(push_cursor 之后)的本地修改：{"pending": 行数, "oldest_ms": 其中最早的行版本时间}。
+        同一行的多次修改算一行；没有待推送修改时 oldest_ms 为 None。
+        """
+        cursor = int(self.get_sync_state("push_cursor", 0))
+        row = self.conn.execute(
+            """
+            SELECT COUNT(DISTINCT c.entity || ':' || c.uid) AS pending, MIN(m.updated_at) AS oldest_ms
+            FROM change_log c LEFT JOIN sync_meta m ON m.entity = c.entity AND m.uid = c.uid
+            WHERE c.seq > ?;
+            """,
+            (cursor,)
+        ).fetchone()
+        return {"pending": row["pending"], "oldest_ms": row["oldest_ms"]}
+
+    def prune_change_log(self, upto_seq: int):
+        """删除已被远端确认的修改记录"""
+        with self.transaction():
+            self.conn.execute("DELETE FROM change_log WHERE seq <= ?;", (upto_seq,))
+
+    # =================================================================
+    #                       批量导入 / 导出
+    # =================================================================
+
+    def export_rows(self, entity: str, include_archived: bool = False):
+        """
+        按 id 顺序逐行导出 tasks 或 learning_log，生成 EXPORT_FIELDS[entity] 顺序的元组。
+        游标边读边产出，内存占用与行数无关。
+        :param include_archived: 导出 tasks 时是否包含 tasks_archive 中的任务
+        """
+        fields = ", ".join(EXPORT_FIELDS[entity])
+        sql = f"SELECT {fields} FROM {entity}"
+        if entity == "tasks" and include_archived:
+            sql += f" UNION ALL SELECT {fields} FROM tasks_archive"
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        cursor.arraysize = 1000
+        cursor.execute(sql + " ORDER BY id;")
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            yield from rows
+
+    def import_tasks(self, tasks, chunk_size: int = 50000) -> int:
+        """
+        流式导入任务，全部行在一个事务中按 chunk_size 分块 executemany 写入，失败时整体回滚。
+        导入的任务获得新的 id 和 uid；原文件中的 parent_id 按原 id 重新映射到新 id，
+        父任务可以出现在子任务之后。映射表放在 SQLite 临时表中，Python 内存占用与行数无关。
+        :param tasks: dict 的可迭代对象，键为 TASK_FIELDS 的子集，必须有 title
+        :return: 导入的任务数
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        total = 0
+        tasks = iter(tasks)
+        with self._bulk_cache():
+            with self.transaction():
+                self.conn.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS import_task_ids "
+                    "(old_id INTEGER PRIMARY KEY, new_id INTEGER NOT NULL, old_parent INTEGER);"
+                )
+                self.conn.execute("CREATE INDEX IF NOT EXISTS temp.idx_import_new ON import_task_ids (new_id);")
+                self.conn.execute("DELETE FROM import_task_ids;")
+                # AUTOINCREMENT 的下一个 id；写事务内独占写入，同一块中的 id 是连续的
+                next_id = self.conn.execute(
+                    "SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'tasks'), 0), "
+                    "COALESCE((SELECT MAX(id) FROM tasks), 0)) + 1;"
+                ).fetchone()[0]
+                first_id = next_id
+                with self._triggers_suspended(*INSERT_TRIGGERS["tasks"]):
+                    while True:
+                        chunk = list(islice(tasks, chunk_size))
+                        if not chunk:
+                            break
+                        # 先写入本块的 id 映射，插入任务时即可解析已出现过的父任务，
+                        # 避免事后再 UPDATE 一遍(每次 UPDATE 还会多写一条 change_log)
+                        self.conn.executemany(
+                            "INSERT OR REPLACE INTO import_task_ids (old_id, new_id, old_parent) VALUES (?, ?, ?);",
+                            (
+                                (t["id"], next_id + i, t.get("parent_id"))
+                                for i, t in enumerate(chunk) if t.get("id") is not None
+                            )
+                        )
+                        self.conn.executemany(
+                            """
+                            INSERT INTO tasks (title, description, task_type, goal_type, parent_id, is_completed,
+                                               created_at, completed_at, uid)
+                            VALUES (?, ?, ?, ?, (SELECT new_id FROM import_task_ids WHERE old_id = ?), ?, ?, ?,
+                                    lower(hex(randomblob(16))));
+                            """,
+                            (
+                                (
+                                    t["title"],
+                                    t.get("description") or "",
+                                    t.get("task_type") or "daily",
+                                    t.get("goal_type") or "short-term",
+                                    t.get("parent_id"),
+                                    1 if t.get("is_completed") else 0,
+                                    t.get("created_at") or now,
+                                    t.get("completed_at"),
+                                )
+                                for t in chunk
+                            )
+                        )
+                        last_id = self.conn.execute("SELECT last_insert_rowid();").fetchone()[0]
+                        if last_id != next_id + len(chunk) - 1:
+                            raise RuntimeError("导入任务时 id 分配不连续，已回滚")
+                        next_id = last_id + 1
+                        total += len(chunk)
+                    if next_id > first_id:
+                        apply_insert_triggers(self.conn.cursor(), "tasks", first_id, next_id - 1)
+                # 父任务在后面的块中才出现的行最后统一解析；原父任务不在导入文件中时 parent_id 保持为空
+                self.conn.execute(
+                    """
+                    UPDATE tasks SET parent_id = (
+                        SELECT p.new_id FROM import_task_ids c JOIN import_task_ids p ON p.old_id = c.old_parent
+                        WHERE c.new_id = tasks.id
+                    )
+                    WHERE parent_id IS NULL AND id IN (
+                        SELECT c.new_id FROM import_task_ids c JOIN import_task_ids p ON p.old_id = c.old_parent
+                    );
+                    """
+                )
+                self.conn.execute("DELETE FROM import_task_ids;")
+                self._open_tasks = None
+        return total
+
+    def import_learning_logs(self, records, chunk_size: int = 50000) -> int:
+        """
+        流式导入学习记录，一个事务内分块写入；汇总表和 change_log 在全部写入后按 id 区间一次性更新。
+        :param records: dict 的可迭代对象，键为 domain、minutes、created_at(可省略)
+        :return: 导入的记录数
+        """
+        total = 0
+        first_id = None
+        records = iter(records)
+        with self._bulk_cache(), self.transaction(), self._triggers_suspended(*INSERT_TRIGGERS["learning_log"]):
+            while True:
+                chunk = list(islice(records, chunk_size))
+                if not chunk:
+                    break
+                self.conn.executemany(
+                    """
+                    INSERT INTO learning_log (domain, minutes, created_at, uid)
+                    VALUES (?, ?, COALESCE(?, CURRENT_TIMESTAMP), lower(hex(randomblob(16))));
+                    """,
+                    ((r["domain"], int(r["minutes"]), r.get("created_at")) for r in chunk)
+                )
+                last_id = self.conn.execute("SELECT last_insert_rowid();").fetchone()[0]
+                if first_id is None:
+                    first_id = last_id - len(chunk) + 1
+                total += len(chunk)
+            if total:
+                # 写事务内独占写入，AUTOINCREMENT 分配的 id 连续，新行正好是这个区间
+                apply_insert_triggers(self.conn.cursor(), "learning_log", first_id, first_id + total - 1)
+        return total
+
+    # =================================================================
+    #                       归档(tasks_archive) 与空间回收
+    # =================================================================
+
+    def archive_completed_tasks(self, older_than_days: int = 30, batch_size: int = 200, after=None) -> dict:
+        """
+        把完成时间早于 older_than_days 天的任务移入 tasks_archive，每次调用处理一批。
+        以整棵任务树为单位归档：只有根任务及其全部后代都已完成且都早于阈值时才移动，
+        长期目标下的子任务在目标完成前留在 tasks 中，目标进度不受影响。
+        归档产生的删除不写入 change_log 和删除墓碑，不会同步为远端删除；
+        被归档任务尚未推送的 change_log 记录一并删除，否则推送时这些记录会被跳过而游标无法前进。
+        没有完成时间的旧任务无法判断是否过期，不会被归档。
+        :param batch_size: 本批最多检查的根任务数
+        :param after: 上一批返回的 next 游标，None 表示从头开始
+        :return: {"archived": 本批移动的任务数, "next": 下一批的游标，已处理完时为 None}
+        """
+        cutoff = (datetime.now() - timedelta(days=older_than_days)).isoformat(timespec='seconds')
+        sql = """
+            SELECT id, completed_at FROM tasks INDEXED BY idx_tasks_completed_key
+            WHERE is_completed = 1 AND COALESCE(completed_at, '') < ? AND completed_at IS NOT NULL
+              AND (parent_id IS NULL OR NOT EXISTS (SELECT 1 FROM tasks p WHERE p.id = tasks.parent_id))
+        """
+        params = [cutoff]
+        if after is not None:
+            sql += " AND COALESCE(completed_at, '') >= ? AND (COALESCE(completed_at, '') > ? OR id > ?)"
+            params.extend((after[0], after[0], after[1]))
+        sql += " ORDER BY COALESCE(completed_at, ''), id LIMIT ?;"
+        params.append(batch_size)
+        archived_at = datetime.now().isoformat(timespec='seconds')
+        with self.transaction():
+            roots = self.conn.execute(sql, params).fetchall()
+            if not roots:
+                return {"archived": 0, "next": None}
+            trees = {}
+            blocked = set()
+            root_ids = [row["id"] for row in roots]
+            for row in self.conn.execute(
+                f"""
+                WITH RECURSIVE tree(root_id, id) AS (
+                    SELECT id, id FROM tasks WHERE id IN ({", ".join("?" * len(root_ids))})
+                    UNION
+                    SELECT tree.root_id, t.id FROM tasks t JOIN tree ON t.parent_id = tree.id
+                )
+                SELECT tree.root_id, tree.id, t.is_completed, t.completed_at
+                FROM tree JOIN tasks t ON t.id = tree.id;
+                """,
+                root_ids
+            ):
+                trees.setdefault(row["root_id"], []).append(row["id"])
+                if not row["is_completed"] or row["completed_at"] is None or row["completed_at"] >= cutoff:
+                    blocked.add(row["root_id"])
+            ids = [task_id for root_id, tree in trees.items() if root_id not in blocked for task_id in tree]
+            if ids:
+                with self._triggers_suspended("trg_tasks_changelog_delete"):
+                    self._move_to_archive(ids, archived_at)
+        last = roots[-1]
+        return {
+            "archived": len(ids),
+            "next": (last["completed_at"], last["id"]) if len(roots) == batch_size else None,
+        }
+
+    def _move_to_archive(self, ids: list, archived_at: str):
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            marks = ", ".join("?" * len(chunk))
+            self.conn.execute(
+                f"""
+                INSERT OR REPLACE INTO tasks_archive ({", ".join(TASK_FIELDS)}, archived_at)
+                SELECT {", ".join(TASK_FIELDS)}, ? FROM tasks WHERE id IN ({marks});
+                """,
+                [archived_at, *chunk]
+            )
+            self.conn.execute(
+                f"""
+                DELETE FROM change_log
+                WHERE entity = 'tasks' AND uid IN (SELECT uid FROM tasks WHERE id IN ({marks}));
+                """,
+                chunk
+            )
+            self.conn.execute(f"DELETE FROM tasks WHERE id IN ({marks});", chunk)
+
+    def get_archived_tasks_page(self, after=None, limit: int = 50) -> list:
+        """
+        按完成时间倒序分页获取已归档的任务，用法同 get_completed_tasks_page。
+        :param after: 上一页最后一条任务的 (completed_at, id)，None 表示第一页
+        """
+        sql = ARCHIVE_SELECT
+        params = []
+        if after is not None:
+            sql += " WHERE COALESCE(completed_at, '') <= ? AND (COALESCE(completed_at, '') < ? OR id < ?)"
+            params.extend((after[0] or "", after[0] or "", after[1]))
+        sql += " ORDER BY COALESCE(completed_at, '') DESC, id DESC LIMIT ?;"
+        params.append(limit)
+        return self._query_tasks(sql, params)
+
+    def get_archived_task(self, task_id: int) -> Task:
+        """按 id 获取已归档的任务，不存在时返回 None"""
+        rows = self._query_tasks(ARCHIVE_SELECT + " WHERE id = ?;", (task_id,))
+        return rows[0] if rows else None
+
+    def page_stats(self) -> dict:
+        """{'auto_vacuum': 'none' / 'full' / 'incremental', 'page_count', 'freelist_count', 'free_ratio'}"""
+        mode = self.conn.execute("PRAGMA auto_vacuum;").fetchone()[0]
+        pages = self.conn.execute("PRAGMA page_count;").fetchone()[0]
+        free = self.conn.execute("PRAGMA freelist_count;").fetchone()[0]
+        return {
+            "auto_vacuum": ("none", "full", "incremental")[mode],
+            "page_count": pages,
+            "freelist_count": free,
+            "free_ratio": free / pages if pages else 0.0,
+        }
+
+    def enable_incremental_vacuum(self) -> bool:
+        """
+        把早期创建的库(auto_vacuum=NONE)一次性转换为 INCREMENTAL，需要执行一次完整的 VACUUM：
+        期间整个库被锁住，耗时与文件大小成正比，因此不在后台维护中自动执行，
+        只由用户通过 src.utils.db_maintenance 显式触发。
+        已经是 INCREMENTAL 时直接返回 False。不能在事务中调用。
+        """
+        if self.conn.execute("PRAGMA auto_vacuum;").fetchone()[0] == 2:
+            return False
+        if self._tx_depth:
+            raise RuntimeError("enable_incremental_vacuum 不能在事务中执行")
+        self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL;")
+        self.conn.execute("VACUUM;")
+        return True
+
+    def incremental_vacuum(self, max_pages: int = 256) -> int:
+        """
+        归还最多 max_pages 个空闲页，文件随之缩小；每次只做一小段，不会像 VACUUM 那样长时间锁库。
+        返回实际归还的页数；库不是 INCREMENTAL 模式时返回 0。不能在事务中调用。
+        """
+        if self.conn.execute("PRAGMA auto_vacuum;").fetchone()[0] != 2:
+            return 0
+        if self._tx_depth:
+            raise RuntimeError("incremental_vacuum 不能在事务中执行")
+        before = self.conn.execute("PRAGMA freelist_count;").fetchone()[0]
+        # 该 PRAGMA 每执行一步只释放一页，execute() 只会执行一步，executescript() 才会执行到底
+        self.conn.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+        after = self.conn.execute("PRAGMA freelist_count;").fetchone()[0]
+        return before - after
+
     # =================================================================
     #                          关闭连接
     # =================================================================
 
     def close(self):
-        """关闭数据库连接"""
+        """关闭数据库连接，关闭前让 SQLite 按需更新索引统计信息"""
+        self.conn.execute("PRAGMA optimize;")
         self.conn.close()
+
+
+# 启用埋点时为每个公开方法计时(db.方法名)，并统计返回的行数
+metrics.instrument_class(Database, "db")
+
+
+def _to_date(value) -> date:
+    """把 date / datetime / 'YYYY-MM-DD' 字符串统一转换成 date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _to_epoch(value) -> int:
+    """datetime / date / 数字 -> Unix 秒；date 取本地零点"""
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    if isinstance(value, date):
+        return int(datetime(value.year, value.month, value.day).timestamp())
+    return int(value)
+
+
+def _next_month(value: date) -> date:
+    """返回 value 之后的下一个月第一天"""
+    return (value.replace(day=1) + timedelta(days=32)).replace(day=1)
@@ -0,0 +1,229 @@
+# src/core/db_worker.py
+
+"""
+db_worker.py
+------------
+后台数据访问层，让界面线程不再直接访问 SQLite：
+- 一个写线程独占写连接，按提交顺序执行命令队列中的写操作；
+  同一时间积压在队列里的多条写操作合并进同一个事务，只提交一次
+- 若干读线程各持有一个连接执行查询（WAL 模式下读写互不阻塞）
+- 每次调用立即返回 concurrent.futures.Future，结果在事务提交之后才会就绪
+- add_write_listener 注册的函数在每次写事务提交后(于写线程中)被调用，例如通知同步调度器
+用法：
+    worker = DatabaseWorker("new_tasks.db")
+    future = worker.call("add_task", "写周报")
+    task_id = future.result()
+    worker.close()
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from src.core.database import Database
+
+# 会修改数据的 Database 方法，交给写线程串行执行；其余方法都按只读查询处理
+WRITE_METHODS = frozenset({
+    "add_task", "bulk_add_tasks", "add_subtasks", "complete_task", "bulk_complete_tasks",
+    "delete_task", "delete_completed_tasks", "complete_subtree", "delete_subtree",
+    "add_learning_time", "bulk_add_learning_time", "add_focus_session", "bulk_add_focus_sessions",
+    "set_sync_state", "apply_remote_changes", "prune_change_log",
+    "archive_completed_tasks", "enable_incremental_vacuum", "incremental_vacuum",
+    "import_tasks", "import_learning_logs",
+})
+
+# 不能放进事务执行的写操作(VACUUM 类)，在写线程中单独执行，不与其他写操作合并
+STANDALONE_METHODS = frozenset({"enable_incremental_vacuum", "incremental_vacuum"})
+
+_STOP = object()  # 队列结束标记
+
+
+class DatabaseWorker:
+    def __init__(self, db_name: str = None, read_threads: int = 2, synchronous: str = "NORMAL",
+                 max_batch: int = 256, coalesce_window: float = 0.002):
+        """
+        :param read_threads: 只读连接(线程)数量
+        :param max_batch: 一个事务最多合并多少条写操作
+        :param coalesce_window: 取到第一条写操作后再等待多久(秒)收集同一批的后续写操作
+        """
+        if db_name == ":memory:":
+            # 每个连接各自拥有一个内存数据库，读线程看不到写线程的数据
+            raise ValueError("DatabaseWorker 不支持 :memory: 数据库")
+        self.synchronous = synchronous
+        self.max_batch = max_batch
+        self.coalesce_window = coalesce_window
+        self.batches = 0         # 已提交的写事务数
+        self.writes = 0          # 已执行的写操作数
+
+        self._write_listeners = []
+
+        self._write_queue = queue.Queue()
+        self._read_queue = queue.Queue()
+        self._closed = False
+
+        # 写线程负责建库和迁移，完成之前读线程不能打开连接
+        ready = Future()
+        self._writer = threading.Thread(target=self._write_loop, args=(db_name, ready),
+                                        name="db-writer", daemon=True)
+        self._writer.start()
+        self.db_name = ready.result()
+
+        self._readers = [
+            threading.Thread(target=self._read_loop, name=f"db-reader-{i}", daemon=True)
+            for i in range(max(1, read_threads))
+        ]
+        for thread in self._readers:
+            thread.start()
+
+    # ------------------- 提交命令 -------------------
+    def call(self, method: str, *args, **kwargs) -> Future:
+        """按方法名分派：写操作进入写队列，查询进入读队列"""
+        if method in WRITE_METHODS:
+            return self.write(method, *args, **kwargs)
+        return self.read(method, *args, **kwargs)
+
+    def write(self, method: str, *args, **kwargs) -> Future:
+        """
+        提交写操作，按提交顺序执行。
+        method 也可以是接收 Database 实例的函数，用于把多步写操作放进同一个事务。
+        """
+        return self._submit(self._write_queue, method, args, kwargs)
+
+    def read(self, method: str, *args, **kwargs) -> Future:
+        """提交查询；已经完成(Future 就绪)的写操作对之后提交的查询一定可见"""
+        return self._submit(self._read_queue, method, args, kwargs)
+
+    def _submit(self, target: queue.Queue, method, args, kwargs) -> Future:
+        if self._closed:
+            raise RuntimeError("DatabaseWorker 已关闭")
+        future = Future()
+        target.put((method, args, kwargs, future))
+        return future
+
+    def add_write_listener(self, listener):
+        """
+        注册写提交监听：listener(methods) 在写线程中、每次写事务提交之后调用，
+        methods 为本次提交的写操作名称列表。监听函数应当很快返回，抛出的异常会被忽略。
+        """
+        self._write_listeners.append(listener)
+
+    def _notify_write(self, methods: list):
+        for listener in self._write_listeners:
+            try:
+                listener(methods)
+            except Exception:
+                pass
+
+    @staticmethod
+    def _resolve(db: Database, method):
+        if callable(method):
+            return lambda *args, **kwargs: method(db, *args, **kwargs)
+        return getattr(db, method)
+
+    # ------------------- 写线程 -------------------
+    def _write_loop(self, db_name, ready: Future):
+        try:
+            db = Database(db_name, synchronous=self.synchronous)
+        except Exception as e:
+            ready.set_exception(e)
+            return
+        ready.set_result(db.db_name)
+
+        stopping = False
+        while not stopping:
+            command = self._write_queue.get()
+            if command is _STOP:
+                break
+            batch = [command]
+            deadline = time.monotonic() + self.coalesce_window
+            # 收集同一波到达的写操作
+            while len(batch) < self.max_batch:
+                try:
+                    command = self._write_queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if command is _STOP:
+                    stopping = True
+                    break
+                batch.append(command)
+            self._run_batch(db, batch)
+        db.close()
+
+    def _run_batch(self, db: Database, batch: list):
+        batch = [c for c in batch if c[3].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        if len(batch) > 1 and not any(c[0] in STANDALONE_METHODS for c in batch):
+            results = []
+            try:
+                with db.transaction():
+                    for method, args, kwargs, _ in batch:
+                        results.append(self._resolve(db, method)(*args, **kwargs))
+            except Exception:
+                # 有一条失败时整批回滚，再逐条单独执行，只让失败的那条报错
+                pass
+            else:
+                self.batches += 1
+                self.writes += len(batch)
+                for (_, _, _, future), result in zip(batch, results):
+                    future.set_result(result)
+                self._notify_write([self._method_name(c[0]) for c in batch])
+                return
+        for method, args, kwargs, future in batch:
+            try:
+                if method in STANDALONE_METHODS:
+                    result = self._resolve(db, method)(*args, **kwargs)
+                else:
+                    with db.transaction():
+                        result = self._resolve(db, method)(*args, **kwargs)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                self.batches += 1
+                self.writes += 1
+                future.set_result(result)
+                self._notify_write([self._method_name(method)])
+
+    @staticmethod
+    def _method_name(method) -> str:
+        return method if isinstance(method, str) else getattr(method, "__name__", "write")
+
+    # ------------------- 读线程 -------------------
+    def _read_loop(self):
+        db = None
+        while True:
+            command = self._read_queue.get()
+            if command is _STOP:
+                break
+            method, args, kwargs, future = command
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if db is None:
+                    db = Database(self.db_name, synchronous=self.synchronous)
+                future.set_result(self._resolve(db, method)(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+        if db is not None:
+            db.close()
+
+    # ------------------- 关闭 -------------------
+    def close(self, wait: bool = True):
+        """停止接收新命令；已提交的命令会执行完再关闭连接"""
+        if self._closed:
+            return
+        self._closed = True
+        self._write_queue.put(_STOP)
+        for _ in self._readers:
+            self._read_queue.put(_STOP)
+        if wait:
+            self._writer.join()
+            for thread in self._readers:
+                thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
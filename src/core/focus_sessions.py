@@ -0,0 +1,46 @@
+# src/core/focus_sessions.py
+
+"""
+focus_sessions.py
+-----------------
+番茄钟专注记录的写入缓冲：结束的专注片段先放在内存里，
+攒够一批或到了定时刷新/程序退出时再一次性交给 Database.bulk_add_focus_sessions 写入，
+避免每暂停一次就提交一个事务。
+"""
+
+import threading
+
+
+class FocusSessionBuffer:
+    def __init__(self, flush_func, max_pending: int = 20):
+        """
+        :param flush_func: 接收一批记录(list[dict])的写入函数，
+                           例如 lambda batch: db.bulk_add_focus_sessions(batch)
+        :param max_pending: 缓冲的记录数达到该值时立即写入
+        """
+        self.flush_func = flush_func
+        self.max_pending = max_pending
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def add(self, session: dict):
+        """
+        缓冲一条记录：{'started_at': ..., 'ended_at': ..., 'task_id': ..., 'domain': ...}
+        """
+        with self._lock:
+            self._pending.append(session)
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """写入所有缓冲的记录，返回本次写入的条数"""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            self.flush_func(batch)
+        return len(batch)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
@@ -0,0 +1,410 @@
+# src/core/llm_backend.py
+
+"""
+llm_backend.py
+--------------
+大模型调用的后端抽象。AIService 只依赖 LLMBackend 定义的接口：
+- chat(messages, ...)      一次性返回完整文本
+- stream(messages, ...)    逐段 yield 文本，提前结束迭代会关闭连接；传入 CancelToken 时可从其他线程单独取消
+- achat(messages, ...)     chat 的 asyncio 版本，用完后调用 aclose()
+- cancel()                 中止本后端所有进行中的请求，被中止的调用抛出 LLMCancelled
+- timeout                  每次调用可单独覆盖的超时时间(秒)
+内置两种实现：
+- OpenAICompatibleBackend：OpenAI 兼容的 HTTP 接口(DeepSeek、本地 FakeLLMServer 等)
+- MockBackend：不发网络请求，按消息内容生成确定的回复，可注入延迟，用于离线测试和基准
+通过 create_backend() 按环境变量选择后端，切换服务商不需要改代码。
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from src.utils import metrics
+
+DEFAULT_BASE_URL = "https://api.deepseek.com"
+DEFAULT_MODEL = "deepseek-chat"
+
+
+class LLMError(Exception):
+    """后端调用失败"""
+
+
+class LLMCancelled(LLMError):
+    """请求被 cancel() 中止"""
+
+
+class CancelToken:
+    """
+    单个请求的取消标记，cancel() 可在任意线程调用：置位后执行登记的回调(如关闭该请求的连接)。
+    与 LLMBackend.cancel() 不同，只影响收到这个标记的请求。
+    """
+
+    def __init__(self):
+        self.cancelled = False
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def on_cancel(self, callback):
+        """登记取消时执行的回调，已取消时立即执行；返回注销该回调的函数"""
+        with self._lock:
+            if not self.cancelled:
+                self._callbacks.append(callback)
+                return lambda: self._discard(callback)
+        callback()
+        return lambda: None
+
+    def _discard(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def check(self):
+        if self.cancelled:
+            raise LLMCancelled("请求已取消")
+
+
+def _close_quietly(response):
+    """关闭流式响应；连接已断开等错误可以忽略，调用方随后会得到 LLMCancelled"""
+    try:
+        response.close()
+    except Exception:
+        pass
+
+
+class LLMBackend(ABC):
+    """后端接口，子类必须实现 chat / stream / achat / cancel"""
+
+    model = DEFAULT_MODEL
+    timeout = 60.0
+
+    @abstractmethod
+    def chat(self, messages: list, max_tokens: int = None, json_mode: bool = False,
+             timeout: float = None) -> str:
+        """
+        :param max_tokens: 回复的最大 token 数
+        :param json_mode: 要求模型输出 JSON 对象
+        :param timeout: 覆盖本次请求的超时时间(秒)
+        """
+
+    @abstractmethod
+    def stream(self, messages: list, timeout: float = None, cancel_token: CancelToken = None):
+        """
+        生成器，逐段返回回复文本
+        :param cancel_token: 只取消这一个请求；cancel_token.cancel() 会立即关闭连接，迭代抛出 LLMCancelled
+        """
+
+    @abstractmethod
+    async def achat(self, messages: list, max_tokens: int = None, json_mode: bool = False,
+                    timeout: float = None) -> str:
+        """chat 的 asyncio 版本"""
+
+    async def aclose(self):
+        """释放当前事件循环中 achat 使用的异步资源，在同一个事件循环中调用"""
+
+    @abstractmethod
+    def cancel(self):
+        """中止本后端所有进行中的请求，被中止的调用抛出 LLMCancelled"""
+
+    def close(self):
+        """释放同步调用使用的资源"""
+
+
+class _Cancellation:
+    """
+    用代号实现的取消：每个请求开始时记下当前代号，cancel() 使代号加一，
+    代号变化的请求即视为被取消。
+    """
+
+    def __init__(self):
+        self._generation = 0
+        self._cond = threading.Condition()
+
+    def current(self) -> int:
+        with self._cond:
+            return self._generation
+
+    def cancel(self):
+        with self._cond:
+            self._generation += 1
+            self._cond.notify_all()
+
+    def check(self, generation: int):
+        if self.current() != generation:
+            raise LLMCancelled("请求已取消")
+
+    def wake(self):
+        """唤醒 sleep() 中的线程重新检查取消状态"""
+        with self._cond:
+            self._cond.notify_all()
+
+    def sleep(self, seconds: float, generation: int, token: CancelToken = None):
+        """等待 seconds 秒，期间被取消(或 token 被取消)则立即抛出 LLMCancelled"""
+        if seconds > 0:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._generation != generation or (token is not None and token.cancelled),
+                    timeout=seconds
+                )
+        self.check(generation)
+        if token is not None:
+            token.check()
+
+    async def asleep(self, seconds: float, generation: int):
+        deadline = time.monotonic() + seconds
+        while True:
+            self.check(generation)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(remaining, 0.05))
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """通过 openai SDK 访问 OpenAI 兼容接口，openai 在第一次请求时才导入"""
+
+    def __init__(self, api_key: str = "your api key", base_url: str = DEFAULT_BASE_URL,
+                 model: str = DEFAULT_MODEL, timeout: float = 60.0):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.timeout = timeout
+        self._client = None
+        # 异步客户端绑定在创建它的事件循环上，每个事件循环(各自 asyncio.run 的线程)使用自己的客户端
+        self._async_clients = {}
+        self._cancellation = _Cancellation()
+        self._streams = set()   # 进行中的流式响应，cancel() 时关闭
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=self.api_key, base_url=self.base_url, timeout=self.timeout)
+        return self._client
+
+    def _options(self, max_tokens, json_mode, timeout) -> dict:
+        options = {}
+        if max_tokens is not None:
+            options["max_tokens"] = max_tokens
+        if json_mode:
+            options["response_format"] = {"type": "json_object"}
+        if timeout is not None:
+            options["timeout"] = timeout
+        return options
+
+    def chat(self, messages, max_tokens=None, json_mode=False, timeout=None) -> str:
+        generation = self._cancellation.current()
+        response = self.client.chat.completions.create(
+            model=self.model, messages=messages, stream=False,
+            **self._options(max_tokens, json_mode, timeout)
+        )
+        self._cancellation.check(generation)
+        return (response.choices[0].message.content or "").strip()
+
+    def stream(self, messages, timeout=None, cancel_token=None):
+        generation = self._cancellation.current()
+        # 响应头返回之前无法中断，最长等待 timeout；之后 cancel_token 被取消时立即关闭连接
+        response = self.client.chat.completions.create(
+            model=self.model, messages=messages, stream=True,
+            **self._options(None, False, timeout)
+        )
+        with self._lock:
+            self._streams.add(response)
+        unregister = cancel_token.on_cancel(lambda: _close_quietly(response)) if cancel_token else None
+        try:
+            for chunk in response:
+                self._cancellation.check(generation)
+                if cancel_token is not None:
+                    cancel_token.check()
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content:
+                    yield content
+        except Exception:
+            # 被 cancel() 关闭连接时底层会抛出读取错误，统一报告为取消
+            self._cancellation.check(generation)
+            if cancel_token is not None:
+                cancel_token.check()
+            raise
+        finally:
+            if unregister is not None:
+                unregister()
+            with self._lock:
+                self._streams.discard(response)
+            response.close()
+        self._cancellation.check(generation)
+        if cancel_token is not None:
+            cancel_token.check()
+
+    async def achat(self, messages, max_tokens=None, json_mode=False, timeout=None) -> str:
+        generation = self._cancellation.current()
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                from openai import AsyncOpenAI
+                client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, timeout=self.timeout)
+                self._async_clients[loop] = client
+        response = await client.chat.completions.create(
+            model=self.model, messages=messages, stream=False,
+            **self._options(max_tokens, json_mode, timeout)
+        )
+        self._cancellation.check(generation)
+        return (response.choices[0].message.content or "").strip()
+
+    async def aclose(self):
+        # 只关闭当前事件循环的客户端，其他线程中进行的 achat 不受影响
+        with self._lock:
+            client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+    def cancel(self):
+        """中止进行中的请求：流式响应立即关闭连接，非流式请求在返回时丢弃结果"""
+        self._cancellation.cancel()
+        with self._lock:
+            streams = list(self._streams)
+        for response in streams:
+            _close_quietly(response)
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+class MockBackend(LLMBackend):
+    """
+    本地模拟后端：不访问网络，回复只由消息内容决定(相同输入总是得到相同输出)。
+    可注入首字延迟、每段延迟和按消息内容确定的抖动，用于测量端到端延迟。
+    """
+
+    def __init__(self, reply=None, model: str = "mock-model", latency: float = 0.0,
+                 token_delay: float = 0.0, jitter: float = 0.0, chunk_size: int = 4, timeout: float = 60.0):
+        """
+        :param reply: 固定回复文本，或 reply(messages, json_mode) -> str 的函数；为 None 时按内容生成
+        :param latency: 收到请求到返回第一段(或完整回复)的延迟(秒)
+        :param token_delay: 流式模式下相邻两段之间的延迟(秒)
+        :param jitter: 额外延迟的上限(秒)，具体数值由消息内容的哈希决定，结果可复现
+        """
+        self.reply = reply
+        self.model = model
+        self.latency = latency
+        self.token_delay = token_delay
+        self.jitter = jitter
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.calls = []         # 每次调用的 (方法名, messages)，供测试检查
+        self._cancellation = _Cancellation()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(messages: list) -> str:
+        raw = json.dumps(messages, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _respond(self, messages: list, json_mode: bool) -> str:
+        if callable(self.reply):
+            return self.reply(messages, json_mode)
+        if self.reply is not None:
+            return self.reply
+        digest = self._digest(messages)[:8]
+        if json_mode:
+            return json.dumps({"subtasks": [
+                {"title": f"子任务 {i + 1}", "description": f"mock-{digest}", "task_type": "daily"}
+                for i in range(3)
+            ]}, ensure_ascii=False)
+        return f"[mock-{digest}] 先完成临近截止的短期任务，再按周推进长期目标。"
+
+    def _delay(self, messages: list) -> float:
+        if not self.jitter:
+            return self.latency
+        fraction = int(self._digest(messages)[8:16], 16) / 0xFFFFFFFF
+        return self.latency + self.jitter * fraction
+
+    def _record(self, method: str, messages: list):
+        with self._lock:
+            self.calls.append((method, messages))
+
+    def _check_timeout(self, delay: float, timeout: float):
+        timeout = self.timeout if timeout is None else timeout
+        if delay > timeout:
+            raise LLMError(f"请求超时({timeout} 秒)")
+
+    def chat(self, messages, max_tokens=None, json_mode=False, timeout=None) -> str:
+        generation = self._cancellation.current()
+        self._record("chat", messages)
+        delay = self._delay(messages)
+        self._check_timeout(delay, timeout)
+        self._cancellation.sleep(delay, generation)
+        return self._respond(messages, json_mode).strip()
+
+    def stream(self, messages, timeout=None, cancel_token=None):
+        generation = self._cancellation.current()
+        self._record("stream", messages)
+        delay = self._delay(messages)
+        self._check_timeout(delay, timeout)
+        unregister = cancel_token.on_cancel(self._cancellation.wake) if cancel_token else None
+        try:
+            self._cancellation.sleep(delay, generation, cancel_token)
+            text = self._respond(messages, False)
+            for i in range(0, len(text), self.chunk_size):
+                if i:
+                    self._cancellation.sleep(self.token_delay, generation, cancel_token)
+                yield text[i:i + self.chunk_size]
+        finally:
+            if unregister is not None:
+                unregister()
+
+    async def achat(self, messages, max_tokens=None, json_mode=False, timeout=None) -> str:
+        generation = self._cancellation.current()
+        self._record("achat", messages)
+        delay = self._delay(messages)
+        self._check_timeout(delay, timeout)
+        await self._cancellation.asleep(delay, generation)
+        return self._respond(messages, json_mode).strip()
+
+    def cancel(self):
+        self._cancellation.cancel()
+
+
+metrics.instrument_class(OpenAICompatibleBackend, "llm")
+metrics.instrument_class(MockBackend, "llm")
+
+
+def create_backend(kind: str = None, **kwargs) -> LLMBackend:
+    """
+    按名称创建后端，未指定的参数从环境变量读取：
+        AINOTE_LLM_BACKEND   openai(默认) / mock
+        AINOTE_LLM_BASE_URL  OpenAI 兼容接口地址
+        AINOTE_LLM_API_KEY   API Key
+        AINOTE_LLM_MODEL     模型名
+        AINOTE_LLM_LATENCY   mock 后端的首字延迟(秒)
+    """
+    kind = (kind or os.environ.get("AINOTE_LLM_BACKEND") or "openai").lower()
+    if kind == "mock":
+        kwargs.setdefault("latency", float(os.environ.get("AINOTE_LLM_LATENCY", "0")))
+        if os.environ.get("AINOTE_LLM_MODEL"):
+            kwargs.setdefault("model", os.environ["AINOTE_LLM_MODEL"])
+        return MockBackend(**kwargs)
+    if kind == "openai":
+        for key, env in (("base_url", "AINOTE_LLM_BASE_URL"), ("api_key", "AINOTE_LLM_API_KEY"),
+                         ("model", "AINOTE_LLM_MODEL")):
+            if os.environ.get(env):
+                kwargs.setdefault(key, os.environ[env])
+        return OpenAICompatibleBackend(**kwargs)
+    raise ValueError(f"未知的 LLM 后端: {kind}")
@@ -0,0 +1,558 @@
+# src/core/migrations.py
+
+"""
+migrations.py
+-------------
+数据库结构版本管理。版本号保存在 SQLite 的 PRAGMA user_version 中，
+每个迁移步骤在独立事务内执行并同时更新版本号，因此旧的 new_tasks.db 可以原地升级，
+中途失败也不会留下半升级的结构。
+新增迁移时只需在 MIGRATIONS 末尾追加一个函数，不要修改已发布的迁移。
+"""
+
+
+def _v1_initial_schema(cursor):
+    """初始表结构（与早期版本 create_tables 相同，已有的库会直接跳过）"""
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            task_type TEXT,    -- daily / monthly
+            goal_type TEXT,    -- short-term / long-term
+            parent_id INTEGER, -- 关联长期任务；长期任务 parent_id 为空
+            is_completed INTEGER DEFAULT 0,
+            created_at TEXT,
+            completed_at TEXT
+        );
+        """
+    )
+    # ---------------- 学习记录表 ----------------
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS learning_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            domain TEXT NOT NULL,          -- 学习领域名称，如 编程, 绘画, etc
+            minutes INTEGER NOT NULL,      -- 学习时间(分钟)
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+        """
+    )
+
+
+def _v2_indexes(cursor):
+    """为常用查询添加索引，避免全表扫描"""
+    # get_tasks / get_completed_tasks 按完成状态过滤，MainWindow 再按 goal_type 分列表
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_completed_goal ON tasks (is_completed, goal_type);"
+    )
+    # 长期目标下的子任务查询：WHERE parent_id = ? AND is_completed = ?
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_parent ON tasks (parent_id, is_completed);"
+    )
+    # 覆盖索引：GROUP BY domain + SUM(minutes) 只需读索引，不回表
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_learning_domain ON learning_log (domain, created_at, minutes);"
+    )
+
+
+# v3 发布时的分桶表达式，按 UTC 日期分桶(created_at 为 UTC)；只供 _v3_learning_rollup 使用，v11 起改为本地时间
+_V3_ROLLUP_BUCKETS = {
+    "day": "date({col})",
+    "week": "date({col}, 'weekday 0', '-6 days')",
+    "month": "strftime('%Y-%m-01', {col})",
+}
+
+# 学习记录汇总表的三种粒度及其分桶表达式（{col} 替换为 created_at 列，周从周一开始）。
+# created_at 保存的是 UTC 时间(CURRENT_TIMESTAMP)，分桶按本地日期，与界面的 date.today() 和 FOCUS_GROUPS 一致
+ROLLUP_BUCKETS = {
+    "day": "date({col}, 'localtime')",
+    "week": "date({col}, 'localtime', 'weekday 0', '-6 days')",
+    "month": "strftime('%Y-%m-01', {col}, 'localtime')",
+}
+
+
+def _create_rollup_triggers(cursor, buckets: dict):
+    """创建维护 learning_rollup 的插入 / 删除 / 更新触发器"""
+    # created_at 理论上不会为空，兜底避免主键为 NULL 导致写入失败
+    new_col = "COALESCE(NEW.created_at, '1970-01-01')"
+    old_col = "COALESCE(OLD.created_at, '1970-01-01')"
+    add_new = "\n".join(
+        f"""
+        INSERT INTO learning_rollup (period, bucket, domain, total_minutes)
+        VALUES ('{period}', {expr.format(col=new_col)}, NEW.domain, NEW.minutes)
+        ON CONFLICT (period, bucket, domain) DO UPDATE SET total_minutes = total_minutes + excluded.total_minutes;
+        """
+        for period, expr in buckets.items()
+    )
+    remove_old = "\n".join(
+        f"""
+        UPDATE learning_rollup SET total_minutes = total_minutes - OLD.minutes
+        WHERE period = '{period}' AND bucket = {expr.format(col=old_col)} AND domain = OLD.domain;
+        """
+        for period, expr in buckets.items()
+    )
+    prune = "DELETE FROM learning_rollup WHERE domain = OLD.domain AND total_minutes = 0;"
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS trg_learning_rollup_insert AFTER INSERT ON learning_log BEGIN {add_new} END;"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS trg_learning_rollup_delete AFTER DELETE ON learning_log "
+        f"BEGIN {remove_old} {prune} END;"
+    )
+    cursor.execute(
+        f"CREATE TRIGGER IF NOT EXISTS trg_learning_rollup_update "
+        f"AFTER UPDATE OF domain, minutes, created_at ON learning_log "
+        f"BEGIN {remove_old} {add_new} {prune} END;"
+    )
+
+
+def _backfill_rollups(cursor, buckets: dict):
+    for period, expr in buckets.items():
+        bucket = expr.format(col="COALESCE(created_at, '1970-01-01')")
+        cursor.execute(
+            f"""
+            INSERT INTO learning_rollup (period, bucket, domain, total_minutes)
+            SELECT '{period}', {bucket}, domain, SUM(minutes)
+            FROM learning_log
+            GROUP BY 2, 3;
+            """
+        )
+
+
+def _v3_learning_rollup(cursor):
+    """按 领域 × 日/周/月 预聚合学习时长，由触发器在写入时维护，报表只需读取桶"""
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS learning_rollup (
+            period TEXT NOT NULL,          -- day / week / month
+            bucket TEXT NOT NULL,          -- 该周期的起始日期 YYYY-MM-DD
+            domain TEXT NOT NULL,
+            total_minutes INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (period, bucket, domain)
+        ) WITHOUT ROWID;
+        """
+    )
+    _create_rollup_triggers(cursor, _V3_ROLLUP_BUCKETS)
+    # 回填已有记录
+    _backfill_rollups(cursor, _V3_ROLLUP_BUCKETS)
+
+
+def _v4_task_search(cursor):
+    """
+    任务全文检索：外部内容 FTS5 表，索引 title / description，由触发器与 tasks 保持同步。
+    trigram 分词器按三字滑动窗口建索引，中文无需分词即可做子串/前缀匹配。
+    """
+    cursor.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+            title, description,
+            content = 'tasks', content_rowid = 'id',
+            tokenize = 'trigram'
+        );
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts (rowid, title, description)
+            VALUES (NEW.id, NEW.title, COALESCE(NEW.description, ''));
+        END;
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_delete AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+            VALUES ('delete', OLD.id, OLD.title, COALESCE(OLD.description, ''));
+        END;
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+            VALUES ('delete', OLD.id, OLD.title, COALESCE(OLD.description, ''));
+            INSERT INTO tasks_fts (rowid, title, description)
+            VALUES (NEW.id, NEW.title, COALESCE(NEW.description, ''));
+        END;
+        """
+    )
+    # 为已有任务建立索引
+    cursor.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild');")
+
+
+# 参与同步的表
+SYNCED_TABLES = ("tasks", "learning_log")
+
+
+def _v5_change_log(cursor):
+    """
+    增量同步所需的结构：
+    - uid：跨设备唯一的行标识（本地自增 id 在不同设备上会冲突），新行由 Database 写入时生成
+    - change_log：本地修改日志，seq 单调递增，由触发器写入，SyncEngine 只推送游标之后的修改
+    - sync_state：保存本机 replica_id 与推送/拉取游标
+    """
+    for table in SYNCED_TABLES:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN uid TEXT;")
+        cursor.execute(f"UPDATE {table} SET uid = lower(hex(randomblob(16))) WHERE uid IS NULL;")
+        cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_uid ON {table} (uid);")
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity TEXT NOT NULL,   -- 表名：tasks / learning_log
+            uid TEXT NOT NULL,      -- 被修改行的 uid
+            op TEXT NOT NULL        -- upsert / delete
+        );
+        """
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_change_log_row ON change_log (entity, uid, seq);")
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sync_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+        """
+    )
+    for table in SYNCED_TABLES:
+        # 已有数据在首次同步时全部推送
+        cursor.execute(f"INSERT INTO change_log (entity, uid, op) SELECT '{table}', uid, 'upsert' FROM {table};")
+        for event, row, op in (("INSERT", "NEW", "upsert"), ("UPDATE", "NEW", "upsert"), ("DELETE", "OLD", "delete")):
+            cursor.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_changelog_{event.lower()} AFTER {event} ON {table}
+                BEGIN
+                    INSERT INTO change_log (entity, uid, op) VALUES ('{table}', {row}.uid, '{op}');
+                END;
+                """
+            )
+
+
+def _v6_focus_sessions(cursor):
+    """
+    番茄钟专注记录。时间存为 Unix 秒(整数)，比文本时间戳更紧凑，区间比较也更快；
+    三个索引分别覆盖按时间、按任务、按领域的区间聚合，聚合时不需要回表。
+    """
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS focus_sessions (
+            id INTEGER PRIMARY KEY,
+            started_at INTEGER NOT NULL,   -- 开始时间(Unix 秒)
+            ended_at INTEGER NOT NULL,     -- 结束时间(Unix 秒)
+            task_id INTEGER,               -- 关联的任务，可为空
+            domain TEXT                    -- 学习领域，可为空
+        );
+        """
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_focus_started ON focus_sessions (started_at, ended_at);"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_focus_task ON focus_sessions (task_id, started_at, ended_at);"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_focus_domain ON focus_sessions (domain, started_at, ended_at);"
+    )
+
+
+def _v7_keyset_indexes(cursor):
+    """
+    分页查询使用的索引。rowid 隐含在索引末尾，(completed_at, id) / (created_at, id) 的
+    键集分页可以直接沿索引定位到上一页末尾，既不需要 OFFSET 跳过前面的行，也不需要临时排序。
+    已完成任务的索引是部分索引：只收录已完成的行，也不会影响按 is_completed 过滤的其他查询。
+    """
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_completed_at ON tasks (completed_at) WHERE is_completed = 1;"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks (created_at);"
+    )
+
+
+def _v8_task_archive(cursor):
+    """
+    已完成任务的冷数据表。结构与 tasks 相同(保留原 id、uid 和 parent_id)，另加归档时间；
+    不建 FTS 和同步触发器，归档只是本地的存储分层，不会作为删除同步到其他设备。
+    """
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tasks_archive (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT,
+            task_type TEXT,
+            goal_type TEXT,
+            parent_id INTEGER,
+            is_completed INTEGER DEFAULT 1,
+            created_at TEXT,
+            completed_at TEXT,
+            uid TEXT,
+            archived_at TEXT
+        );
+        """
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_archive_completed ON tasks_archive (completed_at);"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_archive_parent ON tasks_archive (parent_id);"
+    )
+
+
+# 当前时间(Unix 毫秒)，用作行版本
+NOW_MS_SQL = "CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)"
+LOCAL_REPLICA_SQL = "(SELECT value FROM sync_state WHERE key = 'replica_id')"
+
+
+def _changelog_trigger_sql(table: str, event: str, row: str, op: str) -> str:
+    """
+    同步触发器：写入 change_log，并把行版本(updated_at, origin)记入 sync_meta，删除时留下墓碑。
+    同一行的版本单调递增(至少比上一个版本大 1)，即使本机时钟落后于收到的远端版本，
+    之后的本地修改仍然会胜出。
+    """
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_changelog_{event.lower()} AFTER {event} ON {table}
+        BEGIN
+            INSERT INTO change_log (entity, uid, op) VALUES ('{table}', {row}.uid, '{op}');
+            INSERT INTO sync_meta (entity, uid, updated_at, origin, deleted, row_id)
+            VALUES ('{table}', {row}.uid, {NOW_MS_SQL}, {LOCAL_REPLICA_SQL}, {int(op == "delete")}, {row}.id)
+            ON CONFLICT (entity, uid) DO UPDATE SET
+                updated_at = MAX(excluded.updated_at, sync_meta.updated_at + 1),
+                origin = excluded.origin, deleted = excluded.deleted, row_id = excluded.row_id;
+        END;
+    """
+
+
+def _v9_sync_meta(cursor):
+    """
+    冲突合并所需的行元数据：sync_meta 记录每行最后一次修改的版本(updated_at 毫秒, origin 副本)，
+    deleted = 1 的条目即删除墓碑。远端修改只有版本更新时才会被应用(最后写入者胜出)。
+    row_id 是该行在本地的 id：被删除的任务又被远端修改恢复时沿用原 id，子任务的 parent_id 仍然有效。
+    已有的行以 (0, '') 作为初始版本，任何真实修改都比它新。
+    """
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sync_meta (
+            entity TEXT NOT NULL,
+            uid TEXT NOT NULL,
+            updated_at INTEGER NOT NULL,   -- 版本时间(Unix 毫秒)
+            origin TEXT NOT NULL,          -- 写入该版本的副本 replica_id
+            deleted INTEGER NOT NULL DEFAULT 0,
+            row_id INTEGER,                -- 本地 id
+            PRIMARY KEY (entity, uid)
+        ) WITHOUT ROWID;
+        """
+    )
+    # 已删除的父任务按本地 id 反查 uid(见 Database._changes_from_rows)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sync_meta_row ON sync_meta (entity, row_id);")
+    # 触发器需要在 SQL 中读取本机副本标识
+    cursor.execute(
+        "INSERT OR IGNORE INTO sync_state (key, value) VALUES ('replica_id', lower(hex(randomblob(16))));"
+    )
+    for table in SYNCED_TABLES:
+        cursor.execute(
+            f"INSERT OR IGNORE INTO sync_meta (entity, uid, updated_at, origin, row_id) "
+            f"SELECT '{table}', uid, 0, '', id FROM {table};"
+        )
+        for event, row, op in (("INSERT", "NEW", "upsert"), ("UPDATE", "NEW", "upsert"), ("DELETE", "OLD", "delete")):
+            cursor.execute(f"DROP TRIGGER IF EXISTS trg_{table}_changelog_{event.lower()};")
+            cursor.execute(_changelog_trigger_sql(table, event, row, op))
+
+
+# 批量导入时暂时移除的 AFTER INSERT 触发器；逐行触发的开销远高于事后一条 INSERT ... SELECT，
+# 导入后由 apply_insert_triggers 对新插入的 id 区间一次性补上同样的效果
+INSERT_TRIGGERS = {
+    "tasks": ("trg_tasks_fts_insert", "trg_tasks_changelog_insert"),
+    "learning_log": ("trg_learning_rollup_insert", "trg_learning_log_changelog_insert"),
+}
+
+
+def apply_insert_triggers(cursor, table: str, first_id: int, last_id: int):
+    """对 id 在 [first_id, last_id] 内的新行执行 INSERT_TRIGGERS[table] 的等价批量语句"""
+    params = (first_id, last_id)
+    if table == "tasks":
+        cursor.execute(
+            """
+            INSERT INTO tasks_fts (rowid, title, description)
+            SELECT id, title, description FROM tasks_fts_source WHERE id BETWEEN ? AND ?;
+            """,
+            params
+        )
+    else:
+        for period, expr in ROLLUP_BUCKETS.items():
+            bucket = expr.format(col="COALESCE(created_at, '1970-01-01')")
+            cursor.execute(
+                f"""
+                INSERT INTO learning_rollup (period, bucket, domain, total_minutes)
+                SELECT '{period}', {bucket}, domain, SUM(minutes)
+                FROM learning_log WHERE id BETWEEN ? AND ?
+                GROUP BY 2, 3
+                ON CONFLICT (period, bucket, domain) DO UPDATE SET total_minutes = total_minutes + excluded.total_minutes;
+                """,
+                params
+            )
+    cursor.execute(
+        f"""
+        INSERT INTO change_log (entity, uid, op)
+        SELECT '{table}', uid, 'upsert' FROM {table} WHERE id BETWEEN ? AND ? ORDER BY id;
+        """,
+        params
+    )
+    # 按 uid 顺序写入：uid 是随机值，按 id 顺序插入会在 (entity, uid) 主键上随机分裂页面
+    cursor.execute(
+        f"""
+        INSERT OR REPLACE INTO sync_meta (entity, uid, updated_at, origin, deleted, row_id)
+        SELECT '{table}', uid, {NOW_MS_SQL}, {LOCAL_REPLICA_SQL}, 0, id FROM {table} WHERE id BETWEEN ? AND ?
+        ORDER BY uid;
+        """,
+        params
+    )
+
+
+def _v10_prune_archived_changes(cursor):
+    """
+    v10：清理已归档任务遗留的 change_log 记录。
+    这些行已不在 tasks 中，导出修改时会被跳过；一整批都是这类记录时推送游标无法前进，之后的修改永远推送不出去。
+    行被删除时最后一条记录是 delete，不受影响。
+    """
+    cursor.execute(
+        """
+        DELETE FROM change_log
+        WHERE entity = 'tasks' AND op = 'upsert'
+          AND NOT EXISTS (SELECT 1 FROM tasks WHERE tasks.uid = change_log.uid);
+        """
+    )
+
+
+def _v11_local_rollup_buckets(cursor):
+    """
+    v11：learning_rollup 改为按本地日期分桶。
+    之前按 UTC 日期分桶，而界面按本地日期查询，东八区 08:00 之前的记录会被算到前一天(或前一周、前一月)。
+    重建触发器并按新的分桶重新汇总全部记录。
+    """
+    for event in ("insert", "delete", "update"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_learning_rollup_{event};")
+    _create_rollup_triggers(cursor, ROLLUP_BUCKETS)
+    cursor.execute("DELETE FROM learning_rollup;")
+    _backfill_rollups(cursor, ROLLUP_BUCKETS)
+
+
+def _v12_short_term_search(cursor):
+    """
+    v12：少于 3 个字符的检索词也能走索引。
+    trigram 索引中以短词开头的三字组都包含该词，按词表(tasks_fts_terms)的前缀范围即可找出含该词的任务；
+    但位于末尾的短词没有以它开头的三字组，因此 title / description 末尾各补两个空格后再建索引。
+    检索词按空白拆分、不含空格，补出的三字组不会被较长的检索词误命中。
+    外部内容改为视图 tasks_fts_source，rebuild 与触发器写入的内容保持一致。
+    """
+    for event in ("insert", "delete", "update"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_tasks_fts_{event};")
+    cursor.execute("DROP TABLE IF EXISTS tasks_fts;")
+    cursor.execute(
+        """
+        CREATE VIEW IF NOT EXISTS tasks_fts_source AS
+        SELECT id, title || '  ' AS title, COALESCE(description, '') || '  ' AS description FROM tasks;
+        """
+    )
+    cursor.execute(
+        """
+        CREATE VIRTUAL TABLE tasks_fts USING fts5(
+            title, description,
+            content = 'tasks_fts_source', content_rowid = 'id',
+            tokenize = 'trigram'
+        );
+        """
+    )
+    # 每个三字组在每个任务中的出现位置，可按 term 范围查找
+    cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts_terms USING fts5vocab(tasks_fts, instance);")
+    cursor.execute(
+        """
+        CREATE TRIGGER trg_tasks_fts_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts (rowid, title, description)
+            VALUES (NEW.id, NEW.title || '  ', COALESCE(NEW.description, '') || '  ');
+        END;
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER trg_tasks_fts_delete AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+            VALUES ('delete', OLD.id, OLD.title || '  ', COALESCE(OLD.description, '') || '  ');
+        END;
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER trg_tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+            VALUES ('delete', OLD.id, OLD.title || '  ', COALESCE(OLD.description, '') || '  ');
+            INSERT INTO tasks_fts (rowid, title, description)
+            VALUES (NEW.id, NEW.title || '  ', COALESCE(NEW.description, '') || '  ');
+        END;
+        """
+    )
+    cursor.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild');")
+
+
+def _v13_completed_key_indexes(cursor):
+    """
+    v13：已完成任务按 COALESCE(completed_at, '') 分页。
+    旧数据中有 is_completed = 1 而 completed_at 为 NULL 的任务，(completed_at, id) < (?, ?) 对它们的结果是 NULL，
+    翻页时这些任务被跳过，游标落在这样的任务上时之后的页全部为空。
+    NULL 按空字符串排序，排在所有有完成时间的任务之后；分页索引改为同一表达式上的索引。
+    """
+    cursor.execute("DROP INDEX IF EXISTS idx_tasks_completed_at;")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_completed_key ON tasks (COALESCE(completed_at, '')) "
+        "WHERE is_completed = 1;"
+    )
+    cursor.execute("DROP INDEX IF EXISTS idx_tasks_archive_completed;")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_tasks_archive_completed_key ON tasks_archive (COALESCE(completed_at, ''));"
+    )
+
+
+# 按顺序排列，第 i 个函数把数据库从版本 i 升级到 i + 1
+MIGRATIONS = [
+    _v1_initial_schema,
+    _v2_indexes,
+    _v3_learning_rollup,
+    _v4_task_search,
+    _v5_change_log,
+    _v6_focus_sessions,
+    _v7_keyset_indexes,
+    _v8_task_archive,
+    _v9_sync_meta,
+    _v10_prune_archived_changes,
+    _v11_local_rollup_buckets,
+    _v12_short_term_search,
+    _v13_completed_key_indexes,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version(conn) -> int:
+    """读取数据库当前的结构版本"""
+    return conn.execute("PRAGMA user_version;").fetchone()[0]
+
+
+def migrate(db) -> int:
+    """
+    将数据库升级到最新版本。
+    :param db: Database 实例，每个迁移步骤使用 db.transaction() 单独提交
+    :return: 升级后的版本号
+    """
+    version = get_schema_version(db.conn)
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"数据库版本({version})高于程序支持的版本({SCHEMA_VERSION})，请升级程序后再打开。"
+        )
+    for target in range(version + 1, SCHEMA_VERSION + 1):
+        with db.transaction():
+            cursor = db.conn.cursor()
+            MIGRATIONS[target - 1](cursor)
+            cursor.execute(f"PRAGMA user_version = {target};")
+    return SCHEMA_VERSION
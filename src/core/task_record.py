@@ -0,0 +1,64 @@
+# src/core/task_record.py
+
+"""
+task_record.py
+--------------
+任务记录类型。Database 返回的任务不再是每行新建的 dict，而是基于元组的只读记录：
+- 没有 __dict__，每条记录只占一个元组的内存
+- 由 SQLite 的原始行元组直接构造，不经过 sqlite3.Row 和 dict 转换
+- 兼容原来的 dict 用法：task["title"]、task.get("parent_id")、dict(task)、{**task}
+记录是不可变的，可以在多个调用方之间共享(见 Database 的未完成任务缓存)。
+"""
+
+from collections import namedtuple
+
+# 与 tasks 表的列一一对应，查询时按此顺序选择列
+TASK_FIELDS = (
+    "id", "title", "description", "task_type", "goal_type", "parent_id",
+    "is_completed", "created_at", "completed_at", "uid",
+)
+
+_INDEX = {name: i for i, name in enumerate(TASK_FIELDS)}
+_tuple_new = tuple.__new__
+_tuple_getitem = tuple.__getitem__
+
+
+class Task(namedtuple("_TaskFields", TASK_FIELDS)):
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return _tuple_getitem(self, _INDEX[key])
+        return _tuple_getitem(self, key)
+
+    def get(self, key, default=None):
+        index = _INDEX.get(key)
+        return default if index is None else _tuple_getitem(self, index)
+
+    def __contains__(self, key):
+        return key in _INDEX
+
+    def keys(self):
+        return TASK_FIELDS
+
+    def values(self):
+        return tuple(self)
+
+    def items(self):
+        return zip(TASK_FIELDS, self)
+
+    def to_dict(self) -> dict:
+        return dict(zip(TASK_FIELDS, self))
+
+
+# task_type / goal_type 只有少数几种取值，sqlite3 却会为每一行新建字符串，这里复用同一个对象
+_interned = {}
+
+
+def _intern(value):
+    return _interned.setdefault(value, value) if len(_interned) < 256 else value
+
+
+def task_row_factory(cursor, row) -> Task:
+    """sqlite3 的 row_factory：把按 TASK_FIELDS 顺序选出的行直接包装成 Task"""
+    return _tuple_new(Task, (row[0], row[1], row[2], _intern(row[3]), _intern(row[4])) + row[5:])
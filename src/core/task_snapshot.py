@@ -0,0 +1,47 @@
+# src/core/task_snapshot.py
+
+"""
+task_snapshot.py
+----------------
+未完成任务列表的本地快照，用于启动时的首帧：主窗口关闭时把列表中的任务写入数据库旁的 JSON 文件，
+下次启动时在任务查询返回之前先用快照填充列表，首帧即可显示上次的任务，查询结果返回后整体替换。
+首帧只会显示每个列表开头的几屏，因此每个列表只保存前 SNAPSHOT_ROWS 行：
+任务很多时快照仍然很小，读取和带数据显示窗口都不会拖慢首帧。
+快照只是显示用的缓存，读取失败或字段与当前版本不一致时当作没有快照。
+"""
+
+import json
+import os
+
+from src.core.task_record import Task, TASK_FIELDS
+
+SNAPSHOT_NAME = "task_snapshot.json"
+# 每个列表最多保存的行数
+SNAPSHOT_ROWS = 200
+
+
+def snapshot_path(db_name: str) -> str:
+    """任务数据库所在目录下的快照文件"""
+    return os.path.join(os.path.dirname(os.path.abspath(db_name)), SNAPSHOT_NAME)
+
+
+def save_snapshot(path: str, tasks) -> int:
+    """写入快照(先写临时文件再替换，中途退出不会留下半个文件)，返回写入的任务数"""
+    rows = [[task.get(field) for field in TASK_FIELDS] for task in tasks]
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"fields": TASK_FIELDS, "tasks": rows}, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+    return len(rows)
+
+
+def load_snapshot(path: str) -> list:
+    """返回快照中的 Task 列表；没有快照或无法使用时返回 None"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if tuple(data["fields"]) != TASK_FIELDS:
+            return None
+        return [Task._make(row) for row in data["tasks"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
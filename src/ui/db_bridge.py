@@ -0,0 +1,82 @@
+# src/ui/db_bridge.py
+
+"""
+db_bridge.py
+------------
+把 DatabaseWorker 返回的 Future 转成 Qt 信号：
+工作线程完成后发出信号，回调通过排队连接回到界面线程执行，
+界面代码可以直接在回调里更新控件。
+启用埋点时记录每次调用从提交到回调执行完毕的总耗时(bridge.方法名)，
+与 db.方法名 对比可以看出时间花在排队、SQLite 还是界面回调上。
+"""
+
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from src.core.db_worker import DatabaseWorker
+from src.utils import metrics
+
+
+class DbBridge(QObject):
+    # (future, callback, errback)，由工作线程发出，在界面线程处理
+    _finished = pyqtSignal(object, object, object)
+    # 未指定 errback 的调用出错时发出 (方法名, 异常)
+    errorOccurred = pyqtSignal(str, object)
+
+    def __init__(self, worker: DatabaseWorker, parent=None):
+        super().__init__(parent)
+        self.worker = worker
+        self._finished.connect(self._dispatch)
+
+    def call(self, method, *args, callback=None, errback=None, **kwargs):
+        """
+        异步调用 Database 方法，立即返回 Future。
+        callback(result) / errback(exception) 在界面线程中执行。
+        """
+        future = self.worker.call(method, *args, **kwargs)
+        self._watch(method, future, callback, errback)
+        return future
+
+    def read(self, method, *args, callback=None, errback=None, **kwargs):
+        """强制走读线程，method 可以是接收 Database 实例的函数，用于一次完成多条查询"""
+        future = self.worker.read(method, *args, **kwargs)
+        self._watch(method, future, callback, errback)
+        return future
+
+    def write(self, method, *args, callback=None, errback=None, **kwargs):
+        """强制走写线程，method 可以是接收 Database 实例的函数"""
+        future = self.worker.write(method, *args, **kwargs)
+        self._watch(method, future, callback, errback)
+        return future
+
+    def _watch(self, method, future, callback, errback):
+        if errback is None:
+            name = method if isinstance(method, str) else getattr(method, "__name__", "write")
+            errback = lambda e: self.errorOccurred.emit(name, e)
+        if metrics.is_enabled():
+            callback = self._timed(method, callback)
+        future.add_done_callback(lambda f: self._finished.emit(f, callback, errback))
+
+    @staticmethod
+    def _timed(method, callback):
+        name = "bridge." + (method if isinstance(method, str) else getattr(method, "__name__", "write"))
+        start = time.perf_counter_ns()
+
+        def timed(result):
+            if callback is not None:
+                callback(result)
+            metrics.record(name, start, time.perf_counter_ns())
+        return timed
+
+    def _dispatch(self, future, callback, errback):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            errback(error)
+        elif callback is not None:
+            callback(future.result())
+
+    def close(self):
+        self.worker.close()
@@ -0,0 +1,153 @@
+# src/ui/history_view.py
+
+"""
+history_view.py
+---------------
+已完成任务的历史窗口。PagedTaskModel 实现 Qt 的 canFetchMore / fetchMore：
+视图滚动到底部时才通过键集分页从数据库取下一页，窗口只持有已经浏览过的行，
+取代原来把全部已完成任务拼成一个 QMessageBox 字符串的做法。
+同一个窗口也用于浏览已移入 tasks_archive 的归档任务。
+"""
+
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QListView, QPushButton
+
+from src.ui.task_list_model import TaskRole
+
+
+class PagedTaskModel(QAbstractListModel):
+    def __init__(self, fetch_page, cursor_of, page_size: int = 50, parent=None):
+        """
+        :param fetch_page: fetch_page(after, limit, callback, errback)，异步取一页任务
+        :param cursor_of: 由一页的最后一条任务计算下一页的游标，如 (completed_at, id)
+        """
+        super().__init__(parent)
+        self._fetch_page = fetch_page
+        self._cursor_of = cursor_of
+        self.page_size = page_size
+        self._tasks = []
+        self._loading = False
+        self._exhausted = False
+        self._generation = 0  # reload 之后丢弃之前发出的请求的结果
+
+    # ------------------- QAbstractListModel 接口 -------------------
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._tasks)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._tasks):
+            return None
+        task = self._tasks[index.row()]
+        if role == Qt.DisplayRole:
+            return f"{task['title']}    完成时间: {task['completed_at']}"
+        if role == Qt.ToolTipRole:
+            return task.get("description") or None
+        if role == TaskRole:
+            return task
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._loading and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self._loading = True
+        after = self._cursor_of(self._tasks[-1]) if self._tasks else None
+        generation = self._generation
+        self._fetch_page(
+            after, self.page_size,
+            lambda tasks: self._append_page(generation, tasks),
+            lambda error: self._fetch_failed(generation, error),
+        )
+
+    # ------------------- 分页加载 -------------------
+    def reload(self):
+        """清空已加载的行，从第一页重新开始"""
+        self._generation += 1
+        self.beginResetModel()
+        self._tasks = []
+        self._loading = False
+        self._exhausted = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def is_exhausted(self) -> bool:
+        return self._exhausted
+
+    def _append_page(self, generation: int, tasks: list):
+        if generation != self._generation:
+            return
+        self._loading = False
+        if len(tasks) < self.page_size:
+            self._exhausted = True
+        if tasks:
+            row = len(self._tasks)
+            self.beginInsertRows(QModelIndex(), row, row + len(tasks) - 1)
+            self._tasks.extend(tasks)
+            self.endInsertRows()
+        elif self._exhausted:
+            # 没有新行时视图不会重新布局，这里通知状态变化
+            self.layoutChanged.emit()
+
+    def _fetch_failed(self, generation: int, error):
+        if generation == self._generation:
+            # 保持可重试：下次滚动到底部时会再次请求
+            self._loading = False
+
+
+class CompletedTasksView(QDialog):
+    """非模态的已完成任务历史窗口，按完成时间倒序，滚动时按页加载"""
+
+    def __init__(self, db, parent=None, page_size: int = 50, archived: bool = False):
+        """
+        :param db: DbBridge，分页查询在数据库读线程中执行
+        :param archived: True 时浏览归档任务(tasks_archive)
+        """
+        super().__init__(parent)
+        self.noun = "归档任务" if archived else "已完成任务"
+        self._page_method = "get_archived_tasks_page" if archived else "get_completed_tasks_page"
+        self.setWindowTitle(self.noun)
+        self.setModal(False)
+        self.resize(480, 420)
+        self.db = db
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        self.model = PagedTaskModel(self._fetch_page, lambda t: (t["completed_at"], t["id"]),
+                                    page_size=page_size, parent=self)
+        self.model.rowsInserted.connect(self._update_status)
+        self.model.modelReset.connect(self._update_status)
+        self.model.layoutChanged.connect(self._update_status)
+        self.list_view = QListView()
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setModel(self.model)
+        layout.addWidget(self.list_view)
+
+        btn_layout = QHBoxLayout()
+        btn_layout.addStretch()
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.close)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+
+    def _fetch_page(self, after, limit, callback, errback):
+        def failed(error):
+            errback(error)
+            self.status_label.setText(f"加载失败: {error}")
+        self.db.call(self._page_method, after, limit, callback=callback, errback=failed)
+
+    def reload(self):
+        """每次打开窗口时重新从第一页加载，反映期间新完成或删除的任务"""
+        self.model.reload()
+
+    def _update_status(self, *args):
+        count = self.model.rowCount()
+        if self.model.is_exhausted():
+            self.status_label.setText(f"共 {count} 个{self.noun}" if count else f"目前没有{self.noun}。")
+        else:
+            self.status_label.setText(f"已加载 {count} 个{self.noun}，向下滚动加载更多")
@@ -1,7 +1,11 @@
 # src/ui/main_window.py
 
+import time
+_PROCESS_START = time.perf_counter()  # 启动计时起点，放在所有重量级 import 之前
+
 import sys
 import os
+from datetime import date, timedelta
 
 try:
     import win32gui
@@ -10,39 +14,47 @@ try:
 except ImportError:
     HAS_WIN32 = False
 
-from PyQt5.QtCore import Qt, pyqtSlot, QThread, pyqtSignal, QTimer
+from PyQt5.QtCore import Qt, pyqtSlot, pyqtSignal, QTimer
+from PyQt5.QtGui import QKeySequence
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QLineEdit, QPushButton, QComboBox, QListWidget, QListWidgetItem,
-    QMessageBox, QGroupBox, QSpinBox, QFormLayout, QInputDialog
+    QListView, QMessageBox, QGroupBox, QSpinBox, QFormLayout, QInputDialog, QProgressDialog, QShortcut
 )
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-from src.core.database import Database
-from src.core.ai_service import AIService
-from src.ui.task_item import TaskItem
+from src.core.db_worker import DatabaseWorker
+from src.core.focus_sessions import FocusSessionBuffer
+from src.core.task_snapshot import SNAPSHOT_ROWS, load_snapshot, save_snapshot, snapshot_path
+from src.ui.db_bridge import DbBridge
+from src.ui.task_item import TaskItemDelegate
+from src.ui.task_list_model import TaskListModel
 from src.ui.pomodoro_widget import PomodoroWidget
+from src.ui.plan_view import PlanView, GoalDecompositionThread
+from src.utils import metrics
+from src.utils.startup_profiler import StartupProfiler
 
-# 定义后台线程用于调用 AI 规划
-class PlanGenerationThread(QThread):
-    result_ready = pyqtSignal(str)
-    def __init__(self, ai_service, tasks):
-        super().__init__()
-        self.ai_service = ai_service
-        self.tasks = tasks
-    def run(self):
-        try:
-            plan_text = self.ai_service.generate_plan(self.tasks)
-            self.result_ready.emit(plan_text)
-        except Exception as e:
-            self.result_ready.emit(f"发生错误: {e}")
+# 完成超过这么多天的任务树移入归档表
+ARCHIVE_AFTER_DAYS = 30
+# 后台维护(归档 + 增量回收空闲页)的间隔
+MAINTENANCE_INTERVAL_MS = 30 * 60 * 1000
+# 同步状态栏刷新间隔(更新“未同步 N 秒”的显示)
+SYNC_STATUS_INTERVAL_MS = 5 * 1000
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    # 分阶段启动：首帧显示上次关闭时保存的任务快照，查询返回后替换为最新数据；
+    # 学习记录等次要区域在首帧绘制之后再构建，AI 服务(openai 客户端)在第一次使用时才导入和创建
+    startupFinished = pyqtSignal()
+    # (status, stats)，由同步调度线程发出，在界面线程更新同步状态
+    syncStatusChanged = pyqtSignal(object, object)
+
+    def __init__(self, profiler: StartupProfiler = None):
         super().__init__()
+        self.profiler = profiler or StartupProfiler()
+        self.profiler.mark("imports")
 
         # 设置窗口外观：透明、无边框、置底
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnBottomHint)
@@ -54,9 +66,30 @@ class MainWindow(QMainWindow):
         self.dragging = False
         self.drag_position = None
 
-        # 初始化数据库和 AI 服务（使用真实的 DeepSeek API Key）
-        self.db = Database()
-        self.ai_service = AIService(api_key="your api key", model="deepseek-chat")
+        # 数据库访问全部交给后台线程，界面线程只接收结果；AI 服务见 ai_service 属性，首次使用时才创建
+        self.db = DbBridge(DatabaseWorker(), self)
+        self.db.errorOccurred.connect(self.on_db_error)
+        # 番茄钟专注记录先缓冲，攒够一批、每分钟或退出时批量写入
+        self.focus_buffer = FocusSessionBuffer(self._save_focus_sessions)
+        self.focus_flush_timer = QTimer(self)
+        self.focus_flush_timer.setInterval(60 * 1000)
+        self.focus_flush_timer.timeout.connect(self.focus_buffer.flush)
+        self.focus_flush_timer.start()
+        self._ai_service = None
+        self._decompose_threads = set()
+        self._history_views = {}
+        # 后台维护：分批归档旧的已完成任务并回收空闲页，首次在启动完成后执行
+        self.maintenance_timer = QTimer(self)
+        self.maintenance_timer.setInterval(MAINTENANCE_INTERVAL_MS)
+        self.maintenance_timer.timeout.connect(self.run_maintenance)
+        self._maintenance_running = False
+        # 后台同步：设置了 AINOTE_SYNC_URL 时在启动完成后创建，见 start_sync
+        self.sync_scheduler = None
+        self.syncStatusChanged.connect(self.on_sync_status)
+        # 隐藏的性能指标面板，Ctrl+Shift+M 打开
+        self._metrics_panel = None
+        QShortcut(QKeySequence("Ctrl+Shift+M"), self, activated=self.show_metrics_panel)
+        self.profiler.mark("database")
 
         # 主体布局
         central_widget = QWidget()
@@ -64,26 +97,147 @@ class MainWindow(QMainWindow):
         self.main_layout = QVBoxLayout()
         central_widget.setLayout(self.main_layout)
 
-        # 初始化各个 UI 区域
+        # 初始化首屏需要的 UI 区域
         self.init_task_input_area()   # 任务输入区
+        self.init_search_area()       # 任务搜索框
         self.init_task_lists_area()   # 短期 & 长期任务列表
         self.init_footer_area()       # 底部区域：已完成任务、AI规划等
-        self.init_learning_area()     # 学习记录区域
+        self.profiler.mark("widgets")
 
-        # 刷新任务列表
-        self.refresh_task_lists()
+        # 首帧先显示上次的任务快照，再异步加载最新列表，结果返回后整体替换
+        self._snapshot_path = snapshot_path(self.db.worker.db_name)
+        cached = load_snapshot(self._snapshot_path)
+        if cached is not None:
+            self._set_task_models(cached)
+            self.profiler.mark("cached_tasks")
+        self.refresh_task_lists(on_loaded=self._on_initial_tasks_loaded)
 
         # 如果需要置于桌面背景层，可取消下面注释
         # if HAS_WIN32:
         #     from src.utils.ui_helpers import set_window_under_desktop
         #     set_window_under_desktop(self.winId())
 
-        # 在软件启动后进行 API 测试，延迟 0 毫秒（在事件循环中执行）
-        QTimer.singleShot(0, self.run_api_test)
+        self._startup_finished = False
+
+    @property
+    def ai_service(self):
+        """首次访问时才导入 openai 并创建客户端，避免拖慢启动"""
+        if self._ai_service is None:
+            from src.core.ai_service import AIService, ResponseCache
+            from src.core.llm_backend import create_backend
+            # 后端由环境变量选择(AINOTE_LLM_BACKEND 等，见 create_backend)，默认 DeepSeek
+            self._ai_service = AIService(backend=create_backend(),
+                                         cache=ResponseCache.beside(self.db.worker.db_name))
+        return self._ai_service
+
+    def on_db_error(self, method: str, error):
+        QMessageBox.critical(self, "错误", f"数据库操作失败({method}): {error}")
+
+    def closeEvent(self, event):
+        # 写入未保存的专注记录，等待已提交的写操作执行完再关闭连接
+        self.pomodoro_widget.finish_session()
+        self.focus_buffer.flush()
+        if self._ai_service is not None:
+            self._ai_service.cancel()
+        self.db.close()
+        self._save_snapshot()
+        # 写操作都已提交，最后推送一次尚未同步的本地修改
+        if self.sync_scheduler is not None:
+            self.sync_scheduler.stop()
+        metrics.dump_if_enabled()
+        super().closeEvent(event)
+
+    def show_metrics_panel(self):
+        if self._metrics_panel is None:
+            from src.ui.metrics_panel import MetricsPanel
+            self._metrics_panel = MetricsPanel(self)
+        self._metrics_panel.show()
+        self._metrics_panel.raise_()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._startup_finished and self.profiler.get("first_paint") is None:
+            self.profiler.mark("first_paint")
+            # 首帧已经绘制，回到事件循环后再构建次要区域
+            QTimer.singleShot(0, self.finish_startup)
+
+    def _on_initial_tasks_loaded(self):
+        self.profiler.mark("tasks_loaded")
+        self._check_startup_complete()
+
+    def _check_startup_complete(self):
+        """任务较多时首屏列表可能在延迟初始化之后才填充完，两者都完成才算启动结束"""
+        if self.profiler.get("deferred_ready") is None or self.profiler.get("tasks_loaded") is None:
+            return
+        self.profiler.dump_if_enabled()
+        self.startupFinished.emit()
+
+    def finish_startup(self):
+        """首帧之后的延迟初始化"""
+        if self._startup_finished:
+            return
+        self._startup_finished = True
+        self.init_learning_area()     # 学习记录区域
+        self.profiler.mark("deferred_ready")
+        self._check_startup_complete()
+        self.maintenance_timer.start()
+        QTimer.singleShot(0, self.run_maintenance)
+        self.start_sync()
+
+    # ------------------- 后台同步 -------------------
+    def start_sync(self):
+        """
+        设置了 AINOTE_SYNC_URL(以及可选的 AINOTE_SYNC_API_KEY)时启动后台同步：
+        同步在调度线程中进行，本地写入合并后再推送，界面线程只接收状态。
+        """
+        url = os.environ.get("AINOTE_SYNC_URL")
+        if not url or self.sync_scheduler is not None:
+            return
+        from src.utils.sync_engine import SyncEngine
+        from src.utils.sync_scheduler import SyncScheduler
+        engine = SyncEngine(remote_url=url, api_key=os.environ.get("AINOTE_SYNC_API_KEY"))
+        self.sync_scheduler = SyncScheduler(engine, self.db.worker.db_name,
+                                            on_status=self.syncStatusChanged.emit)
+        self.db.worker.add_write_listener(self.sync_scheduler.notify_change)
+        self.sync_label.show()
+        self.sync_status_timer = QTimer(self)
+        self.sync_status_timer.setInterval(SYNC_STATUS_INTERVAL_MS)
+        self.sync_status_timer.timeout.connect(lambda: self.on_sync_status(self.sync_scheduler.status()))
+        self.sync_status_timer.start()
+        self.sync_scheduler.start()
+
+    def on_sync_status(self, status: dict, stats: dict = None):
+        self.sync_label.setText(_sync_status_text(status))
+        self.sync_label.setToolTip(status["last_error"] or "")
+        if stats and stats.get("pulled"):
+            # 拉取到了其他设备的修改
+            self.apply_search()
+            self._on_learning_changed()
+
+    def run_maintenance(self):
+        """
+        每批归档是一次单独的写操作，批次之间其他写操作可以插队，界面始终不需要等待；
+        归档完成后再分段归还空闲页。早期创建的库(auto_vacuum=NONE)不归还，
+        转换需要完整的 VACUUM，只能通过 src.utils.db_maintenance 手动执行。
+        """
+        if self._maintenance_running:
+            return
+        self._maintenance_running = True
+
+        def finished(_=None):
+            self._maintenance_running = False
+
+        def vacuum():
+            self.db.call("incremental_vacuum", callback=finished, errback=finished)
 
-    def run_api_test(self):
-        test_result = self.ai_service.test_api()
-        QMessageBox.information(None, "API 测试", f"测试结果：{test_result}")
+        def archive_next(result=None):
+            after = result["next"] if result else None
+            if result and after is None:
+                vacuum()
+                return
+            self.db.call("archive_completed_tasks", ARCHIVE_AFTER_DAYS, after=after,
+                         callback=archive_next, errback=finished)
+        archive_next()
 
     # ------------------- 拖动窗口相关 -------------------
     def mousePressEvent(self, event):
@@ -122,35 +276,132 @@ class MainWindow(QMainWindow):
         input_layout.addWidget(add_button)
         self.main_layout.addLayout(input_layout)
 
+    # ------------------- 任务搜索 -------------------
+    def init_search_area(self):
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("搜索任务标题或描述...")
+        self.search_input.setClearButtonEnabled(True)
+        # 输入停顿 150ms 后再查询，避免每敲一个字都访问数据库
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.apply_search)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        self.main_layout.addWidget(self.search_input)
+
+    def apply_search(self):
+        query = self.search_input.text().strip()
+        if not query:
+            self.refresh_task_lists()
+            return
+        self.db.call("search_tasks", query, limit=200, callback=self._show_search_results(query))
+
+    def _show_search_results(self, query: str):
+        start = time.perf_counter_ns()
+
+        def show(tasks):
+            # 输入框已经变化时丢弃过期的结果
+            if self.search_input.text().strip() == query:
+                self._show_tasks(tasks)
+                metrics.record("ui.search", start, time.perf_counter_ns(), rows=len(tasks))
+        return show
+
     # ------------------- 任务列表区域 -------------------
     def init_task_lists_area(self):
         self.short_term_label = QLabel("短期目标")
-        self.short_term_list = QListWidget()
+        self.short_term_model = TaskListModel(self)
+        self.short_term_list = self._create_task_view(self.short_term_model)
         self.long_term_label = QLabel("长期目标")
-        self.long_term_list = QListWidget()
+        self.long_term_model = TaskListModel(self)
+        self.long_term_list = self._create_task_view(self.long_term_model)
         self.main_layout.addWidget(self.short_term_label)
         self.main_layout.addWidget(self.short_term_list)
         self.main_layout.addWidget(self.long_term_label)
         self.main_layout.addWidget(self.long_term_list)
 
-    def refresh_task_lists(self):
-        self.short_term_list.clear()
-        self.long_term_list.clear()
-        tasks = self.db.get_tasks(include_completed=False)
+    def _create_task_view(self, model):
+        view = QListView()
+        view.setModel(model)
+        view.setUniformItemSizes(True)  # 固定行高，滚动时只测量和绘制可见行
+        delegate = TaskItemDelegate(view)
+        delegate.taskCompleted.connect(self.on_task_completed)
+        delegate.taskDeleted.connect(self.on_task_deleted)
+        delegate.generateSubTask.connect(self.on_generate_subtask)
+        delegate.viewCompletedSubTasks.connect(self.on_view_completed_subtasks)
+        delegate.completeTaskTree.connect(self.on_complete_task_tree)
+        delegate.deleteTaskTree.connect(self.on_delete_task_tree)
+        delegate.decomposeGoal.connect(self.on_decompose_goal)
+        view.setItemDelegate(delegate)
+        return view
+
+    def _model_for(self, task: dict):
+        if task.get("goal_type") == "long-term":
+            return self.long_term_model
+        return self.short_term_model
+
+    def refresh_task_lists(self, on_loaded=None):
+        """整体重新加载两个列表；单个任务的增删走 _insert_task / _remove_task 行级更新"""
+        start = time.perf_counter_ns()
+
+        def show(tasks):
+            self._show_tasks(tasks)
+            # 从发起查询到列表重建完成
+            metrics.record("ui.refresh_task_lists", start, time.perf_counter_ns(), rows=len(tasks))
+            if on_loaded:
+                on_loaded()
+        self.db.call("get_tasks", include_completed=False, callback=show)
+
+    def _show_tasks(self, tasks: list):
+        with metrics.span("ui.show_tasks"):
+            long_tasks = self._set_task_models(tasks)
+        # 所有长期目标的进度用一条递归查询算出，而不是每个目标查一次
+        self.db.call("get_goal_progress", [t["id"] for t in long_tasks],
+                     callback=self.long_term_model.set_progress)
+
+    def _set_task_models(self, tasks: list) -> list:
+        """按目标类型填充两个列表，返回其中的长期目标"""
+        short_tasks, long_tasks = [], []
         for task in tasks:
-            item_widget = TaskItem(task)
-            list_item = QListWidgetItem()
-            list_item.setSizeHint(item_widget.sizeHint())
-            item_widget.taskCompleted.connect(self.on_task_completed)
-            item_widget.taskDeleted.connect(self.on_task_deleted)
             if task.get("goal_type") == "long-term":
-                item_widget.generateSubTask.connect(self.on_generate_subtask)
-                item_widget.viewCompletedSubTasks.connect(self.on_view_completed_subtasks)
-                self.long_term_list.addItem(list_item)
-                self.long_term_list.setItemWidget(list_item, item_widget)
+                long_tasks.append(task)
             else:
-                self.short_term_list.addItem(list_item)
-                self.short_term_list.setItemWidget(list_item, item_widget)
+                short_tasks.append(task)
+        self.short_term_model.set_tasks(short_tasks)
+        self.long_term_model.set_tasks(long_tasks)
+        self._update_pomodoro_tasks()
+        return long_tasks
+
+    def _save_snapshot(self):
+        """保存两个列表开头的任务，供下次启动的首帧使用；只是缓存，失败时忽略"""
+        tasks = [model.task_at(row) for model in (self.short_term_model, self.long_term_model)
+                 for row in range(min(model.rowCount(), SNAPSHOT_ROWS))]
+        try:
+            save_snapshot(self._snapshot_path, tasks)
+        except OSError:
+            pass
+
+    def _insert_task(self, task_id: int):
+        def insert(task):
+            if task and not task.get("is_completed"):
+                self._model_for(task).add_task(task)
+                self._update_pomodoro_tasks()
+                self.db.call("get_ancestor_ids", task_id, callback=self._refresh_progress)
+        self.db.call("get_task", task_id, callback=insert)
+
+    def _remove_task(self, task_id: int):
+        if self.short_term_model.remove_task(task_id) or self.long_term_model.remove_task(task_id):
+            self._update_pomodoro_tasks()
+
+    def _update_pomodoro_tasks(self):
+        """番茄钟可关联的任务与列表中显示的未完成任务保持一致"""
+        tasks = [model.task_at(row) for model in (self.short_term_model, self.long_term_model)
+                 for row in range(model.rowCount())]
+        self.pomodoro_widget.set_tasks(tasks)
+
+    def _refresh_progress(self, goal_ids: list):
+        """只重新计算受影响的长期目标(被修改任务的祖先)的进度"""
+        if goal_ids:
+            self.db.call("get_goal_progress", goal_ids, callback=self.long_term_model.update_progress)
 
     def add_task(self):
         try:
@@ -161,25 +412,49 @@ class MainWindow(QMainWindow):
             if not title:
                 QMessageBox.warning(self, "警告", "任务标题不能为空！")
                 return
-            self.db.add_task(
+            self.db.call(
+                "add_task",
                 title=title,
                 description=description,
                 task_type=task_type,
-                goal_type=goal_type
+                goal_type=goal_type,
+                callback=self._insert_task,
+                errback=lambda e: QMessageBox.critical(self, "错误", f"添加任务失败: {e}")
             )
             self.title_input.clear()
             self.desc_input.clear()
-            self.refresh_task_lists()
         except Exception as e:
             QMessageBox.critical(self, "错误", f"添加任务失败: {e}")
 
+    def _modify_task(self, task_id: int, method: str):
+        """
+        先从列表中移除，再在写线程中查询祖先并修改，最后刷新祖先目标的进度。
+        写入失败时事务已回滚，任务仍在库中，把移除的行放回原位置。
+        """
+        removed = [(model, model.row_of(task_id)) for model in (self.short_term_model, self.long_term_model)]
+        removed = [(model, row, model.task_at(row)) for model, row in removed if row >= 0]
+        self._remove_task(task_id)
+
+        def modify(db):
+            ancestors = db.get_ancestor_ids(task_id)
+            getattr(db, method)(task_id)
+            return ancestors
+        modify.__name__ = method
+
+        def failed(error):
+            for model, row, task in removed:
+                if model.row_of(task_id) < 0:
+                    model.insert_task(row, task)
+            if removed:
+                self._update_pomodoro_tasks()
+            self.on_db_error(method, error)
+        self.db.write(modify, callback=self._refresh_progress, errback=failed)
+
     def on_task_completed(self, task_id: int):
-        self.db.complete_task(task_id)
-        self.refresh_task_lists()
+        self._modify_task(task_id, "complete_task")
 
     def on_task_deleted(self, task_id: int):
-        self.db.delete_task(task_id)
-        self.refresh_task_lists()
+        self._modify_task(task_id, "delete_task")
 
     # ------------------- 长期任务右键操作 -------------------
     def on_generate_subtask(self, long_term_task: dict):
@@ -187,26 +462,21 @@ class MainWindow(QMainWindow):
         title, ok = QInputDialog.getText(None, "生成短期任务", "请输入短期任务标题：", text=default_title)
         if ok and title.strip():
             description = long_term_task.get("description", "")
-            self.db.add_task(
+            self.db.call(
+                "add_task",
                 title=title.strip(),
                 description=description,
                 task_type=long_term_task.get("task_type", "daily"),
                 goal_type="short-term",
-                parent_id=long_term_task["id"]
+                parent_id=long_term_task["id"],
+                callback=self._insert_task
             )
-            self.refresh_task_lists()
 
     def on_view_completed_subtasks(self, long_term_task: dict):
-        cursor = self.db.conn.cursor()
-        cursor.execute(
-            """
-            SELECT * FROM tasks
-            WHERE parent_id = ? AND is_completed = 1;
-            """,
-            (long_term_task["id"],)
-        )
-        rows = cursor.fetchall()
-        tasks = [dict(row) for row in rows]
+        self.db.call("get_task_subtree", long_term_task["id"], include_root=False, completed=True,
+                     callback=self._show_completed_subtasks)
+
+    def _show_completed_subtasks(self, tasks: list):
         if tasks:
             msg = ""
             for t in tasks:
@@ -215,34 +485,103 @@ class MainWindow(QMainWindow):
         else:
             QMessageBox.information(None, "完成的短期任务", "目前没有该长期目标生成的已完成短期任务。")
 
+    def _modify_task_tree(self, root_id: int, method: str):
+        """在同一个写事务中查询祖先并修改整棵子树，完成后移除相应行并刷新祖先进度"""
+        def modify(db):
+            return db.get_ancestor_ids(root_id), getattr(db, method)(root_id)
+        modify.__name__ = method
+
+        def done(result):
+            ancestors, task_ids = result
+            for task_id in task_ids:
+                self._remove_task(task_id)
+            self._refresh_progress(ancestors)
+        self.db.write(modify, callback=done)
+
+    def on_complete_task_tree(self, long_term_task: dict):
+        self._modify_task_tree(long_term_task["id"], "complete_subtree")
+
+    def on_delete_task_tree(self, long_term_task: dict):
+        confirm = QMessageBox.question(
+            self, "删除确认", f"确定要删除“{long_term_task['title']}”及其全部子任务吗？此操作不可恢复！",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if confirm != QMessageBox.Yes:
+            return
+        self._modify_task_tree(long_term_task["id"], "delete_subtree")
+
+    def on_decompose_goal(self, long_term_task: dict):
+        self.decompose_goals([long_term_task])
+
+    def decompose_all_goals(self):
+        goals = [self.long_term_model.task_at(row) for row in range(self.long_term_model.rowCount())]
+        if not goals:
+            QMessageBox.information(self, "AI拆解", "目前没有未完成的长期目标。")
+            return
+        self.decompose_goals(goals)
+
+    def decompose_goals(self, goals: list):
+        """在后台线程中并发拆解长期目标，进度显示在非模态进度框中，完成后一次性写入全部子任务"""
+        thread = GoalDecompositionThread(self.ai_service, goals)
+        progress = QProgressDialog("正在用 AI 拆解长期目标...", "取消", 0, len(goals), self)
+        progress.setWindowModality(Qt.NonModal)
+        progress.setMinimumDuration(0)
+        progress.setValue(0)
+        progress.canceled.connect(thread.cancel)
+        thread.progress.connect(lambda done, total: progress.setValue(done))
+        thread.result_ready.connect(self._on_goals_decomposed)
+        thread.error_occurred.connect(lambda message: QMessageBox.critical(self, "AI拆解", message))
+        thread.finished.connect(progress.close)
+        thread.finished.connect(lambda: self._decompose_threads.discard(thread))
+        self._decompose_threads.add(thread)
+        thread.start()
+
+    def _on_goals_decomposed(self, subtasks: dict, errors: dict):
+        if errors:
+            msg = "\n".join(f"目标 {goal_id}: {error}" for goal_id, error in errors.items())
+            QMessageBox.warning(self, "AI拆解", f"部分目标拆解失败：\n{msg}")
+        if any(subtasks.values()):
+            # 所有目标的子任务在一个事务中写入，然后重新加载列表和进度
+            self.db.call("add_subtasks", subtasks, callback=lambda _: self.apply_search())
+
     # ------------------- 底部区域：已完成任务、AI规划、删除已完成任务 -------------------
     def init_footer_area(self):
         footer_layout = QHBoxLayout()
         left_layout = QVBoxLayout()
         completed_button = QPushButton("查看已完成任务")
-        completed_button.clicked.connect(self.show_completed_tasks)
+        completed_button.clicked.connect(lambda: self.show_completed_tasks())
         left_layout.addWidget(completed_button)
+        archived_button = QPushButton("查看归档任务")
+        archived_button.clicked.connect(lambda: self.show_completed_tasks(archived=True))
+        left_layout.addWidget(archived_button)
         delete_completed_button = QPushButton("删除已完成任务")
         delete_completed_button.clicked.connect(self.delete_completed_tasks)
         left_layout.addWidget(delete_completed_button)
         ai_button = QPushButton("AI规划(示例)")
         ai_button.clicked.connect(self.plan_with_ai)
         left_layout.addWidget(ai_button)
+        decompose_button = QPushButton("AI拆解长期目标")
+        decompose_button.clicked.connect(self.decompose_all_goals)
+        left_layout.addWidget(decompose_button)
+        self.sync_label = QLabel()
+        self.sync_label.hide()
+        left_layout.addWidget(self.sync_label)
         footer_layout.addLayout(left_layout)
         from src.ui.pomodoro_widget import PomodoroWidget
         self.pomodoro_widget = PomodoroWidget()
+        self.pomodoro_widget.sessionFinished.connect(self.focus_buffer.add)
         footer_layout.addWidget(self.pomodoro_widget)
         self.main_layout.addLayout(footer_layout)
 
-    def show_completed_tasks(self):
-        completed_tasks = self.db.get_completed_tasks()
-        if not completed_tasks:
-            QMessageBox.information(self, "已完成任务", "目前没有已完成任务。")
-            return
-        msg = ""
-        for t in completed_tasks:
-            msg += f"ID: {t['id']} | 标题: {t['title']} | 完成时间: {t['completed_at']}\n"
-        QMessageBox.information(self, "已完成任务", msg)
+    def show_completed_tasks(self, archived: bool = False):
+        # 非模态历史窗口，按页加载；窗口复用，每次打开从第一页重新加载
+        view = self._history_views.get(archived)
+        if view is None:
+            from src.ui.history_view import CompletedTasksView
+            view = self._history_views[archived] = CompletedTasksView(self.db, parent=self, archived=archived)
+        view.reload()
+        view.show()
+        view.raise_()
 
     def delete_completed_tasks(self):
         confirm = QMessageBox.question(
@@ -250,14 +589,25 @@ class MainWindow(QMainWindow):
             QMessageBox.Yes | QMessageBox.No
         )
         if confirm == QMessageBox.Yes:
-            self.db.delete_completed_tasks()
-            QMessageBox.information(self, "提示", "已删除所有已完成任务。")
-            self.refresh_task_lists()
+            # 列表中只显示未完成任务，删除已完成任务不需要刷新列表
+            self.db.call("delete_completed_tasks",
+                         callback=lambda _: QMessageBox.information(self, "提示", "已删除所有已完成任务。"))
 
     def plan_with_ai(self):
-        tasks = self.db.get_tasks(include_completed=False)
-        plan_text = self.ai_service.generate_plan(tasks)
-        QMessageBox.information(None, "AI规划结果", plan_text)
+        # 非模态窗口 + 后台线程流式生成，不阻塞主界面
+        self.db.call("get_tasks", include_completed=False, callback=self._open_plan_view)
+
+    def _open_plan_view(self, tasks: list):
+        plan_view = PlanView(self.ai_service, tasks, parent=self)
+        plan_view.show()
+
+    def _save_focus_sessions(self, sessions: list):
+        # 带学习领域的专注记录会计入学习时长，写入后刷新学习记录
+        self.db.call("bulk_add_focus_sessions", sessions, callback=lambda _: self._on_learning_changed())
+
+    def _on_learning_changed(self):
+        if self._startup_finished:
+            self.refresh_learning_log()
 
     def display_plan_result(self, plan_text):
         QMessageBox.information(None, "AI规划结果", plan_text)
@@ -290,26 +640,61 @@ class MainWindow(QMainWindow):
         if not domain:
             QMessageBox.warning(self, "提示", "请填写学习领域！")
             return
-        self.db.add_learning_time(domain, minutes)
-        self.refresh_learning_log()
+        self.db.call("add_learning_time", domain, minutes,
+                     callback=lambda _: self.refresh_learning_log())
 
     def refresh_learning_log(self):
+        today = date.today()
+        week_start = today - timedelta(days=today.weekday())
+
+        def load(db):
+            return db.get_learning_logs(), db.get_learning_totals(week_start, today + timedelta(days=1))
+        self.db.read(load, callback=self._show_learning_log)
+
+    def _show_learning_log(self, result):
+        with metrics.span("ui.show_learning_log"):
+            self._fill_learning_list(*result)
+
+    def _fill_learning_list(self, logs: list, totals: list):
         self.learning_list.clear()
-        logs = self.db.get_learning_logs()
+        this_week = {row["domain"]: row["total_minutes"] for row in totals}
         if logs:
             for row in logs:
                 domain = row["domain"]
                 total_minutes = row["total_minutes"]
-                item = QListWidgetItem(f"{domain}：已累计 {total_minutes} 分钟")
+                item = QListWidgetItem(
+                    f"{domain}：已累计 {total_minutes} 分钟（本周 {this_week.get(domain, 0)} 分钟）"
+                )
                 self.learning_list.addItem(item)
         else:
             self.learning_list.addItem("暂无学习记录")
 
+def _sync_status_text(status: dict) -> str:
+    state, pending, lag = status["state"], status["pending"], status["lag_seconds"]
+    if state == "syncing":
+        return "正在同步..."
+    if state == "offline":
+        return f"同步失败，{int(status['retry_in'] or 0)} 秒后重试（{pending} 项未同步）"
+    if state == "stopped":
+        return "同步已停止"
+    if state == "pending":
+        count = f"{pending} 项" if pending else "修改"
+        return f"{count}待同步，已延迟 {int(lag or 0)} 秒"
+    if status["last_sync_at"]:
+        return "已同步 " + time.strftime("%H:%M:%S", time.localtime(status["last_sync_at"]))
+    return "尚未同步"
+
 def main():
     print("当前工作目录:", os.getcwd())
+    profiler = StartupProfiler(start=_PROCESS_START)
     app = QApplication(sys.argv)
-    window = MainWindow()
+    profiler.mark("qapplication")
+    window = MainWindow(profiler)
     window.show()
+    profiler.mark("window_shown")
+    if os.environ.get("AINOTE_EXIT_AFTER_STARTUP"):
+        # 供启动基准使用：完成分阶段启动后立即退出
+        window.startupFinished.connect(app.quit)
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
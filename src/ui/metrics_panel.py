@@ -0,0 +1,112 @@
+# src/ui/metrics_panel.py
+
+"""
+metrics_panel.py
+----------------
+隐藏的调试面板(主窗口中按 Ctrl+Shift+M 打开)，每秒刷新一次各操作的次数与 p50 / p95 耗时，
+以及行数、字节数等计数器。可以在面板中开关埋点、清空数据，或导出汇总 JSON / Chrome trace。
+数据来自 src/utils/metrics.py；面板隐藏时不刷新。
+"""
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QCheckBox, QPushButton, QTableWidget, QTableWidgetItem,
+    QHeaderView, QFileDialog, QLabel
+)
+
+from src.utils import metrics
+
+OPERATION_COLUMNS = ("操作", "次数", "p50 (ms)", "p95 (ms)", "最大 (ms)", "总计 (ms)")
+OPERATION_KEYS = ("count", "p50_ms", "p95_ms", "max_ms", "total_ms")
+
+
+class MetricsPanel(QDialog):
+    def __init__(self, parent=None, refresh_ms: int = 1000):
+        super().__init__(parent)
+        self.setWindowTitle("性能指标")
+        self.setModal(False)
+        self.resize(640, 520)
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        controls = QHBoxLayout()
+        self.enabled_check = QCheckBox("启用埋点")
+        self.enabled_check.setChecked(metrics.is_enabled())
+        self.enabled_check.toggled.connect(self.set_enabled)
+        controls.addWidget(self.enabled_check)
+        controls.addStretch()
+        for text, slot in (("清空", self.reset), ("导出 JSON", self.export_json),
+                           ("导出 Chrome trace", self.export_trace)):
+            button = QPushButton(text)
+            button.clicked.connect(slot)
+            controls.addWidget(button)
+        layout.addLayout(controls)
+
+        self.operations_table = self._create_table(OPERATION_COLUMNS)
+        layout.addWidget(self.operations_table, 3)
+        layout.addWidget(QLabel("计数器"))
+        self.counters_table = self._create_table(("名称", "累计"))
+        layout.addWidget(self.counters_table, 1)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(refresh_ms)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    @staticmethod
+    def _create_table(columns) -> QTableWidget:
+        table = QTableWidget(0, len(columns))
+        table.setHorizontalHeaderLabels(columns)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        return table
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.enabled_check.setChecked(metrics.is_enabled())
+        self.refresh()
+        self.refresh_timer.start()
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def set_enabled(self, enabled: bool):
+        if enabled:
+            metrics.enable()
+        else:
+            metrics.disable()
+
+    def reset(self):
+        metrics.reset()
+        self.refresh()
+
+    def refresh(self):
+        data = metrics.summary()
+        self._fill(self.operations_table, [
+            (name, *(op[key] for key in OPERATION_KEYS)) for name, op in data["operations"].items()
+        ])
+        self._fill(self.counters_table, list(data["counters"].items()))
+
+    @staticmethod
+    def _fill(table: QTableWidget, rows: list):
+        table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                item = table.item(row, column)
+                if item is None:
+                    item = QTableWidgetItem()
+                    if column:
+                        item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                    table.setItem(row, column, item)
+                item.setText("" if value is None else str(value))
+
+    def export_json(self):
+        path, _ = QFileDialog.getSaveFileName(self, "导出性能指标", "metrics.json", "JSON (*.json)")
+        if path:
+            metrics.dump_json(path)
+
+    def export_trace(self):
+        path, _ = QFileDialog.getSaveFileName(self, "导出 Chrome trace", "trace.json", "JSON (*.json)")
+        if path:
+            metrics.dump_chrome_trace(path)
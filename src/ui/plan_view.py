@@ -0,0 +1,193 @@
+# src/ui/plan_view.py
+
+"""
+plan_view.py
+------------
+AI 规划结果窗口：在后台线程中流式调用 AIService.stream_plan，
+文本边生成边显示，窗口非模态，可随时取消，并显示首字延迟(TTFT)。
+另提供 GoalDecompositionThread，在后台并发拆解长期目标。
+"""
+
+import threading
+import time
+
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QTextCursor
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPlainTextEdit, QPushButton
+
+from src.core.llm_backend import CancelToken
+
+# 窗口关闭后仍在等待网络返回的线程，保留引用直到线程自然结束，避免 QThread 在运行中被销毁
+_detached_threads = set()
+
+
+# 定义后台线程用于调用 AI 规划
+class PlanGenerationThread(QThread):
+    token_received = pyqtSignal(str)
+    first_token = pyqtSignal(float)     # 首字延迟，单位毫秒
+    result_ready = pyqtSignal(str)      # 完整的规划文本
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, ai_service, tasks, timeout: float = 120.0):
+        """
+        :param timeout: 整个生成过程(含分组总结和等待首字)的最长时间(秒)，超过后中止并报错；
+                        同时作为单次 HTTP 请求的超时时间
+        """
+        super().__init__()
+        self.ai_service = ai_service
+        self.tasks = tasks
+        self.timeout = timeout
+        self._cancelled = False
+        self._timed_out = False
+        self._cancel_token = CancelToken()
+
+    def cancel(self):
+        """请求取消：立即关闭进行中的流式连接，分组总结阶段不再发起新的请求"""
+        self._cancelled = True
+        self._cancel_token.cancel()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled
+
+    def _expire(self):
+        self._timed_out = True
+        self._cancel_token.cancel()
+
+    def run(self):
+        start = time.monotonic()
+        parts = []
+        stream = None
+        # 到时由计时器取消，等待首字或分组总结期间也能按时中止
+        watchdog = threading.Timer(self.timeout, self._expire)
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            stream = self.ai_service.stream_plan(self.tasks, timeout=self.timeout, cancel_token=self._cancel_token)
+            for token in stream:
+                if self._cancelled:
+                    break
+                if not parts:
+                    self.first_token.emit((time.monotonic() - start) * 1000)
+                parts.append(token)
+                self.token_received.emit(token)
+            if not self._cancelled and not self._timed_out:
+                self.result_ready.emit("".join(parts).strip())
+        except Exception as e:
+            if self._timed_out:
+                self.error_occurred.emit(f"发生错误: 生成超过 {self.timeout:.0f} 秒，已中止")
+            elif not self._cancelled:
+                self.error_occurred.emit(f"发生错误: {e}")
+        finally:
+            watchdog.cancel()
+            if stream is not None:
+                stream.close()
+
+
+class GoalDecompositionThread(QThread):
+    progress = pyqtSignal(int, int)             # 已完成的目标数, 目标总数
+    result_ready = pyqtSignal(object, object)   # {goal_id: [子任务]}, {goal_id: 错误信息}
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, ai_service, goals: list, max_concurrency: int = 4, requests_per_second: float = 2.0):
+        super().__init__()
+        self.ai_service = ai_service
+        self.goals = goals
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """请求取消：不再发起新的请求，已返回的结果也不再提交"""
+        self._cancel_event.set()
+
+    def run(self):
+        try:
+            subtasks, errors = self.ai_service.decompose_goals(
+                self.goals,
+                max_concurrency=self.max_concurrency,
+                requests_per_second=self.requests_per_second,
+                on_progress=lambda done, total, _: self.progress.emit(done, total),
+                cancel_event=self._cancel_event,
+            )
+            if not self._cancel_event.is_set():
+                self.result_ready.emit(subtasks, errors)
+        except Exception as e:
+            if not self._cancel_event.is_set():
+                self.error_occurred.emit(f"发生错误: {e}")
+
+
+class PlanView(QDialog):
+    def __init__(self, ai_service, tasks, parent=None, timeout: float = 120.0):
+        super().__init__(parent)
+        self.setWindowTitle("AI规划结果")
+        self.setModal(False)
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.resize(520, 420)
+        self._start = time.monotonic()
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        self.status_label = QLabel("正在请求 AI 规划...")
+        layout.addWidget(self.status_label)
+        self.text_edit = QPlainTextEdit()
+        self.text_edit.setReadOnly(True)
+        layout.addWidget(self.text_edit)
+
+        btn_layout = QHBoxLayout()
+        btn_layout.addStretch()
+        self.cancel_btn = QPushButton("取消")
+        self.cancel_btn.clicked.connect(self.cancel)
+        btn_layout.addWidget(self.cancel_btn)
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.close)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+
+        self.ai_service = ai_service
+        self.ttft_ms = None
+        self.thread = PlanGenerationThread(ai_service, tasks, timeout=timeout)
+        self.thread.token_received.connect(self.append_token)
+        self.thread.first_token.connect(self.on_first_token)
+        self.thread.result_ready.connect(self.on_finished)
+        self.thread.error_occurred.connect(self.on_error)
+        self.thread.start()
+
+    def append_token(self, token: str):
+        cursor = self.text_edit.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(token)
+        self.text_edit.setTextCursor(cursor)
+
+    def on_first_token(self, ttft_ms: float):
+        self.ttft_ms = ttft_ms
+        self.status_label.setText(f"生成中... 首字延迟 {ttft_ms:.0f} ms")
+
+    def on_finished(self, plan_text: str):
+        elapsed = time.monotonic() - self._start
+        ttft = f"{self.ttft_ms:.0f} ms" if self.ttft_ms is not None else "-"
+        status = f"生成完成：首字延迟 {ttft}，总耗时 {elapsed:.1f} 秒"
+        if self.ai_service.cache is not None:
+            stats = self.ai_service.cache.stats()
+            status += f"（缓存命中 {stats['hits']} / 未命中 {stats['misses']}）"
+        self.status_label.setText(status)
+        self.cancel_btn.setEnabled(False)
+
+    def on_error(self, message: str):
+        self.status_label.setText(message)
+        self.cancel_btn.setEnabled(False)
+
+    def cancel(self):
+        self.thread.cancel()
+        self.status_label.setText("已取消")
+        self.cancel_btn.setEnabled(False)
+
+    def closeEvent(self, event):
+        # 关闭窗口时取消生成；线程可能还阻塞在网络读取上，断开信号后交给 _detached_threads 托管
+        thread = self.thread
+        thread.cancel()
+        for signal in (thread.token_received, thread.first_token, thread.result_ready, thread.error_occurred):
+            signal.disconnect()
+        if thread.isRunning():
+            _detached_threads.add(thread)
+            thread.finished.connect(lambda: _detached_threads.discard(thread))
+        super().closeEvent(event)
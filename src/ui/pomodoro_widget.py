@@ -1,13 +1,26 @@
 # src/ui/pomodoro_widget.py
 
-from PyQt5.QtWidgets import QWidget, QGroupBox, QVBoxLayout, QHBoxLayout, QSpinBox, QLabel, QPushButton
-from PyQt5.QtCore import pyqtSlot
+import time
+
+from PyQt5.QtWidgets import (
+    QWidget, QGroupBox, QVBoxLayout, QHBoxLayout, QSpinBox, QLabel, QPushButton, QLineEdit, QComboBox
+)
+from PyQt5.QtCore import pyqtSlot, pyqtSignal
 from src.utils.timer import PomodoroTimer
 
+# 短于该时长(秒)的专注片段不记录，避免误触开始/暂停产生噪声数据
+MIN_SESSION_SECONDS = 5
+
+
 class PomodoroWidget(QGroupBox):
+    # 一段专注结束(暂停、停止或到点)时发出：
+    # {'started_at': Unix 秒, 'ended_at': Unix 秒, 'task_id': int 或 None, 'domain': str 或 None}
+    sessionFinished = pyqtSignal(dict)
+
     def __init__(self, parent=None):
         super().__init__("番茄钟", parent)
         self.timer = PomodoroTimer()
+        self._segment = None  # 当前专注片段：(开始时的墙上时间, 开始时的已计时秒数)
         self.init_ui()
         self.timer.timeUpdated.connect(self.update_label)
         self.timer.timeReached.connect(self.timer_finished)
@@ -23,6 +36,14 @@ class PomodoroWidget(QGroupBox):
         self.time_spin.setSuffix(" 分钟")
         layout.addWidget(self.time_spin)
 
+        # 专注记录关联的任务和学习领域
+        self.task_combo = QComboBox()
+        self.task_combo.addItem("(不关联任务)", None)
+        layout.addWidget(self.task_combo)
+        self.domain_input = QLineEdit()
+        self.domain_input.setPlaceholderText("学习领域(可选)")
+        layout.addWidget(self.domain_input)
+
         # 显示当前计时状态
         self.timer_label = QLabel("已计时: 0 秒")
         layout.addWidget(self.timer_label)
@@ -39,30 +60,73 @@ class PomodoroWidget(QGroupBox):
 
         layout.addLayout(btn_layout)
 
+    def set_tasks(self, tasks: list):
+        """更新可关联的任务列表，尽量保留当前选中的任务"""
+        current = self.task_combo.currentData()
+        self.task_combo.blockSignals(True)
+        self.task_combo.clear()
+        self.task_combo.addItem("(不关联任务)", None)
+        for task in tasks:
+            self.task_combo.addItem(task["title"], task["id"])
+        index = self.task_combo.findData(current) if current is not None else 0
+        self.task_combo.setCurrentIndex(max(0, index))
+        self.task_combo.blockSignals(False)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.timer.set_display_active(True)
+
+    def hideEvent(self, event):
+        # 不可见时停止每秒刷新，只保留到点提醒
+        super().hideEvent(event)
+        self.timer.set_display_active(False)
+
     @pyqtSlot()
     def start_or_pause(self):
-        if not self.timer._running:
+        if not self.timer.is_running():
             target_seconds = self.time_spin.value() * 60
             already_used = self.timer.get_accumulated_seconds()
             if already_used >= target_seconds:
                 self.timer.stop_timer()
                 already_used = 0
             self.timer.start_timer(target_seconds, already_used)
+            self._segment = (time.time(), self.timer.get_elapsed())
             self.start_pause_btn.setText("暂停")
         else:
+            self.finish_session()
             self.timer.pause_timer()
             self.start_pause_btn.setText("继续")
 
     @pyqtSlot()
     def stop_timer(self):
+        self.finish_session()
         self.timer.stop_timer()
         self.timer_label.setText("已计时: 0 秒")
         self.start_pause_btn.setText("开始")
 
+    def finish_session(self):
+        """结束当前专注片段并发出 sessionFinished；窗口关闭时也会调用"""
+        if self._segment is None:
+            return
+        started_at, started_elapsed = self._segment
+        self._segment = None
+        # 时长取自单调时钟，不受期间调整系统时间的影响
+        seconds = self.timer.get_elapsed() - started_elapsed
+        if seconds < MIN_SESSION_SECONDS:
+            return
+        domain = self.domain_input.text().strip()
+        self.sessionFinished.emit({
+            "started_at": int(started_at),
+            "ended_at": int(started_at + seconds),
+            "task_id": self.task_combo.currentData(),
+            "domain": domain or None,
+        })
+
     @pyqtSlot(int)
     def update_label(self, elapsed_seconds):
         self.timer_label.setText(f"已计时: {elapsed_seconds} 秒")
 
     @pyqtSlot()
     def timer_finished(self):
+        self.finish_session()
         self.start_pause_btn.setText("开始")
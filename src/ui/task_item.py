@@ -1,83 +1,157 @@
 # src/ui/task_item.py
 
 from PyQt5.QtWidgets import (
-    QWidget, QHBoxLayout, QVBoxLayout, QLabel, QPushButton, QCheckBox, QMenu
+    QStyledItemDelegate, QStyle, QStyleOptionButton, QStyleOptionProgressBar, QApplication, QMenu
 )
-from PyQt5.QtCore import pyqtSignal, Qt
+from PyQt5.QtCore import pyqtSignal, Qt, QEvent, QRect, QSize
+from PyQt5.QtGui import QColor, QFont
 
-class TaskItem(QWidget):
+from src.ui.task_list_model import ProgressRole
+
+
+class TaskItemDelegate(QStyledItemDelegate):
+    """
+    任务行的绘制委托：标题、描述、类型 + “完成”复选框和“删除”按钮。
+    与旧版 TaskItem 控件保持相同的信号，但不再为每个任务创建控件，
+    只有视图可见区域内的行会被绘制。
+    """
     taskCompleted = pyqtSignal(int)
     taskDeleted = pyqtSignal(int)
-    generateSubTask = pyqtSignal(dict)
-    viewCompletedSubTasks = pyqtSignal(dict)
-
-    def __init__(self, task_data: dict):
-        super().__init__()
-        self.task_data = task_data
-        self.task_id = task_data["id"]
-        self.title = task_data["title"]
-        self.description = task_data.get("description", "")
-        self.task_type = task_data.get("task_type", "")
-        self.goal_type = task_data.get("goal_type", "")
-        self.is_completed = bool(task_data.get("is_completed", 0))
-        self.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.setAttribute(Qt.WA_TransparentForMouseEvents, False)
-
-        self.layout = QHBoxLayout()
-        self.setLayout(self.layout)
-
-        left_layout = QVBoxLayout()
-        self.title_label = QLabel(self.title)
-        if self.is_completed:
-            self.title_label.setStyleSheet("text-decoration: line-through; color: gray;")
-        left_layout.addWidget(self.title_label)
-        if self.description:
-            self.desc_label = QLabel(self.description)
-            self.desc_label.setStyleSheet("font-size: 12px; color: #555;")
-            left_layout.addWidget(self.desc_label)
-        type_label = QLabel(f"类型: {self.task_type} / {self.goal_type}")
-        type_label.setStyleSheet("font-size: 11px; color: #777;")
-        left_layout.addWidget(type_label)
-        self.layout.addLayout(left_layout)
-
-        self.completed_checkbox = QCheckBox("完成")
-        self.completed_checkbox.setChecked(self.is_completed)
-        self.completed_checkbox.stateChanged.connect(self.toggle_task_completed)
-        self.layout.addWidget(self.completed_checkbox)
-
-        delete_btn = QPushButton("删除")
-        delete_btn.clicked.connect(self.delete_task)
-        self.layout.addWidget(delete_btn)
-
-    def toggle_task_completed(self):
-        if not self.is_completed:
-            self.taskCompleted.emit(self.task_id)
-
-    def delete_task(self):
-        self.taskDeleted.emit(self.task_id)
-
-    def mousePressEvent(self, event):
-        if event.button() == Qt.RightButton:
-            print("mousePressEvent: 右键点击")
-            self.contextMenuEvent(event)
-        else:
-            super().mousePressEvent(event)
-
-    def contextMenuEvent(self, event):
-        print("contextMenuEvent 触发！goal_type =", self.goal_type)
+    generateSubTask = pyqtSignal(object)
+    viewCompletedSubTasks = pyqtSignal(object)
+    completeTaskTree = pyqtSignal(object)
+    deleteTaskTree = pyqtSignal(object)
+    decomposeGoal = pyqtSignal(object)
+
+    PROGRESS_WIDTH = 120
+    ROW_HEIGHT = 62
+    MARGIN = 6
+    CHECK_WIDTH = 60
+    BUTTON_WIDTH = 56
+
+    def sizeHint(self, option, index):
+        # 固定行高，配合 QListView.setUniformItemSizes 避免逐行测量
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def _control_rects(self, rect: QRect):
+        """返回 (完成复选框区域, 删除按钮区域)"""
+        height = rect.height() - 2 * self.MARGIN
+        delete_rect = QRect(rect.right() - self.MARGIN - self.BUTTON_WIDTH,
+                            rect.top() + self.MARGIN, self.BUTTON_WIDTH, height)
+        check_rect = QRect(delete_rect.left() - self.MARGIN - self.CHECK_WIDTH,
+                           rect.top() + self.MARGIN, self.CHECK_WIDTH, height)
+        return check_rect, delete_rect
+
+    def paint(self, painter, option, index):
+        task = index.model().task_for_index(index)
+        if task is None:
+            return
+        style = option.widget.style() if option.widget else QApplication.style()
+        painter.save()
+
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+
+        check_rect, delete_rect = self._control_rects(option.rect)
+        text_rect = QRect(option.rect.left() + self.MARGIN, option.rect.top() + self.MARGIN,
+                          check_rect.left() - option.rect.left() - 2 * self.MARGIN,
+                          option.rect.height() - 2 * self.MARGIN)
+        line_height = text_rect.height() // 3
+
+        is_completed = bool(task.get("is_completed", 0))
+        title_font = QFont(option.font)
+        title_font.setStrikeOut(is_completed)
+        painter.setFont(title_font)
+        painter.setPen(QColor("gray") if is_completed else option.palette.text().color())
+        title_rect = QRect(text_rect.left(), text_rect.top(), text_rect.width(), line_height)
+        painter.drawText(title_rect, Qt.AlignLeft | Qt.AlignVCenter,
+                         painter.fontMetrics().elidedText(task["title"], Qt.ElideRight, title_rect.width()))
+
+        small_font = QFont(option.font)
+        small_font.setPixelSize(12)
+        painter.setFont(small_font)
+        description = task.get("description") or ""
+        if description:
+            painter.setPen(QColor("#555"))
+            desc_rect = title_rect.translated(0, line_height)
+            painter.drawText(desc_rect, Qt.AlignLeft | Qt.AlignVCenter,
+                             painter.fontMetrics().elidedText(description, Qt.ElideRight, desc_rect.width()))
+
+        small_font.setPixelSize(11)
+        painter.setFont(small_font)
+        painter.setPen(QColor("#777"))
+        type_rect = title_rect.translated(0, 2 * line_height)
+        progress = index.data(ProgressRole)
+        if progress is not None and progress["total"]:
+            # 长期目标：在类型行右侧显示子任务完成进度
+            bar_option = QStyleOptionProgressBar()
+            bar_option.rect = QRect(type_rect.right() - self.PROGRESS_WIDTH, type_rect.top(),
+                                    self.PROGRESS_WIDTH, type_rect.height())
+            bar_option.minimum = 0
+            bar_option.maximum = progress["total"]
+            bar_option.progress = progress["completed"]
+            bar_option.text = f"{progress['completed']}/{progress['total']}"
+            bar_option.textVisible = True
+            bar_option.state = QStyle.State_Enabled
+            style.drawControl(QStyle.CE_ProgressBar, bar_option, painter, option.widget)
+            type_rect.setRight(bar_option.rect.left() - self.MARGIN)
+        painter.drawText(type_rect, Qt.AlignLeft | Qt.AlignVCenter,
+                         f"类型: {task.get('task_type', '')} / {task.get('goal_type', '')}")
+
+        painter.setFont(option.font)
+        check_option = QStyleOptionButton()
+        check_option.rect = check_rect
+        check_option.text = "完成"
+        check_option.state = QStyle.State_Enabled | (QStyle.State_On if is_completed else QStyle.State_Off)
+        style.drawControl(QStyle.CE_CheckBox, check_option, painter, option.widget)
+
+        button_option = QStyleOptionButton()
+        button_option.rect = delete_rect
+        button_option.text = "删除"
+        button_option.state = QStyle.State_Enabled | QStyle.State_Raised
+        style.drawControl(QStyle.CE_PushButton, button_option, painter, option.widget)
+
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        task = index.model().task_for_index(index)
+        if task is None:
+            return False
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            check_rect, delete_rect = self._control_rects(option.rect)
+            if check_rect.contains(event.pos()):
+                if not task.get("is_completed", 0):
+                    self.taskCompleted.emit(task["id"])
+                return True
+            if delete_rect.contains(event.pos()):
+                self.taskDeleted.emit(task["id"])
+                return True
+        elif event.type() == QEvent.MouseButtonPress and event.button() == Qt.RightButton:
+            return self._show_context_menu(task, option.widget, event.globalPos())
+        return super().editorEvent(event, model, option, index)
+
+    def _show_context_menu(self, task, parent, global_pos) -> bool:
+        if task.get("goal_type") != "long-term":
+            return False
         try:
-            if self.goal_type == "long-term":
-                menu = QMenu(self)
-                action_generate = menu.addAction("生成基于该长期目标的短期任务")
-                action_view = menu.addAction("查看完成的短期任务")
-                action = menu.exec_(self.mapToGlobal(event.pos()))
-                if action == action_generate:
-                    print("选择生成短期任务")
-                    self.generateSubTask.emit(self.task_data)
-                elif action == action_view:
-                    print("选择查看完成的短期任务")
-                    self.viewCompletedSubTasks.emit(self.task_data)
-            else:
-                super().contextMenuEvent(event)
+            menu = QMenu(parent)
+            action_generate = menu.addAction("生成基于该长期目标的短期任务")
+            action_decompose = menu.addAction("AI 拆解为短期任务")
+            action_view = menu.addAction("查看完成的短期任务")
+            menu.addSeparator()
+            action_complete_tree = menu.addAction("完成该目标及全部子任务")
+            action_delete_tree = menu.addAction("删除该目标及全部子任务")
+            action = menu.exec_(global_pos)
+            if action == action_generate:
+                self.generateSubTask.emit(task)
+            elif action == action_decompose:
+                self.decomposeGoal.emit(task)
+            elif action == action_view:
+                self.viewCompletedSubTasks.emit(task)
+            elif action == action_complete_tree:
+                self.completeTaskTree.emit(task)
+            elif action == action_delete_tree:
+                self.deleteTaskTree.emit(task)
         except Exception as e:
             print("右键菜单错误:", e)
+        return True
@@ -0,0 +1,101 @@
+# src/ui/task_list_model.py
+
+"""
+task_list_model.py
+------------------
+任务列表的数据模型。QListView + TaskListModel 取代原来每个任务一个 TaskItem 控件的 QListWidget：
+视图只绘制可见行，增删任务时通过 beginInsertRows / beginRemoveRows 做行级更新，
+不再清空后整体重建。
+"""
+
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+
+# 通过该角色取出整条任务记录(Task)；委托直接调用 task_for_index，避免经过 QVariant 转换
+TaskRole = Qt.UserRole + 1
+# 长期目标的子任务完成进度 {"total", "completed", "ratio"}，没有进度数据时为 None
+ProgressRole = Qt.UserRole + 2
+
+
+class TaskListModel(QAbstractListModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._tasks = []
+        self._progress = {}  # task_id -> 进度 dict
+
+    # ------------------- QAbstractListModel 接口 -------------------
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._tasks)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._tasks):
+            return None
+        task = self._tasks[index.row()]
+        if role == Qt.DisplayRole:
+            return task["title"]
+        if role == Qt.ToolTipRole:
+            return task.get("description") or None
+        if role == TaskRole:
+            return task
+        if role == ProgressRole:
+            return self._progress.get(task["id"])
+        return None
+
+    # ------------------- 行级更新 -------------------
+    def set_tasks(self, tasks: list):
+        """整体替换列表内容，仅用于首次加载"""
+        self.beginResetModel()
+        self._tasks = list(tasks)
+        self.endResetModel()
+
+    def add_task(self, task):
+        """在末尾追加一行"""
+        self.insert_task(len(self._tasks), task)
+
+    def insert_task(self, row: int, task):
+        """在 row 处插入一行(超出范围时追加到末尾)，用于撤销失败的移除"""
+        row = max(0, min(row, len(self._tasks)))
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._tasks.insert(row, task)
+        self.endInsertRows()
+
+    def remove_task(self, task_id: int) -> bool:
+        """移除指定 id 的任务，返回是否找到该行"""
+        row = self.row_of(task_id)
+        if row < 0:
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._tasks[row]
+        self.endRemoveRows()
+        return True
+
+    def set_progress(self, progress: dict):
+        """整体替换进度数据 {task_id: {...}}"""
+        self._progress = dict(progress)
+        if self._tasks:
+            self.dataChanged.emit(self.index(0), self.index(len(self._tasks) - 1), [ProgressRole])
+
+    def update_progress(self, progress: dict):
+        """只更新给出的几个目标，并只通知对应的行重绘"""
+        for task_id, stats in progress.items():
+            self._progress[task_id] = stats
+            row = self.row_of(task_id)
+            if row >= 0:
+                self.dataChanged.emit(self.index(row), self.index(row), [ProgressRole])
+
+    def row_of(self, task_id: int) -> int:
+        """返回任务所在行号，不存在时返回 -1"""
+        for row, task in enumerate(self._tasks):
+            if task["id"] == task_id:
+                return row
+        return -1
+
+    def task_at(self, row: int):
+        return self._tasks[row]
+
+    def task_for_index(self, index):
+        """返回索引对应的任务记录，索引无效时返回 None"""
+        if not index.isValid() or not 0 <= index.row() < len(self._tasks):
+            return None
+        return self._tasks[index.row()]
@@ -0,0 +1,54 @@
+# src/utils/db_maintenance.py
+
+"""
+db_maintenance.py
+-----------------
+需要用户显式执行的数据库维护操作。程序的后台维护只做分批归档和分段归还空闲页(incremental_vacuum)，
+不会自动执行任何长时间锁库的操作。
+早期版本创建的库 auto_vacuum=NONE，删除或归档腾出的空闲页不会还给文件系统；
+转换为 INCREMENTAL 需要一次完整的 VACUUM，期间整个库被锁住，请在关闭程序后执行：
+    python -m src.utils.db_maintenance status --db new_tasks.db
+    python -m src.utils.db_maintenance enable-incremental --db new_tasks.db --min-free-ratio 0.2
+--min-free-ratio 表示空闲页占比达到该值才转换，空闲页很少时重建整个文件并不划算。
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from src.core.database import Database
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="数据库维护")
+    parser.add_argument("action", choices=("status", "enable-incremental"))
+    parser.add_argument("--db", default=None, help="数据库文件，默认 new_tasks.db")
+    parser.add_argument("--min-free-ratio", type=float, default=0.0,
+                        help="空闲页占比低于该值时不转换")
+    args = parser.parse_args(argv)
+
+    db = Database(args.db)
+    try:
+        stats = db.page_stats()
+        if args.action == "status":
+            print(json.dumps(stats, ensure_ascii=False))
+            return 0
+        if stats["auto_vacuum"] == "incremental":
+            print("已经是 INCREMENTAL 模式，无需转换")
+            return 0
+        if stats["free_ratio"] < args.min_free_ratio:
+            print(f"空闲页占比 {stats['free_ratio']:.1%} 低于 {args.min_free_ratio:.1%}，未转换")
+            return 0
+        start = time.perf_counter()
+        db.enable_incremental_vacuum()
+        after = db.page_stats()
+    finally:
+        db.close()
+    print(f"已转换为 INCREMENTAL，页数 {stats['page_count']} -> {after['page_count']}，"
+          f"用时 {time.perf_counter() - start:.2f} 秒")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+# src/utils/fake_llm_server.py
+
+"""
+fake_llm_server.py
+------------------
+本地的 OpenAI 兼容 HTTP 服务，用于在没有网络、没有 API Key 的情况下
+测试和测量 AIService（包括流式输出）。只实现 POST /chat/completions（以及 /v1/chat/completions），
+按固定文本逐段返回，可配置首字延迟、每段之间的延迟以及随机抖动(固定种子，可复现)。
+用法：
+    with FakeLLMServer(reply="第一步……", first_token_delay=0.2) as server:
+        service = AIService(api_key="test", base_url=server.base_url)
+        for token in service.stream_plan(tasks):
+            ...
+也可以单独运行：
+    python -m src.utils.fake_llm_server --port 8765
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # 默认会把每个请求打印到 stderr，测量时没有必要
+        pass
+
+    def do_POST(self):
+        server = self.server.owner
+        if self.path.rstrip("/") not in ("/chat/completions", "/v1/chat/completions"):
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        server.record_request(body)
+        model = body.get("model", "fake-model")
+        if body.get("stream"):
+            self._send_stream(server, model)
+        else:
+            time.sleep(server.next_delay() + server.token_delay * len(server.tokens()))
+            payload = json.dumps({
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": server.reply},
+                    "finish_reason": "stop",
+                }],
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    def _send_stream(self, server, model):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        time.sleep(server.next_delay())
+        try:
+            for i, token in enumerate(server.tokens()):
+                if i:
+                    time.sleep(server.token_delay)
+                self._send_event({
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                })
+            self._send_event({
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            })
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端取消了请求
+            pass
+        self.close_connection = True
+
+    def _send_event(self, data: dict):
+        self.wfile.write(b"data: " + json.dumps(data, ensure_ascii=False).encode("utf-8") + b"\n\n")
+        self.wfile.flush()
+
+
+class FakeLLMServer:
+    def __init__(self, reply: str = "这是一个用于测试的规划结果。", host: str = "127.0.0.1", port: int = 0,
+                 first_token_delay: float = 0.0, token_delay: float = 0.0, chunk_size: int = 4,
+                 jitter: float = 0.0, seed: int = 0):
+        """
+        :param reply: 每次请求返回的完整文本
+        :param port: 监听端口，0 表示自动分配
+        :param first_token_delay: 收到请求到发出第一段数据之间的延迟(秒)
+        :param token_delay: 流式模式下相邻两段数据之间的延迟(秒)
+        :param chunk_size: 流式模式下每段包含的字符数
+        :param jitter: 每个请求的首字延迟额外增加 [0, jitter) 秒的随机值，模拟网络和排队的波动
+        :param seed: 抖动的随机数种子，相同种子和请求顺序下延迟序列相同
+        """
+        self.reply = reply
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.chunk_size = chunk_size
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self.requests = []
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.owner = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def tokens(self) -> list:
+        return [self.reply[i:i + self.chunk_size] for i in range(0, len(self.reply), self.chunk_size)]
+
+    def next_delay(self) -> float:
+        """本次请求的首字延迟"""
+        if not self.jitter:
+            return self.first_token_delay
+        with self._lock:
+            return self.first_token_delay + self._random.random() * self.jitter
+
+    def record_request(self, body: dict):
+        with self._lock:
+            self.requests.append(body)
+
+    def serve_forever(self):
+        """在当前线程中阻塞运行，用于命令行启动"""
+        self._httpd.serve_forever()
+
+    def start(self):
+        """在后台线程中运行"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 OpenAI 兼容测试服务")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--first-token-delay", type=float, default=0.3)
+    parser.add_argument("--token-delay", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    server = FakeLLMServer(port=args.port, first_token_delay=args.first_token_delay,
+                           token_delay=args.token_delay, jitter=args.jitter, seed=args.seed)
+    print(f"FakeLLMServer 已启动: {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
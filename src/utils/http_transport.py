@@ -0,0 +1,178 @@
+# src/utils/http_transport.py
+
+"""
+http_transport.py
+-----------------
+同步使用的 HTTP 传输层：
+- 复用 requests.Session 连接池，避免每次请求重新握手
+- 请求体超过阈值时压缩（安装了 zstandard 时优先 zstd，否则 gzip），并声明可接受压缩响应
+- 所有请求都有连接/读取超时
+- 连接错误、超时以及 429/5xx 响应按带抖动的指数退避重试，遵守 Retry-After
+- 统计请求数、重试数、传输字节数(压缩后)和延迟分位数
+"""
+
+import gzip
+import json
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.utils import metrics
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+# 可以安全重试的响应状态码
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(body)
+    return gzip.compress(body, compresslevel=6)
+
+
+def decompress_body(body: bytes, encoding: str) -> bytes:
+    """按 Content-Encoding 解压，供服务端替身使用"""
+    if encoding == "zstd":
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    return body
+
+
+class HttpTransport:
+    def __init__(self, timeout=(5.0, 30.0), max_retries: int = 4,
+                 backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 pool_size: int = 4, compress_threshold: int = 1024, compression: str = None):
+        """
+        :param timeout: (连接超时, 读取超时) 秒
+        :param max_retries: 失败后的最大重试次数
+        :param backoff_base: 第一次重试的退避上限(秒)，之后每次翻倍，实际等待在 [0, 上限] 内随机
+        :param backoff_max: 单次退避的最长时间(秒)
+        :param pool_size: 每个主机保持的最大连接数
+        :param compress_threshold: 请求体超过该字节数才压缩
+        :param compression: "zstd" / "gzip" / "none"，默认有 zstandard 时用 zstd
+        """
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.compress_threshold = compress_threshold
+        self.compression = compression or ("zstd" if HAS_ZSTD else "gzip")
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Accept-Encoding"] = "zstd, gzip" if HAS_ZSTD else "gzip"
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=512)  # 最近请求的延迟(毫秒)
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def request(self, method: str, url: str, json_body=None, params: dict = None, headers: dict = None):
+        """
+        发送请求并在可重试的失败时自动重试，返回最后一次的 requests.Response。
+        所有重试都失败且没有任何响应时抛出最后一次的异常。
+        """
+        headers = dict(headers or {})
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body, ensure_ascii=False).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+            if self.compression != "none" and len(body) > self.compress_threshold:
+                body = compress_body(body, self.compression)
+                headers["Content-Encoding"] = self.compression
+
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            response, error = None, None
+            try:
+                response = self.session.request(method, url, data=body, params=params,
+                                                headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            self._record(start, body, response, error)
+
+            if error is None and response.status_code not in RETRY_STATUS:
+                return response
+            if attempt >= self.max_retries:
+                if response is not None:
+                    return response
+                raise error
+            delay = self._backoff(attempt, response)
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+            time.sleep(delay)
+
+    def post_json(self, url: str, data, **kwargs):
+        return self.request("POST", url, json_body=data, **kwargs)
+
+    def get(self, url: str, params: dict = None, **kwargs):
+        return self.request("GET", url, params=params, **kwargs)
+
+    def _backoff(self, attempt: int, response) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        # full jitter：在 [0, base * 2^attempt] 内均匀随机，避免多个客户端同时重试
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _record(self, start: float, body: bytes, response, error):
+        latency_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.requests += 1
+            self._latencies.append(latency_ms)
+            self.bytes_sent += len(body or b"")
+            if error is not None:
+                self.errors += 1
+                metrics.count("http.errors")
+                return
+            # 优先使用 Content-Length（压缩后的大小），没有时退回解压后的长度
+            length = response.headers.get("Content-Length")
+            received = int(length) if length and length.isdigit() else len(response.content)
+            self.bytes_received += received
+        metrics.count("http.bytes_sent", len(body or b""))
+        metrics.count("http.bytes_received", received)
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "errors": self.errors,
+                "bytes_sent": self.bytes_sent,
+                "bytes_received": self.bytes_received,
+                "latency_ms_p50": _percentile(latencies, 50),
+                "latency_ms_p95": _percentile(latencies, 95),
+                "last_latency_ms": round(self._latencies[-1], 3) if self._latencies else None,
+            }
+
+    def close(self):
+        self.session.close()
+
+
+metrics.instrument_class(HttpTransport, "http", exclude=("stats", "close"))
+
+
+def _percentile(sorted_values: list, pct: float):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return round(sorted_values[index], 3)
@@ -0,0 +1,261 @@
+# src/utils/metrics.py
+
+"""
+metrics.py
+----------
+可选的性能埋点：耗时区间(span)与计数器(行数、字节数)，默认关闭。
+- instrument_class(cls, prefix) 登记一个类，启用时把它的公开方法替换成计时包装(名称为 prefix.方法名，
+  返回 list 时另计 prefix.方法名.rows)，关闭时还原为原函数，因此关闭状态下被登记的类没有任何额外开销
+- span(name) / record(name, ...) / count(name, n) 用于界面刷新等需要手动埋点的位置，关闭时只有一次属性判断
+- summary() 给出每个操作的次数、p50 / p95 / 最大耗时；dump_json / dump_chrome_trace 输出到文件，
+  后者可在 chrome://tracing 或 Perfetto 中按线程查看时间线
+设置环境变量 AINOTE_METRICS=1 时在启动时启用；AINOTE_METRICS_OUT / AINOTE_METRICS_TRACE 指定
+退出时写入的汇总 JSON / Chrome trace 文件(设置了任一项也会启用)。
+用法：
+    from src.utils import metrics
+    metrics.enable()
+    with metrics.span("ui.refresh_task_lists"):
+        ...
+    metrics.dump_chrome_trace("trace.json")
+"""
+
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class _NullSpan:
+    """关闭时 span() 返回的共享空对象"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "args", "start")
+
+    def __init__(self, metrics, name: str, args: dict):
+        self.metrics = metrics
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.record(self.name, self.start, time.perf_counter_ns(), **self.args)
+        return False
+
+
+class Metrics:
+    def __init__(self, max_samples: int = 2048, max_events: int = 200000):
+        """
+        :param max_samples: 每个操作保留最近多少次耗时用于计算分位数
+        :param max_events: Chrome trace 最多保留的事件数，超出后丢弃最早的
+        """
+        self.max_samples = max_samples
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter_ns()
+        self._ops = {}        # {name: [次数, 总纳秒, 最大纳秒, deque(最近耗时纳秒)]}
+        self._counters = {}   # {name: 累计值}
+        self._events = deque(maxlen=max_events)
+        self._threads = {}    # {线程 id: 线程名}
+        self._classes = []    # [(cls, prefix, exclude)]
+        self._patched = []    # [(cls, 方法名, 原函数)]
+
+    # ------------------- 开关 -------------------
+    def enable(self):
+        with self._lock:
+            if self.enabled:
+                return
+            self.enabled = True
+            for cls, prefix, exclude in self._classes:
+                self._patch(cls, prefix, exclude)
+
+    def disable(self):
+        with self._lock:
+            self.enabled = False
+            for cls, name, original in reversed(self._patched):
+                setattr(cls, name, original)
+            self._patched = []
+
+    def reset(self):
+        """清空已收集的数据，不改变开关状态"""
+        with self._lock:
+            self._ops = {}
+            self._counters = {}
+            self._events.clear()
+            self._origin = time.perf_counter_ns()
+
+    # ------------------- 埋点 -------------------
+    def instrument_class(self, cls, prefix: str, exclude=()):
+        """
+        登记 cls：启用时为其自身定义的公开方法计时。生成器、协程函数和上下文管理器
+        (如 Database.transaction)不计时，因为调用它们只是创建对象。
+        """
+        with self._lock:
+            self._classes.append((cls, prefix, frozenset(exclude)))
+            if self.enabled:
+                self._patch(cls, prefix, frozenset(exclude))
+        return cls
+
+    def _patch(self, cls, prefix: str, exclude: frozenset):
+        for name, fn in list(vars(cls).items()):
+            if name.startswith("_") or name in exclude or not inspect.isfunction(fn):
+                continue
+            target = getattr(fn, "__wrapped__", fn)
+            if inspect.isgeneratorfunction(target) or inspect.iscoroutinefunction(target):
+                continue
+            setattr(cls, name, self._timed(fn, f"{prefix}.{name}"))
+            self._patched.append((cls, name, fn))
+
+    def _timed(self, fn, name: str):
+        record, count = self.record, self.count
+
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                record(name, start, time.perf_counter_ns())
+            if isinstance(result, list):
+                count(name + ".rows", len(result))
+            return result
+        return timed
+
+    def span(self, name: str, **args):
+        """计时上下文：with metrics.span("ui.show_tasks", rows=10): ..."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def record(self, name: str, start_ns: int, end_ns: int, **args):
+        """记录一段已经结束的耗时(time.perf_counter_ns)，可用于跨回调的异步操作"""
+        if not self.enabled:
+            return
+        duration = end_ns - start_ns
+        thread = threading.current_thread()
+        with self._lock:
+            op = self._ops.get(name)
+            if op is None:
+                op = self._ops[name] = [0, 0, 0, deque(maxlen=self.max_samples)]
+            op[0] += 1
+            op[1] += duration
+            if duration > op[2]:
+                op[2] = duration
+            op[3].append(duration)
+            self._threads.setdefault(thread.ident, thread.name)
+            self._events.append(("X", name, start_ns, duration, thread.ident, args))
+
+    def count(self, name: str, value: int = 1):
+        """累加计数器，例如 count("http.bytes_sent", len(body))"""
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        with self._lock:
+            total = self._counters[name] = self._counters.get(name, 0) + value
+            self._events.append(("C", name, now, total, threading.get_ident(), None))
+
+    # ------------------- 输出 -------------------
+    def summary(self) -> dict:
+        """
+        {"operations": {"db.get_tasks": {"count": 12, "total_ms": 3.1, "p50_ms": 0.2, "p95_ms": 0.6, "max_ms": 0.9}, ...},
+         "counters": {"db.get_tasks.rows": 840, "http.bytes_sent": 10240, ...}}
+        分位数按最近 max_samples 次计算。
+        """
+        with self._lock:
+            ops = {name: (op[0], op[1], op[2], sorted(op[3])) for name, op in self._ops.items()}
+            counters = dict(self._counters)
+        operations = {}
+        for name in sorted(ops):
+            count, total, longest, samples = ops[name]
+            operations[name] = {
+                "count": count,
+                "total_ms": round(total / 1e6, 3),
+                "p50_ms": _percentile_ms(samples, 50),
+                "p95_ms": _percentile_ms(samples, 95),
+                "max_ms": round(longest / 1e6, 3),
+            }
+        return {"operations": operations, "counters": dict(sorted(counters.items()))}
+
+    def chrome_trace(self) -> dict:
+        """Chrome Trace Event 格式：每个区间一个 "X" 事件，计数器为 "C" 事件"""
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+            origin = self._origin
+        pid = os.getpid()
+        trace = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        ]
+        for phase, name, start, value, tid, args in events:
+            event = {"name": name, "cat": name.split(".", 1)[0], "ph": phase, "pid": pid, "tid": tid,
+                     "ts": (start - origin) / 1000}
+            if phase == "X":
+                event["dur"] = value / 1000
+                if args:
+                    event["args"] = args
+            else:
+                event["args"] = {"value": value}
+            trace.append(event)
+        return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+    def dump_json(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+
+    def dump_chrome_trace(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False)
+
+    def dump_if_enabled(self):
+        """退出时按 AINOTE_METRICS_OUT / AINOTE_METRICS_TRACE 写出结果"""
+        if os.environ.get("AINOTE_METRICS_OUT"):
+            self.dump_json(os.environ["AINOTE_METRICS_OUT"])
+        if os.environ.get("AINOTE_METRICS_TRACE"):
+            self.dump_chrome_trace(os.environ["AINOTE_METRICS_TRACE"])
+
+
+def _percentile_ms(sorted_ns: list, pct: float):
+    if not sorted_ns:
+        return None
+    index = min(len(sorted_ns) - 1, int(round(pct / 100 * (len(sorted_ns) - 1))))
+    return round(sorted_ns[index] / 1e6, 3)
+
+
+# 进程内共享的实例，模块级函数都作用于它
+METRICS = Metrics()
+enable = METRICS.enable
+disable = METRICS.disable
+reset = METRICS.reset
+instrument_class = METRICS.instrument_class
+span = METRICS.span
+record = METRICS.record
+count = METRICS.count
+summary = METRICS.summary
+dump_json = METRICS.dump_json
+dump_chrome_trace = METRICS.dump_chrome_trace
+dump_if_enabled = METRICS.dump_if_enabled
+
+
+def is_enabled() -> bool:
+    return METRICS.enabled
+
+
+if any(os.environ.get(key) for key in ("AINOTE_METRICS", "AINOTE_METRICS_OUT", "AINOTE_METRICS_TRACE")):
+    METRICS.enable()
@@ -0,0 +1,47 @@
+# src/utils/startup_profiler.py
+
+"""
+startup_profiler.py
+-------------------
+记录程序启动各阶段的耗时。每个阶段调用一次 mark(name)，
+记录距离进程启动(或 start 参数)的累计毫秒数以及与上一阶段的间隔。
+设置环境变量 AINOTE_STARTUP_PROFILE=1 时，启动完成后把结果以 JSON 输出到 stderr。
+"""
+
+import json
+import os
+import sys
+import time
+
+
+class StartupProfiler:
+    def __init__(self, start: float = None):
+        """
+        :param start: time.perf_counter() 的起点，默认为创建时刻
+        """
+        self.start = start if start is not None else time.perf_counter()
+        self.phases = []  # [(阶段名, 累计毫秒)]
+
+    def mark(self, name: str) -> float:
+        """记录一个阶段，返回累计毫秒数；同名阶段只记录第一次"""
+        if self.get(name) is None:
+            self.phases.append((name, (time.perf_counter() - self.start) * 1000))
+        return self.get(name)
+
+    def get(self, name: str) -> float:
+        for phase, elapsed in self.phases:
+            if phase == name:
+                return elapsed
+        return None
+
+    def report(self) -> dict:
+        """{"phases": [{"name", "at_ms", "delta_ms"}, ...], "total_ms": ...}"""
+        result, previous = [], 0.0
+        for name, elapsed in self.phases:
+            result.append({"name": name, "at_ms": round(elapsed, 2), "delta_ms": round(elapsed - previous, 2)})
+            previous = elapsed
+        return {"phases": result, "total_ms": round(previous, 2)}
+
+    def dump_if_enabled(self):
+        if os.environ.get("AINOTE_STARTUP_PROFILE"):
+            print(json.dumps(self.report(), ensure_ascii=False), file=sys.stderr)
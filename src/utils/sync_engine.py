@@ -4,21 +4,62 @@
 sync_engine.py
 --------------
 用于数据的同步功能，可将本地数据库或文件同步到远程服务器或云端。
-此处仅提供一个演示的结构，具体实现方式需根据实际需求和后端支持来完成。
+upload_data / download_data 为整包上传下载，upload_snapshot / merge_download 在此基础上
+传输带行版本的全量数据并按最后写入者胜出合并进本地；sync() 基于 Database 的 change_log 做增量同步：
+只推送上次确认之后的本地修改，只拉取本机游标之后的远端修改，流量与修改量成正比而不是与历史总量成正比。
+远端协议见 src/utils/sync_server.py，连接复用、压缩、超时和重试由 HttpTransport 负责。
+界面中不直接调用 sync()，由 src/utils/sync_scheduler.py 的 SyncScheduler 在后台线程中合并写入后调度。
 """
 
-import requests
 import json
 
+from src.utils import metrics
+from src.utils.http_transport import HttpTransport
+
 class SyncEngine:
-    def __init__(self, remote_url: str = None, api_key: str = None):
+    def __init__(self, remote_url: str = None, api_key: str = None,
+                 transport: HttpTransport = None, max_chunk_bytes: int = 256 * 1024):
         """
         初始化同步引擎，可设置远程URL和API Key等
         :param remote_url: 远程服务器的地址
         :param api_key: 鉴权Key等
+        :param transport: 共享的 HTTP 传输层，默认新建一个
+        :param max_chunk_bytes: 单次推送请求体(压缩前)的大致上限，超过时拆成多个请求
         """
         self.remote_url = remote_url
         self.api_key = api_key
+        self.transport = transport or HttpTransport()
+        self.max_chunk_bytes = max_chunk_bytes
+        self.last_sync_stats = {}
+
+    @property
+    def bytes_sent(self) -> int:
+        """累计发送的字节数(压缩后)"""
+        return self.transport.bytes_sent
+
+    @property
+    def bytes_received(self) -> int:
+        """累计接收的字节数(压缩后)"""
+        return self.transport.bytes_received
+
+    def _request(self, method: str, url: str, data: dict = None, params: dict = None):
+        headers = {}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return self.transport.request(method, url, json_body=data, params=params, headers=headers)
+
+    def _chunks(self, changes: list):
+        """按序列化后的大小把一批修改拆成多个请求体"""
+        chunk, size = [], 0
+        for change in changes:
+            change_size = len(json.dumps(change, ensure_ascii=False).encode("utf-8"))
+            if chunk and size + change_size > self.max_chunk_bytes:
+                yield chunk
+                chunk, size = [], 0
+            chunk.append(change)
+            size += change_size
+        if chunk:
+            yield chunk
 
     def upload_data(self, data: dict) -> bool:
         """
@@ -33,11 +74,7 @@ class SyncEngine:
         # 假设使用POST方式上传，以下为示例
         # 如果需要身份认证或更复杂的处理，可在此扩展
         try:
-            headers = {"Content-Type": "application/json"}
-            if self.api_key:
-                headers["Authorization"] = f"Bearer {self.api_key}"
-
-            response = requests.post(self.remote_url, headers=headers, data=json.dumps(data))
+            response = self._request("POST", self.remote_url, data=data)
             if response.status_code == 200:
                 print("数据上传成功！")
                 return True
@@ -58,11 +95,7 @@ class SyncEngine:
             return {}
 
         try:
-            headers = {}
-            if self.api_key:
-                headers["Authorization"] = f"Bearer {self.api_key}"
-
-            response = requests.get(self.remote_url, headers=headers)
+            response = self._request("GET", self.remote_url)
             if response.status_code == 200:
                 data = response.json()
                 print("数据下载成功！")
@@ -73,3 +106,92 @@ class SyncEngine:
         except Exception as e:
             print(f"数据下载异常: {e}")
             return {}
+
+    def upload_snapshot(self, db) -> bool:
+        """上传本地全部同步数据(带行版本和删除墓碑)，格式见 Database.snapshot_changes"""
+        return self.upload_data({"replica": db.replica_id, "changes": db.snapshot_changes()})
+
+    def merge_download(self, db) -> int:
+        """
+        下载远端整包数据并合并进本地数据库，返回实际应用的条数。
+        合并按行版本进行(最后写入者胜出)，在一个事务内完成，只修改比本地新的行，不需要清空重建。
+        """
+        data = self.download_data()
+        changes = data.get("changes", [])
+        if data.get("replica") == db.replica_id or not changes:
+            return 0
+        return db.apply_remote_changes(changes)
+
+    # ------------------- 增量同步 -------------------
+    def sync(self, db, batch_size: int = 500, pull: bool = True) -> dict:
+        """
+        先推送本地修改，再拉取远端修改。
+        :param db: Database 实例
+        :param batch_size: 每次请求最多包含的修改条数
+        :param pull: False 时只推送(例如退出前)，不拉取远端修改
+        :return: 本次同步的统计，例如
+                 {"ok": True, "pushed": 3, "pulled": 5, "bytes_sent": 812, "bytes_received": 1460}
+        """
+        stats = {"ok": False, "pushed": 0, "pulled": 0}
+        if not self.remote_url:
+            print("Error: remote_url未设置，无法同步数据。")
+            return stats
+        sent_before, received_before = self.bytes_sent, self.bytes_received
+        try:
+            stats["pushed"] = self.push_changes(db, batch_size)
+            if pull:
+                stats["pulled"] = self.pull_changes(db, batch_size)
+            stats["ok"] = True
+        except Exception as e:
+            stats["error"] = str(e)
+            print(f"数据同步异常: {e}")
+        stats["bytes_sent"] = self.bytes_sent - sent_before
+        stats["bytes_received"] = self.bytes_received - received_before
+        metrics.count("sync.pushed", stats["pushed"])
+        metrics.count("sync.pulled", stats["pulled"])
+        self.last_sync_stats = stats
+        return stats
+
+    def push_changes(self, db, batch_size: int = 500) -> int:
+        """
+        推送 push_cursor 之后的本地修改，每个分块被远端确认后推进游标并清理已确认的 change_log。
+        重试可能导致同一分块被远端收到两次，远端按 uid 应用修改，重复是无害的。
+        """
+        cursor = int(db.get_sync_state("push_cursor", 0))
+        replica = db.replica_id
+        pushed = 0
+        while True:
+            changes = db.get_changes_since(cursor, batch_size)
+            if not changes:
+                return pushed
+            for chunk in self._chunks(changes):
+                response = self._request("POST", f"{self.remote_url}/changes",
+                                         data={"replica": replica, "changes": chunk})
+                if response.status_code != 200:
+                    raise RuntimeError(f"推送修改失败，状态码：{response.status_code}")
+                cursor = chunk[-1]["seq"]
+                with db.transaction():
+                    db.set_sync_state("push_cursor", cursor)
+                    db.prune_change_log(cursor)
+                pushed += len(chunk)
+
+    def pull_changes(self, db, batch_size: int = 500) -> int:
+        """拉取 pull_cursor 之后的远端修改（不含本机推送的），应用与推进游标在同一事务中完成"""
+        cursor = int(db.get_sync_state("pull_cursor", 0))
+        replica = db.replica_id
+        pulled = 0
+        while True:
+            response = self._request("GET", f"{self.remote_url}/changes",
+                                     params={"since": cursor, "replica": replica, "limit": batch_size})
+            if response.status_code != 200:
+                raise RuntimeError(f"拉取修改失败，状态码：{response.status_code}")
+            data = response.json()
+            with db.transaction():
+                pulled += db.apply_remote_changes(data.get("changes", []))
+                cursor = data["cursor"]
+                db.set_sync_state("pull_cursor", cursor)
+            if not data.get("has_more"):
+                return pulled
+
+
+metrics.instrument_class(SyncEngine, "sync")
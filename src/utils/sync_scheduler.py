@@ -0,0 +1,268 @@
+# src/utils/sync_scheduler.py
+
+"""
+sync_scheduler.py
+-----------------
+后台同步调度：在独立线程中用自己的数据库连接调用 SyncEngine.sync，调用方(界面线程)从不等待网络。
+- notify_change() 记录一次本地写入；一串连续写入在停顿 debounce 秒后合并成一次同步，
+  持续写入时最迟 max_delay 秒也会同步一次
+- 没有本地修改时每 poll_interval 秒拉取一次远端修改
+- 同步失败(远端不可达等)后按带抖动的指数退避重试，成功后恢复正常节奏
+- start() 时先同步一次；stop() 时推送尚未推送的本地修改再退出
+- status() 返回状态、待推送行数和同步延迟，状态变化时也会调用 on_status
+用法：
+    scheduler = SyncScheduler(SyncEngine(remote_url=url), worker.db_name)
+    worker.add_write_listener(scheduler.notify_change)
+    scheduler.start()
+    ...
+    scheduler.stop()
+"""
+
+import random
+import threading
+import time
+
+from src.core.database import Database
+
+IDLE = "idle"          # 没有待推送的修改
+PENDING = "pending"    # 有本地修改，等待合并后同步
+SYNCING = "syncing"
+OFFLINE = "offline"    # 上次同步失败，等待退避后重试
+STOPPED = "stopped"
+
+
+class SyncScheduler:
+    def __init__(self, engine, db_name: str = None, debounce: float = 2.0, max_delay: float = 30.0,
+                 poll_interval: float = 60.0, backoff_base: float = 5.0, backoff_max: float = 300.0,
+                 on_status=None):
+        """
+        :param engine: SyncEngine 实例
+        :param db_name: 数据库文件，调度线程自己打开一个连接
+        :param debounce: 最后一次写入之后等待多久(秒)再同步
+        :param max_delay: 第一次未同步的写入之后最多等待多久(秒)
+        :param poll_interval: 没有本地修改时拉取远端修改的间隔(秒)，0 表示不定时拉取
+        :param backoff_base: 第一次失败后的重试等待(秒)，之后每次翻倍
+        :param backoff_max: 重试等待的上限(秒)
+        :param on_status: on_status(status, stats) 在调度线程中调用，status 同 status()，
+                          stats 为刚完成的那次 SyncEngine.sync 的结果(没有同步时为 None)
+        """
+        self.engine = engine
+        self.db_name = db_name
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.on_status = on_status
+
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._final_sync = True
+        self._forced = False
+        self._syncing = False
+        self._dirty_first = None   # 尚未同步的第一次 / 最后一次写入通知(monotonic)
+        self._dirty_last = None
+        self._last_attempt = None
+        self._retry_at = None
+        self._failures = 0         # 连续失败次数
+        self._attempts = 0
+        self._pending = 0
+        self._pending_since = None  # 最早一条未推送修改的时间(time.time())
+        self.notifications = 0      # 收到的写入通知次数
+        self.syncs = 0              # 成功的同步次数
+        self.last_sync_at = None
+        self.last_error = None
+        self.last_stats = {}
+
+    # ------------------- 对外接口 -------------------
+    def start(self, sync_now: bool = True):
+        """启动调度线程；sync_now 为 True 时立即同步一次"""
+        if self._thread is not None:
+            return self
+        with self._cond:
+            self._forced = sync_now
+            self._last_attempt = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="sync-scheduler", daemon=True)
+        self._thread.start()
+        return self
+
+    def notify_change(self, methods=None):
+        """
+        记录一次本地写入，可以在任意线程调用，立即返回。
+        参数兼容 DatabaseWorker.add_write_listener；没有产生待推送修改的写入(例如归档)不会触发网络请求。
+        """
+        now = time.monotonic()
+        with self._cond:
+            self.notifications += 1
+            first = self._dirty_first is None
+            if first:
+                self._dirty_first = now
+            self._dirty_last = now
+            if self._pending_since is None:
+                self._pending_since = time.time()
+            self._cond.notify_all()
+        if first:
+            self._emit()
+
+    def sync_now(self):
+        """不等待合并窗口和退避，尽快同步一次"""
+        with self._cond:
+            self._forced = True
+            self._cond.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        立即同步并等待完成(不会等待之前已经开始的那次)，返回这次同步是否成功；超时返回 False。
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            target = self._attempts + (2 if self._syncing else 1)
+            self._forced = True
+            self._cond.notify_all()
+            while self._attempts < target:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if (remaining is not None and remaining <= 0) or self._thread is None or not self._thread.is_alive():
+                    return False
+                self._cond.wait(remaining)
+            return self._failures == 0
+
+    def stop(self, final_sync: bool = True, timeout: float = 10.0):
+        """
+        停止调度线程。final_sync 为 True 时先推送尚未推送的本地修改(只尝试一次，不拉取)。
+        最多等待 timeout 秒，远端不可达时不会让调用方一直等待。
+        """
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._final_sync = final_sync
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def status(self) -> dict:
+        """
+        当前同步状态，例如
+        {"state": "pending", "pending": 3, "lag_seconds": 4.2, "last_sync_at": 1718000000.0,
+         "last_error": None, "retry_in": None, "failures": 0, "syncs": 12}
+        pending 为上次同步后数据库中待推送的行数；lag_seconds 为最早一条未推送修改距今的秒数，没有时为 None。
+        """
+        with self._cond:
+            return self._status()
+
+    # ------------------- 调度线程 -------------------
+    def _status(self) -> dict:
+        now = time.monotonic()
+        if self._thread is None or (self._stopping and not self._syncing):
+            state = STOPPED
+        elif self._syncing:
+            state = SYNCING
+        elif self._failures:
+            state = OFFLINE
+        elif self._pending or self._dirty_first is not None:
+            state = PENDING
+        else:
+            state = IDLE
+        return {
+            "state": state,
+            "pending": self._pending,
+            "lag_seconds": round(time.time() - self._pending_since, 3) if self._pending_since else None,
+            "last_sync_at": self.last_sync_at,
+            "last_error": self.last_error,
+            "retry_in": round(max(0.0, self._retry_at - now), 3) if self._failures else None,
+            "failures": self._failures,
+            "syncs": self.syncs,
+        }
+
+    def _next_due(self):
+        """下一次同步的时间(monotonic)和原因，没有需要做的事时时间为 None"""
+        if self._forced:
+            return 0.0, "forced"
+        if self._failures:
+            return self._retry_at, "retry"
+        if self._dirty_first is not None:
+            return min(self._dirty_last + self.debounce, self._dirty_first + self.max_delay), "change"
+        if self.poll_interval:
+            return self._last_attempt + self.poll_interval, "poll"
+        return None, None
+
+    def _wait(self):
+        """等到下一次同步的时间，返回原因；收到停止请求时返回 None"""
+        with self._cond:
+            while not self._stopping:
+                due, reason = self._next_due()
+                timeout = None if due is None else due - time.monotonic()
+                if timeout is not None and timeout <= 0:
+                    self._forced = False
+                    self._dirty_first = self._dirty_last = None
+                    self._syncing = True
+                    return reason
+                self._cond.wait(timeout)
+            return None
+
+    def _run(self):
+        db = Database(self.db_name)
+        try:
+            self._refresh_pending(db)
+            while True:
+                reason = self._wait()
+                if reason is None:
+                    break
+                # 由写入触发、但这些写入没有产生待推送修改时不访问网络
+                stats = None
+                if reason != "change" or self._refresh_pending(db):
+                    stats = self.engine.sync(db)
+                self._refresh_pending(db)
+                self._finish(stats)
+                self._emit(stats)
+            if self._final_sync and self._refresh_pending(db):
+                with self._cond:
+                    self._syncing = True
+                stats = self.engine.sync(db, pull=False)
+                self._refresh_pending(db)
+                self._finish(stats)
+        finally:
+            with self._cond:
+                self._syncing = False
+                self._cond.notify_all()
+            db.close()
+            self._emit()
+
+    def _refresh_pending(self, db) -> int:
+        pending = db.get_pending_changes()
+        with self._cond:
+            self._pending = pending["pending"]
+            if not self._pending:
+                self._pending_since = None
+            elif pending["oldest_ms"]:
+                self._pending_since = pending["oldest_ms"] / 1000
+            return self._pending
+
+    def _finish(self, stats):
+        """记录一次同步的结果；stats 为 None 表示这次不需要同步"""
+        now = time.monotonic()
+        with self._cond:
+            self._syncing = False
+            self._attempts += 1
+            if stats is not None:
+                self._last_attempt = now
+                self.last_stats = stats
+                if stats.get("ok"):
+                    self._failures = 0
+                    self.syncs += 1
+                    self.last_sync_at = time.time()
+                    self.last_error = None
+                else:
+                    self._failures += 1
+                    self.last_error = stats.get("error") or "同步失败"
+                    # 在 [上限/2, 上限] 内随机，避免多台机器同时重试
+                    delay = min(self.backoff_max, self.backoff_base * 2 ** (self._failures - 1))
+                    self._retry_at = now + random.uniform(delay / 2, delay)
+            self._cond.notify_all()
+
+    def _emit(self, stats: dict = None):
+        if self.on_status is not None:
+            try:
+                self.on_status(self.status(), stats)
+            except Exception:
+                pass
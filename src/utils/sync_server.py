@@ -0,0 +1,164 @@
+# src/utils/sync_server.py
+
+"""
+sync_server.py
+--------------
+本地同步服务替身，用于在没有真实后端时测试 SyncEngine 并测量传输字节数。
+数据只保存在内存中：
+    POST /changes            body: {"replica": "...", "changes": [...]}   -> {"cursor": 12}
+    GET  /changes?since=N&replica=R&limit=M                               -> {"changes": [...], "cursor": 20, "has_more": false}
+    GET  /  、 POST /        兼容 upload_data / download_data 的整包上传下载
+拉取时会排除请求方自己推送的修改。
+支持 gzip / zstd 压缩的请求体，客户端声明 Accept-Encoding: gzip 时压缩较大的响应。
+字节统计按线路上的(压缩后)大小计算。
+用法：
+    with SyncServer() as server:
+        engine = SyncEngine(remote_url=server.url)
+"""
+
+import argparse
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from src.utils.http_transport import decompress_body
+
+# 响应体超过该字节数且客户端接受 gzip 时压缩
+COMPRESS_THRESHOLD = 1024
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b""
+        self.server.owner.record_traffic(received=len(raw))
+        raw = decompress_body(raw, self.headers.get("Content-Encoding", ""))
+        return json.loads(raw or b"{}")
+
+    def _send_json(self, data, status: int = 200):
+        payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        compressed = len(payload) > COMPRESS_THRESHOLD and "gzip" in self.headers.get("Accept-Encoding", "")
+        if compressed:
+            payload = gzip.compress(payload, compresslevel=6)
+        self.server.owner.record_traffic(sent=len(payload))
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if compressed:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        server = self.server.owner
+        server.record_traffic(request=True)
+        url = urlparse(self.path)
+        if url.path.rstrip("/") == "/changes":
+            query = parse_qs(url.query)
+            since = int(query.get("since", ["0"])[0])
+            replica = query.get("replica", [None])[0]
+            limit = int(query.get("limit", ["1000"])[0])
+            self._send_json(server.changes_since(since, replica, limit))
+        elif url.path == "/":
+            self._send_json(server.snapshot)
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        server = self.server.owner
+        server.record_traffic(request=True)
+        url = urlparse(self.path)
+        body = self._read_json()
+        if url.path.rstrip("/") == "/changes":
+            cursor = server.add_changes(body.get("replica"), body.get("changes", []))
+            self._send_json({"cursor": cursor})
+        elif url.path == "/":
+            server.snapshot = body
+            self._send_json({"ok": True})
+        else:
+            self.send_error(404)
+
+
+class SyncServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.snapshot = {}
+        self.log = []            # [(server_seq, replica, change)]
+        self.bytes_received = 0  # 请求体字节数
+        self.bytes_sent = 0      # 响应体字节数
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.owner = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record_traffic(self, received: int = 0, sent: int = 0, request: bool = False):
+        with self._lock:
+            self.bytes_received += received
+            self.bytes_sent += sent
+            self.requests += request
+
+    def add_changes(self, replica: str, changes: list) -> int:
+        with self._lock:
+            for change in changes:
+                self.log.append((len(self.log) + 1, replica, change))
+            return len(self.log)
+
+    def changes_since(self, since: int, replica: str, limit: int) -> dict:
+        with self._lock:
+            result, cursor = [], since
+            for seq, origin, change in self.log[since:]:
+                if len(result) >= limit:
+                    break
+                cursor = seq
+                if origin != replica:
+                    result.append(change)
+            return {"changes": result, "cursor": cursor, "has_more": cursor < len(self.log)}
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地同步服务替身")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+    server = SyncServer(port=args.port)
+    print(f"SyncServer 已启动: {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
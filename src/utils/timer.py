@@ -4,10 +4,70 @@
 timer.py
 --------
 提供番茄钟等定时功能，记录某项任务的累计时间，并支持设置目标时间或闹钟提醒。
-此示例基于PyQt的QTimer实现，也可使用 threading.Timer 或 asyncio 等方式。
+已用时间由单调时钟的读数差计算，不依赖 QTimer 触发的次数：
+- 事件循环卡顿时不会少算时间，定时器晚到多久就补多久
+- 有 CLOCK_BOOTTIME 的平台上计入系统休眠的时间
+- 到点提醒只用一个单次定时器；每秒刷新显示的定时器只在界面可见时运行
 """
 
-from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+import time
+
+from PyQt5.QtCore import QObject, QTimer, Qt, pyqtSignal
+
+
+def default_clock():
+    """
+    返回计时用的时钟函数(秒)。
+    Linux 的 time.monotonic() 在系统挂起期间停止计数，优先使用包含挂起时间的 CLOCK_BOOTTIME。
+    """
+    boottime = getattr(time, "CLOCK_BOOTTIME", None)
+    if boottime is not None:
+        try:
+            time.clock_gettime(boottime)
+            return lambda: time.clock_gettime(boottime)
+        except OSError:
+            pass
+    return time.monotonic
+
+
+class Stopwatch:
+    """
+    与 Qt 无关的秒表：运行中的时间 = 已累计时间 + (当前时钟 - 本段开始时钟)。
+    clock 可以替换成假时钟，用于验证计时精度。
+    """
+
+    def __init__(self, clock=None):
+        self.clock = clock or default_clock()
+        self._accumulated = 0.0   # 之前各段(暂停前)的累计秒数
+        self._started_at = None   # 当前段开始时的时钟读数，None 表示未运行
+
+    @property
+    def running(self) -> bool:
+        return self._started_at is not None
+
+    def start(self, already_used_seconds: float = 0):
+        self._accumulated = float(already_used_seconds)
+        self._started_at = self.clock()
+
+    def pause(self):
+        if self._started_at is not None:
+            self._accumulated += self.clock() - self._started_at
+            self._started_at = None
+
+    def resume(self):
+        if self._started_at is None:
+            self._started_at = self.clock()
+
+    def reset(self):
+        self._accumulated = 0.0
+        self._started_at = None
+
+    def elapsed(self) -> float:
+        """当前已用秒数(浮点)"""
+        if self._started_at is None:
+            return self._accumulated
+        return self._accumulated + (self.clock() - self._started_at)
+
 
 class PomodoroTimer(QObject):
     """
@@ -19,14 +79,28 @@ class PomodoroTimer(QObject):
     # 当目标时间达到时发出这个信号
     timeReached = pyqtSignal()
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, clock=None):
+        """
+        :param clock: 返回秒数的单调时钟，默认见 default_clock()
+        """
         super().__init__(parent)
-        self._accumulated_seconds = 0  # 当前累计的秒数
+        self._stopwatch = Stopwatch(clock)
         self._target_seconds = 0       # 目标总秒数
-        self._timer = QTimer()
-        self._timer.timeout.connect(self._on_timeout)
-        self._timer.setInterval(1000)  # 每秒更新一次
         self._running = False
+        self._display_active = True    # 界面是否可见，不可见时不做每秒刷新
+        self._last_emitted = None
+
+        # 到点提醒：单次定时器，只在目标时刻唤醒一次
+        self._deadline_timer = QTimer(self)
+        self._deadline_timer.setSingleShot(True)
+        self._deadline_timer.setTimerType(Qt.PreciseTimer)
+        self._deadline_timer.timeout.connect(self._check_deadline)
+
+        # 显示刷新：对齐到整秒的单次定时器，每次触发后重新安排
+        self._tick_timer = QTimer(self)
+        self._tick_timer.setSingleShot(True)
+        self._tick_timer.setTimerType(Qt.CoarseTimer)
+        self._tick_timer.timeout.connect(self._on_tick)
 
     def start_timer(self, target_seconds: int, already_used_seconds: int = 0):
         """
@@ -35,43 +109,99 @@ class PomodoroTimer(QObject):
         :param already_used_seconds: 当前已经用掉的时间(秒)，可在暂停后恢复时使用
         """
         self._target_seconds = target_seconds
-        self._accumulated_seconds = already_used_seconds
+        self._stopwatch.start(already_used_seconds)
         self._running = True
-        self._timer.start()
+        self._schedule()
 
     def pause_timer(self):
         """暂停计时"""
+        self._stopwatch.pause()
         self._running = False
-        self._timer.stop()
+        self._deadline_timer.stop()
+        self._tick_timer.stop()
 
     def resume_timer(self):
         """继续计时"""
         if not self._running:
+            self._stopwatch.resume()
             self._running = True
-            self._timer.start()
+            self._schedule()
 
     def stop_timer(self):
         """停止计时，并重置所有数据"""
-        self._running = False
-        self._timer.stop()
-        self._accumulated_seconds = 0
+        self.pause_timer()
+        self._stopwatch.reset()
         self._target_seconds = 0
+        self._last_emitted = None
 
-    def _on_timeout(self):
+    def set_display_active(self, active: bool):
         """
-        每秒触发一次，累计时间+1，若达目标则发出信号
+        界面显示/隐藏时调用。隐藏期间只保留到点提醒的定时器；
+        重新显示时立即按真实已用时间刷新一次。
         """
-        if self._running:
-            self._accumulated_seconds += 1
-            self.timeUpdated.emit(self._accumulated_seconds)
-            if self._target_seconds > 0 and self._accumulated_seconds >= self._target_seconds:
+        self._display_active = active
+        if not active:
+            self._tick_timer.stop()
+        elif self._running:
+            self._on_tick()
+
+    def is_running(self) -> bool:
+        return self._running
+
+    def _schedule(self):
+        """根据当前已用时间重新安排到点定时器和显示定时器"""
+        if not self._running:
+            return
+        if self._target_seconds > 0:
+            remaining = self._target_seconds - self._stopwatch.elapsed()
+            self._deadline_timer.start(max(0, int(remaining * 1000)))
+        if self._display_active:
+            self._schedule_tick()
+
+    def _schedule_tick(self):
+        # 在下一个整秒边界刷新，显示的秒数与真实时间同步跳动
+        elapsed_ms = int(self._stopwatch.elapsed() * 1000)
+        self._tick_timer.start(1000 - elapsed_ms % 1000)
+
+    def _on_tick(self):
+        if not self._running:
+            return
+        self._emit_update()
+        if self._check_deadline() and self._display_active:
+            self._schedule_tick()
+
+    def _emit_update(self):
+        seconds = self.get_accumulated_seconds()
+        if seconds != self._last_emitted:
+            self._last_emitted = seconds
+            self.timeUpdated.emit(seconds)
+
+    def _check_deadline(self) -> bool:
+        """
+        若已达目标则发出 timeReached 并暂停，返回 False；否则返回 True。
+        定时器可能因为精度提前触发，未到点时按剩余时间重新安排。
+        """
+        if not self._running:
+            return False
+        if self._target_seconds > 0:
+            remaining = self._target_seconds - self._stopwatch.elapsed()
+            if remaining <= 0:
+                self._emit_update()
                 self.timeReached.emit()
                 # 可在此自动停止或自行决定
                 self.pause_timer()
+                return False
+            if not self._deadline_timer.isActive():
+                self._deadline_timer.start(max(1, int(remaining * 1000)))
+        return True
 
     def get_accumulated_seconds(self):
         """返回当前已累计的秒数"""
-        return self._accumulated_seconds
+        return int(self._stopwatch.elapsed())
+
+    def get_elapsed(self) -> float:
+        """返回当前已累计的秒数(浮点，不取整)"""
+        return self._stopwatch.elapsed()
 
     def get_target_seconds(self):
         """返回当前目标的总秒数"""